@@ -0,0 +1,236 @@
+import gc
+import math
+import time
+import tracemalloc
+import pandas as pd
+import pyomo.core as pyomo
+import urbs
+from pyomo.repn import generate_standard_repn
+from urbs.model import (co2_rule, def_costs_rule, res_buy_total_rule,
+                        res_env_total_rule, res_global_co2_limit_rule,
+                        res_sell_total_rule, res_stock_total_rule)
+from urbs.modelhelper import co2_tuples, commodity_subset
+
+# Benchmark of the cost and total limit rows: construction time and memory
+# of their expressions, built with the flat quicksum rules of urbs.model
+# ('new') and with the nested sum rules they replaced ('baseline'), on the
+# same full-year model. The generated rows are compared coefficient by
+# coefficient, so the benchmark also checks that both are the same LP.
+
+input_file = 'mimo-example.xlsx'
+timesteps = range(1, 8761)  # full year
+dt = 1
+
+
+# baseline rules, as before the flat quicksum rewrite
+
+def baseline_total_rule(var_name, com_set, sign=1):
+    def total_rule(m, sit, com, com_type):
+        if com not in getattr(m, com_set):
+            return pyomo.Constraint.Skip
+        total = 0
+        for tm in m.tm:
+            total += sign * getattr(m, var_name)[tm, sit, com, com_type]
+        total *= m.weight
+        return total <= m.commodity_dict['max'][(sit, com, com_type)]
+    return total_rule
+
+
+def baseline_co2_sum(m):
+    co2_output_sum = 0
+    for tm in m.tm:
+        for co2_tuple in co2_tuples(m):
+            co2_output_sum += (- m.e_co_balance[(tm,) + co2_tuple])
+    co2_output_sum *= m.weight
+    return co2_output_sum
+
+
+def baseline_res_global_co2_limit_rule(m):
+    limit = m.global_prop_dict['value']['CO2 limit']
+    if math.isinf(limit) or limit < 0:
+        return pyomo.Constraint.Skip
+    return baseline_co2_sum(m) <= limit
+
+
+def baseline_buy_sell_sum(m, var, tuples):
+    try:
+        return sum(var[(tm,) + c] * m.weight *
+                   m.buy_sell_price_dict[c[1], ][tm] *
+                   m.commodity_dict['price'][c]
+                   for tm in m.tm for c in tuples)
+    except KeyError:
+        return sum(var[(tm,) + c] * m.weight *
+                   m.buy_sell_price_dict[c[1]][tm] *
+                   m.commodity_dict['price'][c]
+                   for tm in m.tm for c in tuples)
+
+
+def baseline_def_costs_rule(m, cost_type):
+    if cost_type == 'Invest':
+        return m.costs[cost_type] == \
+            sum(m.cap_pro_new[p] *
+                m.process_dict['inv-cost'][p] *
+                m.process_dict['annuity-factor'][p]
+                for p in m.pro_tuples) + \
+            sum(m.cap_tra_new[t] *
+                m.transmission_dict['inv-cost'][t] *
+                m.transmission_dict['annuity-factor'][t]
+                for t in m.tra_tuples) + \
+            sum(m.cap_sto_p_new[s] *
+                m.storage_dict['inv-cost-p'][s] *
+                m.storage_dict['annuity-factor'][s] +
+                m.cap_sto_c_new[s] *
+                m.storage_dict['inv-cost-c'][s] *
+                m.storage_dict['annuity-factor'][s]
+                for s in m.sto_tuples)
+    elif cost_type == 'Fixed':
+        return m.costs[cost_type] == \
+            sum(m.cap_pro[p] * m.process_dict['fix-cost'][p]
+                for p in m.pro_tuples) + \
+            sum(m.cap_tra[t] * m.transmission_dict['fix-cost'][t]
+                for t in m.tra_tuples) + \
+            sum(m.cap_sto_p[s] * m.storage_dict['fix-cost-p'][s] +
+                m.cap_sto_c[s] * m.storage_dict['fix-cost-c'][s]
+                for s in m.sto_tuples)
+    elif cost_type == 'Variable':
+        return m.costs[cost_type] == \
+            sum(m.tau_pro[(tm,) + p] * m.weight *
+                m.process_dict['var-cost'][p]
+                for tm in m.tm
+                for p in m.pro_tuples) + \
+            sum(m.e_tra_in[(tm,) + t] * m.weight *
+                m.transmission_dict['var-cost'][t]
+                for tm in m.tm
+                for t in m.tra_tuples) + \
+            sum(m.e_sto_con[(tm,) + s] * m.weight *
+                m.storage_dict['var-cost-c'][s] +
+                m.weight *
+                (m.e_sto_in[(tm,) + s] + m.e_sto_out[(tm,) + s]) *
+                m.storage_dict['var-cost-p'][s]
+                for tm in m.tm
+                for s in m.sto_tuples)
+    elif cost_type == 'Fuel':
+        return m.costs[cost_type] == sum(
+            m.e_co_stock[(tm,) + c] * m.weight *
+            m.commodity_dict['price'][c]
+            for tm in m.tm for c in m.com_tuples
+            if c[1] in m.com_stock)
+    elif cost_type == 'Revenue':
+        return m.costs[cost_type] == -baseline_buy_sell_sum(
+            m, m.e_co_sell, commodity_subset(m.com_tuples, m.com_sell))
+    elif cost_type == 'Purchase':
+        return m.costs[cost_type] == baseline_buy_sell_sum(
+            m, m.e_co_buy, commodity_subset(m.com_tuples, m.com_buy))
+    elif cost_type == 'Environmental':
+        return m.costs[cost_type] == sum(
+            - m.e_co_balance[tm, sit, com, com_type] *
+            m.weight *
+            m.commodity_dict['price'][(sit, com, com_type)]
+            for tm in m.tm
+            for sit, com, com_type in m.com_tuples
+            if com in m.com_env)
+    else:
+        raise NotImplementedError("Unknown cost type.")
+
+
+def build(prob, name, make_component):
+    """ Add component make_component() to prob as name, twice: once timed,
+    once with tracemalloc to measure the memory it keeps allocated. Return
+    (component, seconds, bytes); the component is deactivated. """
+    gc.collect()
+    t_start = time.time()
+    prob.add_component(name, make_component())
+    t_build = time.time() - t_start
+    prob.del_component(name)
+
+    gc.collect()
+    tracemalloc.start()
+    prob.add_component(name, make_component())
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    component = prob.component(name)
+    component.deactivate()
+    return component, t_build, memory
+
+
+def rows(component):
+    """ Return {index: {variable name: coefficient}} of a component. """
+    result = {}
+    for index, row in component.items():
+        repn = generate_standard_repn(
+            row.expr if component.type() is pyomo.Objective else row.body)
+        result[index] = dict(
+            (v.name, c) for v, c in zip(repn.linear_vars, repn.linear_coefs))
+    return result
+
+
+def max_difference(rows_a, rows_b):
+    """ Return largest relative coefficient difference of two row sets. """
+    if set(rows_a) != set(rows_b):
+        return float('inf')
+    difference = 0.0
+    for index in rows_a:
+        a, b = rows_a[index], rows_b[index]
+        if set(a) != set(b):
+            return float('inf')
+        for var in a:
+            difference = max(difference,
+                             abs(a[var] - b[var]) / max(abs(a[var]), 1.0))
+    return difference
+
+
+def objective(rule):
+    return lambda: pyomo.Objective(rule=rule, sense=pyomo.minimize)
+
+
+def constraint(rule, *index):
+    return lambda: pyomo.Constraint(*index, rule=rule)
+
+
+data = urbs.read_excel(input_file)
+prob = urbs.create_model(data, dt, timesteps)
+
+benchmarks = [
+    ('def_costs',
+     constraint(def_costs_rule, prob.cost_type),
+     constraint(baseline_def_costs_rule, prob.cost_type)),
+    ('res_stock_total',
+     constraint(res_stock_total_rule, prob.com_tuples),
+     constraint(baseline_total_rule('e_co_stock', 'com_stock'),
+                prob.com_tuples)),
+    ('res_sell_total',
+     constraint(res_sell_total_rule, prob.com_tuples),
+     constraint(baseline_total_rule('e_co_sell', 'com_sell'),
+                prob.com_tuples)),
+    ('res_buy_total',
+     constraint(res_buy_total_rule, prob.com_tuples),
+     constraint(baseline_total_rule('e_co_buy', 'com_buy'),
+                prob.com_tuples)),
+    ('res_env_total',
+     constraint(res_env_total_rule, prob.com_tuples),
+     constraint(baseline_total_rule('e_co_balance', 'com_env', -1),
+                prob.com_tuples)),
+    ('res_global_co2_limit',
+     constraint(res_global_co2_limit_rule),
+     constraint(baseline_res_global_co2_limit_rule)),
+    ('co2 objective',
+     objective(co2_rule),
+     objective(baseline_co2_sum)),
+]
+
+table = []
+for name, new, baseline in benchmarks:
+    new_component, new_time, new_memory = build(prob, 'bench_new', new)
+    old_component, old_time, old_memory = build(prob, 'bench_old', baseline)
+    table.append((name, len(new_component), old_time, new_time,
+                  old_memory / 1e6, new_memory / 1e6,
+                  max_difference(rows(old_component), rows(new_component))))
+    prob.del_component('bench_new')
+    prob.del_component('bench_old')
+
+table = pd.DataFrame(table, columns=['Rows', 'Members', 'Time baseline',
+                                     'Time new', 'MB baseline', 'MB new',
+                                     'Max coef diff']).set_index('Rows')
+print("{} timesteps, times in seconds".format(len(prob.tm)))
+print(table.to_string(float_format='{:.3g}'.format))
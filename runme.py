@@ -3,6 +3,7 @@ import time
 import pandas as pd
 import pyomo.environ
 import shutil
+import sys
 import urbs
 from datetime import datetime
 from pyomo.opt.base import SolverFactory
@@ -10,7 +11,12 @@ from pyomo.opt.base import SolverFactory
 
 input_file = 'mimo-example.xlsx'
 result_name = os.path.splitext(input_file)[0]  # cut away file extension
-result_dir = urbs.prepare_result_directory(result_name)  # name+time stamp
+
+# 'python runme.py --resume' continues the most recent (interrupted) run in
+# its result directory, skipping scenarios that are already done
+resume = '--resume' in sys.argv
+result_dir = urbs.prepare_result_directory(result_name,
+                                           resume=resume)  # name+time stamp
 
 # copy input file to result directory
 shutil.copyfile(input_file, os.path.join(result_dir, input_file))
@@ -21,6 +27,7 @@ shutil.copy('urbs/scenarios.py', result_dir)
 
 # choose solver (cplex, glpk, gurobi, ...)
 solver = 'glpk'
+solver_profile = None  # e.g. 'fast-screening' (c.f. urbs.SOLVER_PROFILES)
 
 # objective function
 objective = 'cost'  # set either 'cost' or 'CO2' as objective
@@ -29,6 +36,14 @@ objective = 'cost'  # set either 'cost' or 'CO2' as objective
 (offset, length) = (3500, 168)  # time step selection
 timesteps = range(offset, offset+length+1)
 dt = 1  # length of each time step (unit: hours)
+resolution = None  # e.g. 3 or 6 to resample time series for screening
+memory_budget = None  # e.g. 8000 (MB) to refuse models that would not fit
+scale = False  # set True to solve in scaled cost and energy units
+
+# runs of identical input data reuse the result of the first one in a batch;
+# with a directory of results shared by all runs, e.g. 'result/cache', they
+# also reuse results stored there by earlier batches
+result_cache = None
 
 # plotting commodities/sites
 plot_tuples = [
@@ -82,19 +97,25 @@ scenarios = [
     # urbs.scenario_all_together
 ]
 
-# create timelog
-timelog = open(os.path.join(result_dir, "timelog.txt"), "a")
-timelog.write("Total\tread\tmodel\tsolve\tplot\r\n")
-timelog.close()
-
-for scenario in scenarios:
-    prob = urbs.run_scenario(input_file, solver, timesteps, scenario,
-                        result_dir, dt, objective,
-                        plot_tuples=plot_tuples,
-                        plot_sites_name=plot_sites_name,
-                        plot_periods=plot_periods,
-                        report_tuples=report_tuples,
-                        report_sites_name=report_sites_name)
-
-# open timelog file
-os.startfile(os.path.join(result_dir, "timelog.txt"))
\ No newline at end of file
+# run all scenarios; completion state is recorded in state.json, failed
+# scenarios do not abort the batch
+state = urbs.run_scenarios(input_file, solver, timesteps, scenarios,
+                           result_dir, dt, objective, resume=resume,
+                           result_cache=result_cache,
+                           plot_tuples=plot_tuples,
+                           plot_sites_name=plot_sites_name,
+                           plot_periods=plot_periods,
+                           report_tuples=report_tuples,
+                           report_sites_name=report_sites_name,
+                           resolution=resolution,
+                           memory_budget=memory_budget,
+                           scale=scale,
+                           solver_profile=solver_profile)
+
+# summarize run metrics (timings in sec, peak memory in MB) of all scenarios
+metrics_file = os.path.join(result_dir, 'metrics.jsonl')
+if os.path.exists(metrics_file):
+    metrics = urbs.read_metrics(metrics_file)
+    print(metrics[['scenario', 'time_total', 'time_model', 'time_solve',
+                   'rss_model', 'rss_solve', 'rss_solver', 'variables',
+                   'constraints']])
@@ -0,0 +1,33 @@
+import os
+import pyomo.environ
+import urbs
+
+# Solve the same scenario without and with scaling (c.f. urbs.scale_model)
+# and compare solver time and iterations from the shared metrics file.
+# Iterations are read from the solver log, so they are only reported for
+# solvers whose log urbs.parse_solver_log understands.
+
+input_file = 'mimo-example.xlsx'
+solver = 'glpk'
+objective = 'cost'
+(offset, length) = (3500, 672)  # four weeks
+timesteps = range(offset, offset+length+1)
+dt = 1
+
+result_dir = urbs.prepare_result_directory('scaling')
+metrics_file = os.path.join(result_dir, 'metrics.jsonl')
+
+for scale in (False, True):
+    run_dir = os.path.join(result_dir, 'scaled' if scale else 'unscaled')
+    os.makedirs(run_dir)
+    urbs.run_scenario(input_file, solver, timesteps, urbs.scenario_base,
+                      run_dir, dt, objective, instrument=True,
+                      metrics_file=metrics_file, scale=scale)
+
+# records are appended in order of the runs above
+metrics = urbs.read_metrics(metrics_file)
+metrics['scale'] = [False, True]
+columns = ['scale', 'time_solve', 'iterations', 'termination',
+           'objective_value', 'cost_unit', 'energy_unit']
+print(metrics[[column for column in columns if column in metrics]]
+      .set_index('scale').to_string())
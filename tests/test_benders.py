@@ -0,0 +1,57 @@
+import os
+import unittest
+import pyomo.environ
+import urbs
+from pyomo.opt.base import SolverFactory
+from urbs.benders import create_master
+
+INPUT_FILE = os.path.join(os.path.dirname(__file__), '..',
+                          'mimo-example.xlsx')
+
+
+@unittest.skipUnless(SolverFactory('glpk').available(exception_flag=False),
+                     'solver glpk not available')
+class TestBenders(unittest.TestCase):
+
+    def test_two_blocks_match_monolithic_model(self):
+        # storages, DSM, maximum gradients and the CO2 limit of the example
+        # all couple timesteps across the two blocks
+        data = urbs.read_excel(INPUT_FILE)
+        timesteps = range(3500, 3549)
+
+        prob = urbs.create_model(data, 1, timesteps)
+        result = SolverFactory('glpk').solve(prob)
+        self.assertEqual(str(result.solver.termination_condition), 'optimal')
+        monolithic = prob.objective_function()
+
+        decomposed = urbs.benders(data, 'glpk', timesteps, block_length=24,
+                                  processes=2, tolerance=1e-6,
+                                  max_iterations=1000)
+        costs = urbs.get_entity(decomposed, 'costs').sum()
+        self.assertAlmostEqual(costs / monolithic, 1, delta=1e-4)
+
+
+class TestBlockLinks(unittest.TestCase):
+
+    def test_links_cover_cross_block_couplings(self):
+        data = urbs.read_excel(INPUT_FILE)
+        blocks = urbs.time_blocks(range(3500, 3549), 24)
+        shares = [0.5, 0.5]
+        master = create_master(data, 1, range(3500, 3549), blocks, shares,
+                               1e6)
+        kinds = set(kind for kind, _ in master._links)
+        self.assertTrue(set(['storage', 'throughput', 'dsm_down',
+                             'budget']) <= kinds)
+
+        # DSM downshifts between blocks are rows of both blocks
+        for kind, (t, tt, sit, com) in (link for link in master._links
+                                        if link[0] == 'dsm_down'):
+            self.assertNotEqual(t <= 3524, tt <= 3524)
+            self.assertIn(('def_dsm_variables', (t, sit, com)),
+                          master._rows[0 if t <= 3524 else 1])
+            self.assertIn(('res_dsm_downward', (tt, sit, com)),
+                          master._rows[0 if tt <= 3524 else 1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+import os
+import shutil
+import socket
+import stat
+import tempfile
+import threading
+import time
+import unittest
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client
+import pyomo.core as pyomo
+import pyomo.environ
+from pyomo.opt.base import SolverFactory
+from urbs import apply_scenario, create_model, scenarios, server
+
+INPUT_FILE = os.path.join(os.path.dirname(__file__), '..',
+                          'mimo-example.xlsx')
+
+
+def free_port():
+    """ Return a currently unused TCP port on localhost. """
+    sock = socket.socket()
+    sock.bind((server.HOST, 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+class TestServer(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.key_dir = server.KEY_DIR
+        server.KEY_DIR = os.path.join(self.tmp_dir, 'keys')
+        self.port = free_port()
+        self.thread = threading.Thread(target=server.serve,
+                                       kwargs={'port': self.port})
+        self.thread.start()
+        for _ in range(100):
+            if os.path.exists(server.authkey_file(self.port)):
+                break
+            time.sleep(0.1)
+
+    def tearDown(self):
+        if self.thread.is_alive():
+            server.submit({'stop': True}, port=self.port)
+        self.thread.join()
+        server.KEY_DIR = self.key_dir
+        shutil.rmtree(self.tmp_dir)
+
+    def test_key_file_is_private_and_removed(self):
+        key_file = server.authkey_file(self.port)
+        self.assertEqual(stat.S_IMODE(os.stat(key_file).st_mode), 0o600)
+        server.submit({'stop': True}, port=self.port)
+        self.thread.join()
+        self.assertFalse(os.path.exists(key_file))
+
+    def test_wrong_key_is_rejected(self):
+        with self.assertRaises(AuthenticationError):
+            server.submit({'stop': True}, port=self.port, authkey=b'urbs')
+        # the worker keeps serving clients with the key
+        with self.assertRaises(RuntimeError):
+            server.submit({'input_file': INPUT_FILE, 'scenario': 'nonsense',
+                           'timesteps': range(3500, 3503),
+                           'result_dir': self.tmp_dir}, port=self.port)
+
+    def test_bad_clients_do_not_stop_the_worker(self):
+        with open(server.authkey_file(self.port), 'rb') as key_file:
+            authkey = key_file.read()
+        # hang up without sending a job
+        Client((server.HOST, self.port), authkey=authkey).close()
+        # send something else than a job dict
+        conn = Client((server.HOST, self.port), authkey=authkey)
+        conn.send(['not', 'a', 'job'])
+        self.assertEqual(conn.recv()['status'], 'error')
+        conn.close()
+        self.assertTrue(self.thread.is_alive())
+
+    @unittest.skipUnless(
+        SolverFactory('glpk').available(exception_flag=False),
+        'solver glpk not available')
+    def test_job_returns_its_files(self):
+        result_dir = os.path.join(self.tmp_dir, 'result')
+        os.makedirs(result_dir)
+        # a file of another scenario with a common prefix
+        other = os.path.join(result_dir, 'scenario_base_other.h5')
+        open(other, 'w').close()
+
+        files = server.submit({'input_file': INPUT_FILE,
+                               'scenario': 'scenario_base',
+                               'timesteps': range(3500, 3503),
+                               'result_dir': result_dir}, port=self.port)
+        self.assertIn(os.path.join(result_dir, 'scenario_base.log'), files)
+        self.assertIn(os.path.join(result_dir, 'scenario_base.h5'), files)
+        self.assertIn(os.path.join(result_dir, 'scenario_base.xlsx'), files)
+        self.assertNotIn(other, files)
+        for filename in files:
+            self.assertTrue(os.path.exists(filename))
+
+
+class TestWorker(unittest.TestCase):
+
+    def setUp(self):
+        self.worker = server.Worker()
+        self.timesteps = list(range(3500, 3503))
+        self.data = self.worker.read_input(INPUT_FILE)
+        self.base = self.worker.get_model(self.data, 1, self.timesteps, 'cost')
+
+    def test_structural_scenario_is_not_applied(self):
+        self.assertIsNone(self.worker.update_model(
+            self.data, scenarios.spec_no_dsm, 1, self.timesteps, 'cost'))
+
+    @unittest.skipUnless(
+        SolverFactory('glpk').available(exception_flag=False),
+        'solver glpk not available')
+    def test_scenario_updates_resident_model(self):
+        scenario = scenarios.spec_stock_prices + scenarios.spec_co2_tax_mid
+        prob, restore = self.worker.update_model(
+            self.data, scenario, 1, self.timesteps, 'cost')
+        self.assertIs(prob, self.base)
+        optim = SolverFactory('glpk')
+        optim.solve(prob)
+
+        scenario_data, changed = apply_scenario(self.data, scenario)
+        rebuilt = create_model(scenario_data, 1, self.timesteps, 'cost')
+        optim.solve(rebuilt)
+        self.assertAlmostEqual(
+            pyomo.value(prob.objective_function) /
+            pyomo.value(rebuilt.objective_function), 1, places=6)
+
+        restore.apply_to_model(prob)
+        gas = ('Mid', 'Gas', 'Stock')
+        self.assertEqual(prob.commodity_price[gas].value,
+                         self.data['commodity'].loc[gas, 'price'])
+        self.assertEqual(prob._data['commodity'].loc[gas, 'price'],
+                         self.data['commodity'].loc[gas, 'price'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -10,14 +10,31 @@ commodities.
 
 """
 
+from .benders import benders, time_blocks
+from .buildcache import load_or_create_model, model_key
+from .buildstats import get_build_stats
 from .data import COLORS
 from .model import create_model
-from .input import read_excel, get_input
+from .input import read_excel, get_input, apply_scenario
+from .metrics import append_metrics, peak_rss, read_metrics
 from .validation import validate_input
+from .modelsize import check_memory_budget, estimate_model_size
+from .multifidelity import multi_fidelity, tighten_bounds
 from .output import get_constants, get_timeseries
+from .pareto import co2_pareto_sweep
 from .plot import plot, result_figures, to_color
+from .pruning import prune_inactive, restore_pruned
 from .pyomoio import get_entity, get_entities, list_entities
 from .report import report
 from .runfunctions import *
 from .saveload import load, save
+from .scaling import (coefficient_ranges, scale_model, scaling_units,
+                      unscale_solution)
 from .scenarios import *
+from .scenariospec import Edit, Scenario, grid, sweep
+from .segmentation import (coarsen_timesteps, merge_timesteps,
+                           resample_periods, resample_timesteps,
+                           segment_timesteps)
+from .server import serve, submit
+from .solverlog import parse_solver_log
+from .spatial import aggregate_sites, cluster_sites, disaggregate_sites
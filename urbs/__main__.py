@@ -0,0 +1,41 @@
+"""Command line interface of urbs.
+
+Usage:
+    python -m urbs serve [--port PORT] [--solver SOLVER] [--max-models N]
+    python -m urbs stop [--port PORT]
+
+'serve' starts a worker on localhost that keeps urbs imported and caches
+parsed inputs and built models between scenario jobs (c.f. urbs.serve and
+urbs.submit); its random authentication key is written to
+~/.urbs/worker-PORT.key. 'stop' shuts down a running worker.
+"""
+import argparse
+from .server import DEFAULT_PORT, serve, submit
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m urbs')
+    subparsers = parser.add_subparsers(dest='command')
+
+    serve_parser = subparsers.add_parser(
+        'serve', help='run a local worker for scenario jobs')
+    serve_parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    serve_parser.add_argument('--solver', default='glpk')
+    serve_parser.add_argument('--max-models', type=int, default=4)
+
+    stop_parser = subparsers.add_parser(
+        'stop', help='shut down a running local worker')
+    stop_parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+
+    args = parser.parse_args()
+    if args.command == 'serve':
+        serve(port=args.port, solver=args.solver,
+              max_models=args.max_models)
+    elif args.command == 'stop':
+        submit({'stop': True}, port=args.port)
+    else:
+        parser.print_help()
+
+
+if __name__ == '__main__':
+    main()
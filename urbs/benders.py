@@ -0,0 +1,809 @@
+import math
+import multiprocessing
+import os
+import pandas as pd
+import traceback
+import pyomo.core as pyomo
+from pyomo.opt.base import SolverFactory
+from .model import create_model
+from .modelhelper import dsm_steps, step_durations
+from .pyomoio import get_entity
+from .runfunctions import setup_solver, solver_options
+from .saveload import ResultContainer, create_result_cache
+
+# new capacity variables of the master problem and the index sets they are
+# declared over
+CAPACITIES = [
+    ('cap_pro_new', 'pro_tuples'),
+    ('cap_tra_new', 'tra_tuples'),
+    ('cap_sto_c_new', 'sto_tuples'),
+    ('cap_sto_p_new', 'sto_tuples')]
+
+# constraints of the master problem; all of them only involve capacities
+MASTER_CONSTRAINTS = [
+    'def_process_capacity', 'res_process_capacity', 'res_area',
+    'res_sell_buy_symmetry', 'def_transmission_capacity',
+    'res_transmission_capacity', 'res_transmission_symmetry',
+    'def_storage_power', 'def_storage_capacity', 'res_storage_power',
+    'res_storage_capacity', 'def_storage_energy_power_ratio']
+
+# cost types that depend on capacities only
+MASTER_COSTS = ['Invest', 'Fixed']
+
+# limits of the new capacities: their model attribute and the columns of
+# installed capacity, lower and upper limit
+CAPACITY_LIMITS = [
+    ('cap_pro_new', 'process_dict', 'inst-cap', 'cap-lo', 'cap-up'),
+    ('cap_tra_new', 'transmission_dict', 'inst-cap', 'cap-lo', 'cap-up'),
+    ('cap_sto_c_new', 'storage_dict', 'inst-cap-c', 'cap-lo-c', 'cap-up-c'),
+    ('cap_sto_p_new', 'storage_dict', 'inst-cap-p', 'cap-lo-p', 'cap-up-p')]
+
+# boundary conditions of the storage states, imposed by the master problem
+# on the storage states at the block boundaries instead (c.f. block_links)
+BOUNDARY_CONSTRAINTS = [
+    'res_initial_and_final_storage_state',
+    'res_initial_and_final_storage_state_var']
+
+# total (annual) limits, split into budgets per block by the master problem
+TOTAL_CONSTRAINTS = [
+    'res_stock_total', 'res_sell_total', 'res_buy_total', 'res_env_total',
+    'res_global_co2_limit']
+
+# quantities decided by the master problem: new capacities and the
+# quantities linking the time blocks (c.f. block_links)
+DECISIONS = CAPACITIES + [('link', 'link_set')]
+
+# time indexed entities are concatenated over the blocks in the result cache
+TIME_LEVELS = ('t', 'tm', 'tt')
+
+
+def time_blocks(timesteps, length):
+    """Split timesteps into consecutive blocks of given length.
+
+    Like the full model, each block uses its first timestep only as initial
+    timestep (e.g. of storage states), so each block starts with the last
+    timestep of its predecessor. The modelled timesteps of all blocks thus
+    are exactly those of the full model.
+
+    Args:
+        timesteps: a list of timesteps, e.g. range(0,8761)
+        length: number of modelled timesteps per block
+
+    Returns:
+        list of timestep lists
+    """
+    timesteps = list(timesteps)
+    return [timesteps[i:i + length + 1]
+            for i in range(0, len(timesteps) - 1, length)]
+
+
+def default_penalty(data):
+    """Return a penalty for deviations from the master in the subproblems.
+
+    The penalty must exceed the annualized investment plus fixed costs of
+    one unit of any capacity, so that subproblems never prefer deviating
+    from the master's capacities to the master building them. It must also
+    exceed the marginal costs of the quantities linking the time blocks
+    (storage states, throughputs, DSM shifts and budgets, c.f.
+    block_links); benders checks this at its solution.
+
+    Args:
+        data: input data dict
+
+    Returns:
+        ten times the largest annual costs of one unit of capacity, plus one
+    """
+    costs = [0]
+    columns = [('process', ['inv-cost'], ['fix-cost']),
+               ('transmission', ['inv-cost'], ['fix-cost']),
+               ('storage', ['inv-cost-p', 'inv-cost-c'],
+                ['fix-cost-p', 'fix-cost-c'])]
+    for sheet, inv_columns, fix_columns in columns:
+        df = data[sheet]
+        if df.empty:
+            continue
+        for inv, fix in zip(inv_columns, fix_columns):
+            # annuity factor <= 1 for all sensible wacc and depreciation
+            costs.append((df[inv] + df[fix]).max())
+    return 10 * max(costs) + 1
+
+
+def default_capacity_bound(data):
+    """Return a bound for new capacities without upper limit.
+
+    Each cut is linear in the capacities, with a slope of at most the
+    penalty, so the master problem needs finite capacity limits to be
+    bounded. New capacities with cap-up = inf are bounded by this value
+    (storage contents by this value times the modelled hours) instead;
+    benders fails if a capacity ends at this bound.
+
+    Args:
+        data: input data dict
+
+    Returns:
+        a hundred times the peak of the total demand (MW), at least 100
+    """
+    demand = data['demand']
+    peak = demand.sum(axis=1).max() if not demand.empty else 0
+    return 100 * max(peak, 1.0)
+
+
+class _Timeline(object):
+    """ Modelled timesteps and durations of the full model, for dsm_steps """
+
+    def __init__(self, timesteps, durations):
+        self.timesteps = timesteps
+        self.dt_dict = durations
+
+
+def block_links(master, timesteps, dt, blocks):
+    """Find the quantities that link the time blocks.
+
+    Constraints coupling timesteps of different blocks are kept exact by
+    quantities decided in the master problem and copied to the blocks that
+    use them (c.f. create_subproblem):
+
+    - 'storage' (k, sit, sto, com): storage state at boundary k, i.e. at
+      the initial timestep of block k and the last one of block k-1; k = 0
+      and k = len(blocks) are the first and last timestep of the full
+      model, to which the master applies the initial and final storage
+      state constraints
+    - 'throughput' (k, sit, pro): throughput of a process with maximum
+      gradient at boundary k, for the gradient constraints of block k
+    - 'dsm_down' (t, tt, sit, com): DSM downshift at tt for an upshift at
+      t, if t and tt are in different blocks
+    - 'dsm_up' (t, sit, com): DSM upshift at t, if t is in the recovery
+      window of a timestep of an earlier block
+    - 'budget' (b, constraint, index): the share of a finite total (annual)
+      limit (constraints TOTAL_CONSTRAINTS) that block b may use, in units
+      of the block's own weight
+
+    Args:
+        master: the master problem model instance, for sets and input data
+        timesteps: a list of timesteps
+        dt: length of each time step (unit: hours)
+        blocks: list of the timestep lists of the blocks
+
+    Returns:
+        (links, targets, rows) tuple: links is the list of (kind, key)
+        tuples above, the link number being its position; targets is a
+        list per block of (link, variable name, index) tuples of the
+        variables copying a link, the name being None for links used only
+        in rows of the block; rows is a dict per block of (constraint name,
+        index) to the list of (coefficient, link) terms to add to the row
+    """
+    timesteps = list(timesteps)
+    durations = step_durations(timesteps, dt)
+    timeline = _Timeline(timesteps, durations)
+    block_of = dict((t, b) for b, block in enumerate(blocks)
+                    for t in block[1:])
+    links = []
+    targets = [[] for _ in blocks]
+    rows = [{} for _ in blocks]
+    used = [set() for _ in blocks]
+
+    def link(kind, key):
+        links.append((kind, key))
+        return len(links) - 1
+
+    def use(b, j, name, idx, coef=1):
+        # link j enters row name[idx] of block b
+        if j not in used[b]:
+            targets[b].append((j, None, None))
+            used[b].add(j)
+        rows[b].setdefault((name, idx), []).append((coef, j))
+
+    for k in range(len(blocks) + 1):
+        for sto in master.sto_tuples:
+            j = link('storage', (k,) + sto)
+            if k > 0:
+                targets[k - 1].append(
+                    (j, 'e_sto_con', (blocks[k - 1][-1],) + sto))
+            if k < len(blocks):
+                targets[k].append((j, 'e_sto_con', (blocks[k][0],) + sto))
+
+    # c.f. pro_maxgrad_tuples, with the shortest timestep of the full model
+    maxgrad = [pro for pro in master.pro_tuples
+               if master.process_dict['max-grad'][pro] <
+               1.0 / min(durations.values())]
+    for k in range(1, len(blocks)):
+        for pro in maxgrad:
+            j = link('throughput', (k,) + pro)
+            targets[k - 1].append((j, 'tau_pro', (blocks[k - 1][-1],) + pro))
+            targets[k].append((j, 'tau_pro', (blocks[k][0],) + pro))
+
+    for sit, com in master.dsm_site_tuples:
+        delay = master.dsm_dict['delay'][(sit, com)]
+        recov = master.dsm_dict['recov'][(sit, com)]
+        vertices = [c for c in master.com_tuples if c[:2] == (sit, com)]
+        up = {}
+        for t in timesteps[1:]:
+            for tt in dsm_steps(timeline, t, delay):
+                if block_of[tt] == block_of[t]:
+                    continue
+                j = link('dsm_down', (t, tt, sit, com))
+                use(block_of[t], j, 'def_dsm_variables', (t, sit, com))
+                for name in ['res_dsm_downward', 'res_dsm_maximum']:
+                    use(block_of[tt], j, name, (tt, sit, com))
+                for vertex in vertices:
+                    use(block_of[tt], j, 'res_vertex', (tt,) + vertex)
+            for tt in dsm_steps(timeline, t, recov, forward=True):
+                if block_of[tt] == block_of[t]:
+                    continue
+                if tt not in up:
+                    up[tt] = link('dsm_up', (tt, sit, com))
+                    targets[block_of[tt]].append(
+                        (up[tt], 'dsm_up', (tt, sit, com)))
+                use(block_of[t], up[tt], 'res_dsm_recovery', (t, sit, com))
+
+    for name in TOTAL_CONSTRAINTS:
+        con = master.component(name)
+        if con is None:
+            continue
+        for idx in con:
+            upper = con[idx].upper
+            if upper is None or math.isinf(pyomo.value(upper)):
+                continue
+            for b in range(len(blocks)):
+                use(b, link('budget', (b, name, idx)), name, idx, -1)
+    return links, targets, rows
+
+
+def create_master(data, dt, timesteps, blocks, shares, capacity_bound):
+    """Create the master problem.
+
+    The master problem is a urbs model of the first modelled timestep only,
+    in which all constraints but those of MASTER_CONSTRAINTS and the
+    investment and fixed costs are deactivated. The variable theta[b]
+    estimates the operational costs of time block b; it is bounded from
+    below by the cuts in the ConstraintList cuts.
+
+    Besides the new capacities, the master decides the quantities linking
+    the blocks (variable link, c.f. block_links), subject to res_link: the
+    initial and final storage state constraints, storage states, throughputs
+    and DSM shifts within their capacities, and the shares of the budgets
+    within the total limits. Budgets are non-negative, i.e. total limits on
+    commodities that are net consumed are not supported. New capacities
+    without upper limit are bounded by capacity_bound.
+
+    Args:
+        data: input data dict
+        dt: length of each time step (unit: hours)
+        timesteps: a list of timesteps
+        blocks: list of the timestep lists of the blocks
+        shares: list of factors rescaling the operational costs of each
+            block to the weight of the full model
+        capacity_bound: bound for new capacities without upper limit (MW,
+            for storage contents MWh per modelled hour)
+
+    Returns:
+        the master problem model instance; its attributes _links, _targets
+        and _rows are those of block_links, _bounded lists the (name, index)
+        of the capacities bounded by capacity_bound
+    """
+    timesteps = list(timesteps)
+    master = create_model(data, dt, timesteps[:2])
+    for con in master.component_objects(pyomo.Constraint, active=True):
+        if con.name == 'def_costs':
+            for cost_type in con:
+                if cost_type not in MASTER_COSTS:
+                    con[cost_type].deactivate()
+        elif con.name not in MASTER_CONSTRAINTS:
+            con.deactivate()
+    master.objective_function.deactivate()
+
+    durations = step_durations(timesteps, dt)
+    hours = sum(durations[t] for t in timesteps[1:])
+    master._bounded = []
+    for name, limits, inst, lo, up in CAPACITY_LIMITS:
+        var = getattr(master, name)
+        limits = getattr(master, limits)
+        bound = capacity_bound * (hours if name == 'cap_sto_c_new' else 1)
+        for idx in var:
+            if math.isinf(limits[up][idx]):
+                var[idx].setub(max(bound, limits[lo][idx] - limits[inst][idx]))
+                master._bounded.append((name, idx))
+
+    links, master._targets, master._rows = block_links(
+        master, timesteps, dt, blocks)
+    master._links = links
+    master.block = pyomo.Set(
+        initialize=range(len(blocks)),
+        doc='Set of time blocks')
+    master.link_set = pyomo.Set(
+        initialize=range(len(links)),
+        doc='Set of quantities linking time blocks')
+    master.link = pyomo.Var(
+        master.link_set,
+        within=pyomo.NonNegativeReals,
+        doc='Quantity linking time blocks (c.f. block_links)')
+    master.res_link = pyomo.ConstraintList(
+        doc='Storage state conditions and limits of linking quantities')
+
+    position = dict((link, j) for j, link in enumerate(links))
+    budgets = {}
+    for j, (kind, key) in enumerate(links):
+        if kind == 'storage':
+            k, sto = key[0], key[1:]
+            cap = master.cap_sto_c[sto]
+            master.res_link.add(master.link[j] <= cap)
+            if sto in master.sto_init_bound_tuples:
+                init = master.storage_dict['init'][sto]
+                if k == 0:
+                    master.res_link.add(master.link[j] == cap * init)
+                elif k == len(blocks):
+                    master.res_link.add(master.link[j] >= cap * init)
+            elif k == 0:
+                last = position['storage', (len(blocks),) + sto]
+                master.res_link.add(master.link[j] <= master.link[last])
+        elif kind == 'throughput':
+            k, pro = key[0], key[1:]
+            master.res_link.add(master.link[j] <=
+                                durations[blocks[k][0]] * master.cap_pro[pro])
+        elif kind == 'dsm_down':
+            t, tt, sit, com = key
+            master.res_link.add(master.link[j] <= durations[tt] *
+                                master.dsm_dict['cap-max-do'][(sit, com)])
+        elif kind == 'dsm_up':
+            t, sit, com = key
+            master.res_link.add(master.link[j] <= durations[t] *
+                                master.dsm_dict['cap-max-up'][(sit, com)])
+        else:
+            b, name, idx = key
+            budgets.setdefault((name, idx), []).append((b, j))
+    for (name, idx), terms in budgets.items():
+        master.res_link.add(
+            pyomo.quicksum(shares[b] * master.link[j] for b, j in terms) <=
+            pyomo.value(master.component(name)[idx].upper))
+
+    master.theta = pyomo.Var(
+        master.block,
+        within=pyomo.Reals,
+        doc='Estimated operational costs of time block (EUR/a)')
+    master.cuts = pyomo.ConstraintList(
+        doc='Benders optimality cuts')
+    master.benders_objective = pyomo.Objective(
+        expr=pyomo.quicksum(master.costs[c] for c in MASTER_COSTS) +
+        pyomo.quicksum(master.theta[b] for b in master.block),
+        sense=pyomo.minimize,
+        doc='minimize(investment + fixed costs + operational costs)')
+    return master
+
+
+def create_subproblem(data, dt, timesteps, penalty, targets=(), rows=None):
+    """Create the operational subproblem of one time block.
+
+    The subproblem is a urbs model of the block, whose new capacities are
+    tied to the mutable parameters {capacity}_hat (set to the master's
+    capacities) by the constraints res_{capacity}_copy. Likewise, the
+    quantities linking the blocks (c.f. block_links) are tied to link_hat
+    by res_link_copy: storage states and throughputs at the block's ends,
+    DSM upshifts in the recovery window of an earlier block, and the
+    auxiliary variables link_aux of budgets and of DSM shifts of other
+    blocks, which are added to the rows given by rows. The initial and
+    final storage state constraints are left to the master problem, total
+    limits are replaced by the block's budgets.
+
+    Deviations are allowed at the given penalty per unit, so that the
+    subproblem is always feasible. The objective are the operational costs
+    (all cost types except MASTER_COSTS) plus the penalties. The duals of
+    the copy constraints are the marginal operational costs of the
+    master's decisions.
+
+    Args:
+        data: input data dict
+        dt: length of each time step (unit: hours)
+        timesteps: the timesteps of the block
+        penalty: costs of deviating from the master's decisions (EUR/a per
+            unit)
+        targets: list of (link, variable name, index) of the block, c.f.
+            block_links
+        rows: dict of (constraint name, index) to list of (coefficient,
+            link) of the block, c.f. block_links
+
+    Returns:
+        the subproblem model instance
+    """
+    sub = create_model(data, dt, timesteps, dual=True)
+    sub.objective_function.deactivate()
+    for name in BOUNDARY_CONSTRAINTS:
+        getattr(sub, name).deactivate()
+
+    copies = {}
+    for name, index in CAPACITIES:
+        copies[name] = (getattr(sub, index), getattr(sub, name))
+    sub.link_set = pyomo.Set(
+        initialize=[j for j, _, _ in targets],
+        doc='Set of quantities linking the block to others')
+    sub.link_aux_set = pyomo.Set(
+        initialize=[j for j, name, _ in targets if name is None],
+        doc='Set of linking quantities without variable in the block')
+    sub.link_aux = pyomo.Var(
+        sub.link_aux_set,
+        within=pyomo.NonNegativeReals,
+        doc='Linking quantity of master problem (c.f. block_links)')
+    copies['link'] = (sub.link_set, dict(
+        (j, sub.link_aux[j] if name is None else getattr(sub, name)[idx])
+        for j, name, idx in targets))
+
+    deviations = []
+    for name, _ in DECISIONS:
+        index_set, target = copies[name]
+        hat = pyomo.Param(index_set, initialize=0, mutable=True,
+                          doc='{} of master problem'.format(name))
+        above = pyomo.Var(index_set, within=pyomo.NonNegativeReals,
+                          doc='Deviation above {} of master'.format(name))
+        below = pyomo.Var(index_set, within=pyomo.NonNegativeReals,
+                          doc='Deviation below {} of master'.format(name))
+        sub.add_component(name + '_hat', hat)
+        sub.add_component(name + '_above', above)
+        sub.add_component(name + '_below', below)
+        sub.add_component('res_{}_copy'.format(name), pyomo.Constraint(
+            index_set,
+            rule=_copy_rule(target, above, below, hat),
+            doc='{} == {} of master problem (+ deviation)'.format(
+                name, name)))
+        deviations.extend([above, below])
+
+    # add linking quantities of other blocks to the rows using them; total
+    # limits become: block total <= budget
+    for (name, idx), terms in (rows or {}).items():
+        con = sub.component(name)
+        if con is None or idx not in con:
+            continue
+        row = con[idx]
+        body = row.body + pyomo.quicksum(
+            coef * sub.link_aux[j] for coef, j in terms)
+        if name in TOTAL_CONSTRAINTS:
+            row.set_value(body <= 0)
+        elif row.equality:
+            row.set_value(body == row.upper)
+        else:
+            row.set_value((row.lower, body, row.upper))
+
+    sub.benders_objective = pyomo.Objective(
+        expr=pyomo.quicksum(sub.costs[c] for c in sub.cost_type
+                            if c not in MASTER_COSTS) +
+        penalty * pyomo.quicksum(var[i] for var in deviations for i in var),
+        sense=pyomo.minimize,
+        doc='minimize(operational costs + deviation penalties)')
+    return sub
+
+
+def _copy_rule(target, above, below, hat):
+    def copy_rule(m, *idx):
+        idx = idx[0] if len(idx) == 1 else idx
+        return target[idx] - above[idx] + below[idx] == hat[idx]
+    return copy_rule
+
+
+def solve_subproblem(sub, optim, decisions):
+    """Solve a subproblem for given decisions of the master.
+
+    Args:
+        sub: a subproblem model instance
+        optim: a solver object
+        decisions: dict of decision name (c.f. DECISIONS) to dict of index
+            to value
+
+    Returns:
+        (objective, duals, deviation) tuple of the subproblem objective
+        value, a dict of decision name to dict of index to dual value of
+        the copy constraints and the total deviation from the decisions
+    """
+    for name, _ in DECISIONS:
+        hat = getattr(sub, name + '_hat')
+        for idx in hat:
+            hat[idx] = decisions[name][idx]
+    result = optim.solve(sub)
+    if str(result.solver.termination_condition) != 'optimal':
+        raise RuntimeError("Subproblem solver terminated with condition "
+                           "'{}'.".format(result.solver.termination_condition))
+
+    duals = {}
+    deviation = 0.0
+    for name, _ in DECISIONS:
+        copy = getattr(sub, 'res_{}_copy'.format(name))
+        duals[name] = dict((idx, sub.dual.get(copy[idx], 0.0))
+                           for idx in copy)
+        for var in (getattr(sub, name + '_above'),
+                    getattr(sub, name + '_below')):
+            deviation += sum(pyomo.value(var[idx]) for idx in var)
+    return pyomo.value(sub.benders_objective), duals, deviation
+
+
+def _block_worker(conn, data, dt, blocks, solver, penalty, log_dir,
+                  threads):
+    """Worker process owning the subproblems of some time blocks.
+
+    blocks is a list of (block number, timesteps, targets, rows), c.f.
+    block_links. Receives messages ('solve', decisions), ('result', None)
+    and ('stop', None) and answers with ('ok', answer), answer being a dict
+    of block number to (objective, duals, deviation) or to the result cache
+    of the block, respectively. If creating or solving a subproblem fails,
+    it answers with ('error', traceback) and ends.
+    """
+    try:
+        subs = dict((b, create_subproblem(data, dt, timesteps, penalty,
+                                          targets, rows))
+                    for b, timesteps, targets, rows in blocks)
+        optim = SolverFactory(solver)
+        # share the CPUs with the other workers
+        for key, value in solver_options(solver, threads=threads).items():
+            optim.options[key] = value
+        while True:
+            command, decisions = conn.recv()
+            if command == 'solve':
+                answer = {}
+                for b, sub in subs.items():
+                    if log_dir:
+                        setup_solver(optim, logfile=os.path.join(
+                            log_dir, 'benders-block{}.log'.format(b)))
+                    answer[b] = solve_subproblem(sub, optim, decisions)
+                conn.send(('ok', answer))
+            elif command == 'result':
+                conn.send(('ok', dict((b, create_result_cache(sub))
+                                      for b, sub in subs.items())))
+            else:
+                break
+    except Exception:
+        conn.send(('error', traceback.format_exc()))
+    conn.close()
+
+
+def _receive(conn):
+    """ Return the answer of a block worker; raise its error, if any. """
+    try:
+        status, answer = conn.recv()
+    except EOFError:
+        raise RuntimeError("Benders worker process ended unexpectedly.")
+    if status == 'error':
+        raise RuntimeError("Benders worker process failed:\n" + answer)
+    return answer
+
+
+def benders(data, solver, timesteps, dt=1, block_length=168, processes=None,
+            tolerance=1e-4, max_iterations=100, penalty=None,
+            capacity_bound=None, log_dir=None):
+    """Solve a urbs model by Benders decomposition into time blocks.
+
+    The new capacities (cap_pro_new, cap_tra_new, cap_sto_c_new,
+    cap_sto_p_new) are decided in a master problem (c.f. create_master).
+    The operation of each time block is a subproblem (c.f.
+    create_subproblem), solved in parallel worker processes, which keep
+    their subproblem models between iterations. Each iteration adds one
+    optimality cut per block from the duals of the subproblem's copy
+    constraints, until the gap between the upper bound (costs of the
+    master's decisions and the resulting operation) and the lower bound
+    (master objective) is at most tolerance (relative).
+
+    Constraints coupling timesteps across blocks are kept exact by
+    quantities the master decides along with the capacities (c.f.
+    block_links): the storage states and the throughputs of processes with
+    maximum gradient at the block boundaries, the DSM shifts between
+    blocks and each block's budget of the total (annual) commodity and CO2
+    limits. The blocks' operational costs are rescaled from their own
+    weight (c.f. create_model) to that of the monolithic model, so the
+    result equals that of the monolithic model within tolerance.
+
+    Args:
+        data: input data dict, as returned by read_excel (and a scenario)
+        solver: solver name, e.g. 'glpk'
+        timesteps: a list of timesteps, e.g. range(0,8761)
+        dt: length of each time step (unit: hours)
+        block_length: number of modelled timesteps per block
+        processes: number of worker processes, default: number of CPUs
+        tolerance: relative gap between upper and lower bound to stop at
+        max_iterations: maximum number of iterations
+        penalty: costs of deviating from the master's decisions in the
+            subproblems, default: c.f. default_penalty
+        capacity_bound: bound for new capacities without upper limit,
+            default: c.f. default_capacity_bound
+        log_dir: (optional) directory for solver log files
+
+    Returns:
+        a result container (c.f. urbs.load) with input data and result
+        cache, for use with report, result_figures and get_entity; its
+        attribute _benders is a DataFrame of lower and upper bound per
+        iteration
+
+    Raises:
+        RuntimeError: if the solution deviates from the master's decisions
+            by more than tolerance (increase penalty or max_iterations) or
+            a new capacity ends at capacity_bound (increase it)
+
+    Example:
+        >>> data = read_excel('mimo-example.xlsx')
+        >>> prob = benders(data, 'glpk', range(0, 8761))  # doctest: +SKIP
+        >>> report(prob, 'benders.xlsx')  # doctest: +SKIP
+    """
+    blocks = time_blocks(timesteps, block_length)
+    # operational costs of a block are annualized by the block's weight
+    # (8760 h by the duration of its timesteps, initial one included);
+    # its share rescales them to the weight of the monolithic model
+    duration = sum(step_durations(list(timesteps), dt).values())
+    shares = [sum(step_durations(block, dt).values()) / duration
+              for block in blocks]
+    if penalty is None:
+        penalty = default_penalty(data)
+    if capacity_bound is None:
+        capacity_bound = default_capacity_bound(data)
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    processes = max(1, min(processes, len(blocks)))
+
+    master = create_master(data, dt, timesteps, blocks, shares,
+                           capacity_bound)
+    optim = SolverFactory(solver)
+    if log_dir:
+        optim = setup_solver(optim, logfile=os.path.join(
+            log_dir, 'benders-master.log'))
+
+    # start workers, each owning every processes-th block
+    workers = []
+    for w in range(processes):
+        parent_conn, child_conn = multiprocessing.Pipe()
+        owned = [(b, blocks[b], master._targets[b], master._rows[b])
+                 for b in range(w, len(blocks), processes)]
+        process = multiprocessing.Process(
+            target=_block_worker,
+            args=(child_conn, data, dt, owned, solver, penalty, log_dir,
+                  max(1, multiprocessing.cpu_count() // processes)))
+        process.start()
+        # only the worker holds this end, so recv fails once it has ended
+        child_conn.close()
+        workers.append((process, parent_conn))
+
+    def solve_blocks(decisions):
+        for _, conn in workers:
+            conn.send(('solve', decisions))
+        answers = {}
+        for _, conn in workers:
+            answers.update(_receive(conn))
+        return answers
+
+    try:
+        # start from no new capacities and zero linking quantities
+        decisions = dict(
+            (name, dict((idx, 0.0) for idx in getattr(master, index)))
+            for name, index in DECISIONS)
+        history = []
+        best = (float('inf'), decisions)
+        for iteration in range(max_iterations):
+            answers = solve_blocks(decisions)
+
+            # upper bound: costs of current decisions and their operation;
+            # the master's costs are known after its first solve only
+            if iteration > 0:
+                upper = sum(pyomo.value(master.costs[c])
+                            for c in MASTER_COSTS) + sum(
+                    shares[b] * answers[b][0] for b in answers)
+                if upper < best[0]:
+                    best = (upper, decisions)
+
+            # add optimality cut for each block
+            for b, (objective, duals, _) in answers.items():
+                master.cuts.add(
+                    master.theta[b] >= shares[b] * (objective + pyomo.quicksum(
+                        duals[name][idx] *
+                        (getattr(master, name)[idx] - decisions[name][idx])
+                        for name, _ in DECISIONS
+                        for idx in duals[name])))
+
+            result = optim.solve(master)
+            if str(result.solver.termination_condition) != 'optimal':
+                raise RuntimeError(
+                    "Master solver terminated with condition '{}'.".format(
+                        result.solver.termination_condition))
+            lower = pyomo.value(master.benders_objective)
+            history.append((iteration, lower, best[0]))
+            print("Benders iteration {}: lower bound {:.6g}, upper bound "
+                  "{:.6g}".format(iteration, lower, best[0]))
+
+            decisions = dict(
+                (name, dict((idx, getattr(master, name)[idx].value)
+                            for idx in getattr(master, index)))
+                for name, index in DECISIONS)
+            if (iteration > 0 and
+                    best[0] - lower <= tolerance * abs(best[0])):
+                break
+
+        # final master solution and operation for the best decisions found
+        if best[1] is not decisions:
+            for name, _ in DECISIONS:
+                for idx, value in best[1][name].items():
+                    getattr(master, name)[idx].fix(value)
+            optim.solve(master)
+            for name, _ in DECISIONS:
+                getattr(master, name).unfix()
+        answers = solve_blocks(best[1])
+        for _, conn in workers:
+            conn.send(('result', None))
+        caches = {}
+        for _, conn in workers:
+            caches.update(_receive(conn))
+    except BaseException:
+        # do not wait for the other workers to finish their subproblems
+        for process, _ in workers:
+            process.terminate()
+        raise
+    finally:
+        for process, conn in workers:
+            if process.is_alive():
+                try:
+                    conn.send(('stop', None))
+                except (IOError, OSError):
+                    pass  # worker has ended meanwhile
+            process.join()
+            conn.close()
+
+    # deviations are penalized, so their costs bound the error of the
+    # solution; they vanish only if the penalty exceeds all marginal costs
+    penalties = penalty * sum(shares[b] * answers[b][2] for b in answers)
+    if penalties > tolerance * abs(best[0]):
+        raise RuntimeError(
+            "Benders subproblems deviate from the master's decisions at "
+            "costs of {:.6g}; increase penalty (or max_iterations).".format(
+                penalties))
+    for name, idx in master._bounded:
+        var = getattr(master, name)[idx]
+        if var.value >= var.ub * (1 - 1e-6):
+            raise RuntimeError(
+                "New capacity {}[{}] ends at capacity_bound; increase "
+                "capacity_bound.".format(name, idx))
+
+    prob = ResultContainer(data, assemble_result(master, caches, shares))
+    prob._benders = pd.DataFrame(
+        history, columns=['iteration', 'lower', 'upper']).set_index(
+        'iteration')
+    return prob
+
+
+def assemble_result(master, caches, shares):
+    """Assemble the result cache of the full model from the decomposition.
+
+    Time indexed entities are concatenated over the blocks, capacities are
+    taken from the master problem and all other entities from the first
+    block. DSM downshifts between blocks are taken from the master's linking
+    quantities. The costs are the master's investment and fixed costs and
+    the share-weighted sum of the blocks' operational costs.
+
+    Args:
+        master: the solved master problem
+        caches: dict of block number to result cache of its subproblem
+        shares: list of factors rescaling the operational costs of each
+            block to the weight of the full model
+
+    Returns:
+        a result cache dict, c.f. urbs.saveload.create_result_cache
+    """
+    first = caches[0]
+    result = {}
+    for name, entity in first.items():
+        if any(level in TIME_LEVELS for level in entity.index.names):
+            entity = pd.concat([caches[b][name] for b in sorted(caches)])
+            entity = entity[~entity.index.duplicated()]
+        result[name] = entity
+
+    # capacities of the master problem
+    for name in ['cap_pro', 'cap_tra', 'cap_sto_c', 'cap_sto_p']:
+        result[name] = get_entity(master, name)
+        result[name + '_new'] = get_entity(master, name + '_new')
+
+    shifts = [(key, master.link[j].value)
+              for j, (kind, key) in enumerate(master._links)
+              if kind == 'dsm_down']
+    if shifts and 'dsm_down' in result:
+        entity = result['dsm_down']
+        entity = pd.concat([entity, pd.Series(
+            [value for _, value in shifts],
+            index=pd.MultiIndex.from_tuples(
+                [key for key, _ in shifts], names=entity.index.names),
+            name=entity.name)])
+        result['dsm_down'] = entity.sort_index()
+
+    costs = sum(caches[b]['costs'] * shares[b] for b in caches)
+    for cost_type in MASTER_COSTS:
+        costs[cost_type] = pyomo.value(master.costs[cost_type])
+    result['costs'] = costs
+    return result
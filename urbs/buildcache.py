@@ -0,0 +1,90 @@
+import hashlib
+import os
+import pickle
+import pandas as pd
+from . import input as urbs_input
+from . import model as urbs_model
+from . import modelhelper as urbs_modelhelper
+from .model import create_model
+from .util import replace_file
+
+
+def model_key(data, dt=1, timesteps=None, objective='cost', **kwargs):
+    """Return a hash key for the model that create_model builds.
+
+    The key covers the contents of all DataFrames in the input data dict
+    (index, columns and values), the model arguments and the source code of
+    the modules defining the model, so that a cached model is never reused
+    after the input or the model formulation changed.
+
+    Args:
+        data: input data dict, as passed to create_model
+        dt: length of each time step (unit: hours)
+        timesteps: list of timesteps, default: all timesteps of data
+        objective: objective function, 'cost' or 'CO2'
+        **kwargs: further keyword arguments of create_model
+
+    Returns:
+        hexadecimal SHA-1 digest string
+    """
+    sha = hashlib.sha1()
+    for key in sorted(data):
+        df = data[key]
+        sha.update(repr((key, list(df.index.names), list(df.columns),
+                         df.shape)).encode('utf-8'))
+        if not df.empty:
+            sha.update(pd.util.hash_pandas_object(df, index=True).values)
+    if timesteps is not None:
+        timesteps = list(timesteps)
+    if isinstance(dt, (dict, pd.Series)):
+        # durations by timestep (c.f. segment_timesteps)
+        dt = sorted(dict(dt).items())
+    sha.update(repr((dt, timesteps, objective,
+                     sorted(kwargs.items()))).encode('utf-8'))
+    for module in (urbs_model, urbs_modelhelper, urbs_input):
+        with open(module.__file__.replace('.pyc', '.py'), 'rb') as source:
+            sha.update(source.read())
+    return sha.hexdigest()
+
+
+def load_or_create_model(cache_dir, data, dt=1, timesteps=None,
+                         objective='cost', **kwargs):
+    """Load a constructed model from the build cache or create and cache it.
+
+    The model instance is stored with pickle as '{key}.pkl' in cache_dir,
+    where key is given by model_key. It contains everything that solving,
+    the result cache, get_entity and report need, i.e. also the input data
+    cache `_data`. Re-running the same input, timesteps, dt and objective
+    (e.g. to debug reporting or to re-solve with other solver options)
+    thus skips model construction.
+
+    Args:
+        cache_dir: directory of cached models, created if not existent
+        data: input data dict, as passed to create_model
+        dt: length of each time step (unit: hours)
+        timesteps: list of timesteps, default: all timesteps of data
+        objective: objective function, 'cost' or 'CO2'
+        **kwargs: further keyword arguments of create_model
+
+    Returns:
+        (prob, cached) tuple of the (unsolved) model instance and a bool,
+        whether it was loaded from the cache
+    """
+    key = model_key(data, dt, timesteps, objective, **kwargs)
+    filename = os.path.join(cache_dir, '{}.pkl'.format(key))
+
+    if os.path.exists(filename):
+        with open(filename, 'rb') as cache_file:
+            return pickle.load(cache_file), True
+
+    prob = create_model(data, dt, timesteps, objective, **kwargs)
+
+    if not os.path.exists(cache_dir):
+        os.makedirs(cache_dir)
+    # write to a temporary file first, so that an interrupted run does not
+    # leave a truncated model in the cache
+    tmp_filename = filename + '.tmp'
+    with open(tmp_filename, 'wb') as cache_file:
+        pickle.dump(prob, cache_file, pickle.HIGHEST_PROTOCOL)
+    replace_file(tmp_filename, filename)
+    return prob, False
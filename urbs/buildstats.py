@@ -0,0 +1,77 @@
+import time
+import pandas as pd
+import pyomo.core as pyomo
+from pyomo.repn import generate_standard_repn
+
+
+class BuildStatsModel(pyomo.ConcreteModel):
+    """ConcreteModel that records construction statistics per component.
+
+    Every component added to the model (Set, Param, Var, Constraint,
+    Objective, ...) is timed while it is constructed. Afterwards, its number
+    of members, the number of rule calls that returned Skip and the number of
+    nonzero coefficients it contributes to the constraint matrix are
+    recorded in the list attribute `_build_stats`. Use function
+    `get_build_stats` to retrieve them as a DataFrame.
+    """
+
+    def add_component(self, name, val):
+        if not isinstance(val, pyomo.Component):
+            return super(BuildStatsModel, self).add_component(name, val)
+
+        t_start = time.time()
+        super(BuildStatsModel, self).add_component(name, val)
+        t_build = time.time() - t_start
+
+        if not hasattr(self, '_build_stats'):
+            self._build_stats = []
+        self._build_stats.append(
+            (name, val.type().__name__, t_build, len(val),
+             _count_skipped(val), _count_nonzeros(val)))
+
+
+def _count_skipped(component):
+    """ Return number of indices whose rule returned Skip, or None. """
+    if isinstance(component, pyomo.Constraint):
+        return len(component.index_set()) - len(component)
+    return None
+
+
+def _count_nonzeros(component):
+    """ Return number of nonzero coefficients of a component, or None. """
+    if isinstance(component, pyomo.Constraint):
+        return sum(len(generate_standard_repn(c.body).linear_vars)
+                   for c in component.values())
+    if isinstance(component, pyomo.Objective):
+        return sum(len(generate_standard_repn(o.expr).linear_vars)
+                   for o in component.values())
+    return None
+
+
+def get_build_stats(instance):
+    """Return construction statistics of an instrumented urbs model.
+
+    Args:
+        instance: a urbs model instance created with instrument=True
+
+    Returns:
+        a DataFrame indexed by component name, in order of declaration, with
+        columns 'Type', 'Time' (seconds), 'Members', 'Skipped' (rule calls
+        returning Skip, constraints only) and 'Nonzeros' (constraints and
+        objectives only)
+
+    Example:
+        >>> data = read_excel('mimo-example.xlsx')
+        >>> prob = create_model(data, timesteps=range(1, 25), instrument=True)
+        >>> stats = get_build_stats(prob)
+        >>> stats.sort_values('Time', ascending=False).head()  # doctest: +SKIP
+    """
+    if not hasattr(instance, '_build_stats'):
+        raise ValueError("Model has no build statistics. Create it with "
+                         "create_model(..., instrument=True)!")
+
+    stats = pd.DataFrame(instance._build_stats,
+                         columns=['Name', 'Type', 'Time', 'Members',
+                                  'Skipped', 'Nonzeros'])
+    stats.set_index('Name', inplace=True)
+    return stats
@@ -2,6 +2,8 @@ import pandas as pd
 from xlrd import XLRDError
 import pyomo.core as pyomo
 from .modelhelper import *
+from .buildstats import BuildStatsModel
+from .paramstore import ParamStore
 
 
 def read_excel(filename):
@@ -90,25 +92,86 @@ def read_excel(filename):
     return data
 
 
+class CopyOnWriteData(dict):
+    """Input data dict view that copies a DataFrame on first access.
+
+    Scenario functions modify the DataFrames of the input data dict in
+    place. Handing them this view instead of a full copy leaves the
+    underlying input data untouched, while only the DataFrames a scenario
+    actually accesses via data[key] are copied. Untouched DataFrames (e.g.
+    the large time series) stay shared with the underlying input data.
+    """
+
+    def __init__(self, data):
+        super(CopyOnWriteData, self).__init__(data)
+        self._copied = set()
+
+    def __getitem__(self, key):
+        if key not in self._copied:
+            self._copied.add(key)
+            value = super(CopyOnWriteData, self).__getitem__(key)
+            super(CopyOnWriteData, self).__setitem__(key, value.copy())
+        return super(CopyOnWriteData, self).__getitem__(key)
+
+    def __setitem__(self, key, value):
+        self._copied.add(key)
+        super(CopyOnWriteData, self).__setitem__(key, value)
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+
+def apply_scenario(data, scenario):
+    """Apply a scenario function to input data without modifying it.
+
+    Args:
+        data: input data dict, as returned by read_excel; it is not modified
+        scenario: a scenario function that modifies the input data dict
+
+    Returns:
+        (scenario_data, changed) tuple of the input data dict of the
+        scenario, which shares all unchanged DataFrames with data, and the
+        set of keys whose DataFrames were changed, added or removed
+    """
+    scenario_data = dict(scenario(CopyOnWriteData(data)))
+    changed = set(data) ^ set(scenario_data)
+    for key in set(data) & set(scenario_data):
+        if scenario_data[key] is data[key]:
+            continue
+        if scenario_data[key].equals(data[key]):
+            # share unchanged copies, too
+            scenario_data[key] = data[key]
+        else:
+            changed.add(key)
+    return scenario_data, changed
+
+
 # preparing the pyomo model
-def pyomo_model_prep(data, timesteps):
-    m = pyomo.ConcreteModel()
+def pyomo_model_prep(data, timesteps, instrument=False):
+    if instrument:
+        # record construction time and size of every model component
+        m = BuildStatsModel()
+    else:
+        m = pyomo.ConcreteModel()
 
     m.timesteps = timesteps
-    process = data['process']
-    transmission = data['transmission']
-    storage = data['storage']
-
-    # Converting Data frames to dict
-    m.global_prop_dict = (data['global_prop'].drop('description', axis=1)
-                          .to_dict())
-    m.site_dict = data["site"].to_dict()
-    m.commodity_dict = data["commodity"].to_dict()
-    m.demand_dict = data["demand"].to_dict()
-    m.supim_dict = data["supim"].to_dict()
-    m.dsm_dict = data["dsm"].to_dict()
-    m.buy_sell_price_dict = data["buy_sell_price"].to_dict()
-    m.eff_factor_dict = data["eff_factor"].to_dict()
+    # copies, as annuity factors are added below (input data may be shared
+    # by several scenarios, c.f. apply_scenario)
+    process = data['process'].copy()
+    transmission = data['transmission'].copy()
+    storage = data['storage'].copy()
+
+    # Converting Data frames to array-backed parameter stores, which are
+    # accessed like the dicts of DataFrame.to_dict(): dict[column][row]
+    m.global_prop_dict = ParamStore(data['global_prop']
+                                    .drop('description', axis=1))
+    m.site_dict = ParamStore(data["site"])
+    m.commodity_dict = ParamStore(data["commodity"])
+    m.demand_dict = ParamStore(data["demand"])
+    m.supim_dict = ParamStore(data["supim"])
+    m.dsm_dict = ParamStore(data["dsm"])
+    m.buy_sell_price_dict = ParamStore(data["buy_sell_price"])
+    m.eff_factor_dict = ParamStore(data["eff_factor"])
 
     # process input/output ratios
     m.r_in_dict = (data['process_commodity'].xs('In', level='Direction')
@@ -170,10 +233,10 @@ def pyomo_model_prep(data, timesteps):
     except ValueError:
         pass
 
-    # Converting Data frames to dictionaries
-    m.process_dict = process.to_dict()
-    m.transmission_dict = transmission.to_dict()
-    m.storage_dict = storage.to_dict()
+    # Converting Data frames to parameter stores
+    m.process_dict = ParamStore(process)
+    m.transmission_dict = ParamStore(transmission)
+    m.storage_dict = ParamStore(storage)
     return m
 
 
@@ -0,0 +1,109 @@
+import json
+import os
+import sys
+import pandas as pd
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:
+    # not available on Windows
+    resource = None
+
+
+def peak_rss(children=False):
+    """Return the peak resident set size (RSS) of the current process.
+
+    The value is the high-water mark since process start, so reading it at
+    the end of each run phase yields the peak memory reached up to and
+    including that phase. It only covers the Python process itself, not
+    solvers running as child processes (e.g. glpk, cbc or gurobi's shell
+    interface); use children=True for those. Uses the standard library
+    module `resource` where available and falls back to psutil (if
+    installed) on Windows.
+
+    Args:
+        children: set True to return the largest peak RSS of all ended
+            (and waited for) child processes instead
+
+    Returns:
+        peak RSS in MB, or None if it cannot be determined
+    """
+    if resource is not None:
+        who = resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF
+        peak = resource.getrusage(who).ru_maxrss
+        if sys.platform == 'darwin':
+            return peak / 1024.0 ** 2  # bytes
+        else:
+            return peak / 1024.0  # kilobytes
+    if children:
+        # Windows does not keep the memory usage of ended processes
+        return None
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return getattr(info, 'peak_wset', info.rss) / 1024.0 ** 2
+    except ImportError:
+        return None
+
+
+def result_value(value):
+    """Convert an entry of a Pyomo solver results object to a plain number.
+
+    Args:
+        value: an attribute of a solver results object, e.g.
+            result.problem.number_of_nonzeros
+
+    Returns:
+        the value as int or float, or None if it is undefined
+    """
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    if number.is_integer():
+        return int(number)
+    return number
+
+
+def append_metrics(filename, record):
+    """Append a run metrics record as one line to a JSON-lines file.
+
+    The record is encoded first and then written with a single call to a
+    file opened in append mode, so that several processes can share one
+    metrics file without interleaving their lines.
+
+    Args:
+        filename: metrics file, created if not existent
+        record: a dict of JSON-serializable values
+
+    Returns:
+        Nothing
+    """
+    record = dict(record)
+    record.setdefault('timestamp', datetime.now().isoformat())
+    line = (json.dumps(record, sort_keys=True, default=str) + '\n')
+
+    fd = os.open(filename, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, line.encode('utf-8'))
+    finally:
+        os.close(fd)
+
+
+def read_metrics(filename):
+    """Read run metrics records from a JSON-lines file.
+
+    Args:
+        filename: metrics file, as written by append_metrics
+
+    Returns:
+        a DataFrame with one row per record and one column per metric
+
+    Example:
+        >>> metrics = read_metrics('result/mimo-example/metrics.jsonl')
+        >>> metrics[['scenario', 'time_total', 'rss_model']]  # doctest: +SKIP
+    """
+    with open(filename) as metrics_file:
+        records = [json.loads(line) for line in metrics_file if line.strip()]
+    return pd.DataFrame(records)
@@ -5,15 +5,33 @@ from .modelhelper import *
 from .input import *
 
 
-def create_model(data, dt=1, timesteps=None, objective='cost', dual=False):
+def create_model(data, dt=1, timesteps=None, objective='cost', dual=False,
+                 instrument=False, var_bounds=False, substitute=False):
     """Create a pyomo ConcreteModel urbs object from given input data.
 
     Args:
         data: a dict of 6 DataFrames with the keys 'commodity', 'process',
             'transmission', 'storage', 'demand' and 'supim'.
-        dt: timestep duration in hours (default: 1)
+        dt: timestep duration in hours (default: 1), or a dict or Series of
+            timestep to duration for timesteps of different lengths (c.f.
+            segment_timesteps)
         timesteps: optional list of timesteps, default: demand timeseries
         dual: set True to add dual variables to model (slower); default: False
+        instrument: set True to record construction time, size, skipped
+            rule calls and nonzeros of every model component (slower),
+            retrievable with get_build_stats; default: False
+        var_bounds: set True to express pure single-variable limits (process,
+            transmission and storage capacity limits, DSM upshift limit and
+            per-step stock/sell/buy limits) as variable bounds instead of
+            constraints. Their shadow prices are then reported as reduced
+            costs (suffix 'rc') instead of duals; default: False
+        substitute: set True to substitute the definitional equalities for
+            total capacities (cap_pro, cap_tra, cap_sto_c, cap_sto_p),
+            process inputs and outputs (e_pro_in, e_pro_out) and
+            transmission output (e_tra_out) into all other constraints.
+            These quantities then are Expressions instead of variables with
+            defining constraints, which shrinks the problem without changing
+            its solution; default: False
 
     Returns:
         a pyomo ConcreteModel object
@@ -22,7 +40,8 @@ def create_model(data, dt=1, timesteps=None, objective='cost', dual=False):
     # Optional
     if not timesteps:
         timesteps = data['demand'].index.tolist()
-    m = pyomo_model_prep(data, timesteps)  # preparing pyomo model
+    # preparing pyomo model
+    m = pyomo_model_prep(data, timesteps, instrument)
     m.name = 'urbs'
     m.created = datetime.now().strftime('%Y%m%dT%H%M')
     m._data = data
@@ -34,16 +53,27 @@ def create_model(data, dt=1, timesteps=None, objective='cost', dual=False):
     # year, making comparisons among cost types (invest is annualized, fixed
     # costs are annual by default, variable costs are scaled by weight) and
     # among different simulation durations meaningful.
+    # The value of weight is folded into the float coefficients of the cost
+    # and total limit rows (c.f. def_costs_rule), so weight can not be made
+    # a mutable Param to be changed on a built model; changing the
+    # timesteps or dt requires building a new model anyway.
+    m.dt_dict = step_durations(m.timesteps, dt)
     m.weight = pyomo.Param(
-        initialize=float(8760) / (len(m.timesteps) * dt),
+        initialize=float(8760) / sum(m.dt_dict.values()),
         doc='Pre-factor for variable costs and emissions for an annual result')
 
     # dt = spacing between timesteps. Required for storage equation that
     # converts between energy (storage content, e_sto_con) and power (all other
-    # quantities that start with "e_")
-    m.dt = pyomo.Param(
-        initialize=dt,
-        doc='Time step duration (in hours), default: 1')
+    # quantities that start with "e_"); indexed by timestep if durations vary
+    if len(set(m.dt_dict.values())) == 1:
+        m.dt = pyomo.Param(
+            initialize=m.dt_dict[m.timesteps[0]],
+            doc='Time step duration (in hours), default: 1')
+    else:
+        m.dt = pyomo.Param(
+            m.timesteps,
+            initialize=m.dt_dict,
+            doc='Time step duration (in hours) by timestep')
 
     # import objective function information
     m.obj = pyomo.Param(
@@ -225,7 +255,8 @@ def create_model(data, dt=1, timesteps=None, objective='cost', dual=False):
         within=m.sit*m.pro,
         initialize=[(sit, pro)
                     for (sit, pro) in m.pro_tuples
-                    if m.process_dict['max-grad'][sit, pro] < 1.0 / dt],
+                    if m.process_dict['max-grad'][sit, pro] <
+                    1.0 / min(m.dt_dict.values())],
         doc='Processes with maximum gradient smaller than timestep length')
 
     # process tuples for partial feature
@@ -276,6 +307,25 @@ def create_model(data, dt=1, timesteps=None, objective='cost', dual=False):
         initialize=tuple(m.sto_ep_ratio_dict.keys()),
         doc='storages with given energy to power ratio')
 
+    # Mutable parameters
+    # can be changed on the built model, e.g. by Scenario.apply_to_model,
+    # to solve it again for new values without rebuilding it
+
+    m.commodity_price = pyomo.Param(
+        m.com_tuples,
+        initialize=dict((c, m.commodity_dict['price'][c])
+                        for c in m.com_tuples),
+        mutable=True,
+        doc='Commodity price (EUR/MWh, or price factor of buy/sell)')
+    m.global_co2_limit = pyomo.Param(
+        initialize=m.global_prop_dict['value']['CO2 limit'],
+        mutable=True,
+        doc='Global CO2 limit (t/a)')
+    m.global_cost_limit = pyomo.Param(
+        initialize=m.global_prop_dict['value']['Cost limit'],
+        mutable=True,
+        doc='Global cost limit (EUR/a)')
+
     # Variables
 
     # costs
@@ -288,72 +338,93 @@ def create_model(data, dt=1, timesteps=None, objective='cost', dual=False):
     m.e_co_stock = pyomo.Var(
         m.tm, m.com_tuples,
         within=pyomo.NonNegativeReals,
+        bounds=e_co_stock_bounds_rule if var_bounds else None,
         doc='Use of stock commodity source (MW) per timestep')
     m.e_co_sell = pyomo.Var(
         m.tm, m.com_tuples,
         within=pyomo.NonNegativeReals,
+        bounds=e_co_sell_bounds_rule if var_bounds else None,
         doc='Use of sell commodity source (MW) per timestep')
     m.e_co_buy = pyomo.Var(
         m.tm, m.com_tuples,
         within=pyomo.NonNegativeReals,
+        bounds=e_co_buy_bounds_rule if var_bounds else None,
         doc='Use of buy commodity source (MW) per timestep')
 
+    # capacity limits move from total to new capacity if the total capacity
+    # is substituted by new + installed capacity
+    new_cap_bounds = var_bounds and substitute
+
     # process
-    m.cap_pro = pyomo.Var(
-        m.pro_tuples,
-        within=pyomo.NonNegativeReals,
-        doc='Total process capacity (MW)')
+    if not substitute:
+        m.cap_pro = pyomo.Var(
+            m.pro_tuples,
+            within=pyomo.NonNegativeReals,
+            bounds=cap_pro_bounds_rule if var_bounds else None,
+            doc='Total process capacity (MW)')
     m.cap_pro_new = pyomo.Var(
         m.pro_tuples,
         within=pyomo.NonNegativeReals,
+        bounds=cap_pro_new_bounds_rule if new_cap_bounds else None,
         doc='New process capacity (MW)')
     m.tau_pro = pyomo.Var(
         m.t, m.pro_tuples,
         within=pyomo.NonNegativeReals,
         doc='Power flow (MW) through process')
-    m.e_pro_in = pyomo.Var(
-        m.tm, m.pro_tuples, m.com,
-        within=pyomo.NonNegativeReals,
-        doc='Power flow of commodity into process (MW) per timestep')
-    m.e_pro_out = pyomo.Var(
-        m.tm, m.pro_tuples, m.com,
-        within=pyomo.NonNegativeReals,
-        doc='Power flow out of process (MW) per timestep')
+    if not substitute:
+        m.e_pro_in = pyomo.Var(
+            m.tm, m.pro_tuples, m.com,
+            within=pyomo.NonNegativeReals,
+            doc='Power flow of commodity into process (MW) per timestep')
+        m.e_pro_out = pyomo.Var(
+            m.tm, m.pro_tuples, m.com,
+            within=pyomo.NonNegativeReals,
+            doc='Power flow out of process (MW) per timestep')
 
     # transmission
-    m.cap_tra = pyomo.Var(
-        m.tra_tuples,
-        within=pyomo.NonNegativeReals,
-        doc='Total transmission capacity (MW)')
+    if not substitute:
+        m.cap_tra = pyomo.Var(
+            m.tra_tuples,
+            within=pyomo.NonNegativeReals,
+            bounds=cap_tra_bounds_rule if var_bounds else None,
+            doc='Total transmission capacity (MW)')
     m.cap_tra_new = pyomo.Var(
         m.tra_tuples,
         within=pyomo.NonNegativeReals,
+        bounds=cap_tra_new_bounds_rule if new_cap_bounds else None,
         doc='New transmission capacity (MW)')
     m.e_tra_in = pyomo.Var(
         m.tm, m.tra_tuples,
         within=pyomo.NonNegativeReals,
         doc='Power flow into transmission line (MW) per timestep')
-    m.e_tra_out = pyomo.Var(
-        m.tm, m.tra_tuples,
-        within=pyomo.NonNegativeReals,
-        doc='Power flow out of transmission line (MW) per timestep')
+    if not substitute:
+        m.e_tra_out = pyomo.Var(
+            m.tm, m.tra_tuples,
+            within=pyomo.NonNegativeReals,
+            doc='Power flow out of transmission line (MW) per timestep')
 
     # storage
-    m.cap_sto_c = pyomo.Var(
-        m.sto_tuples,
-        within=pyomo.NonNegativeReals,
-        doc='Total storage size (MWh)')
+    if not substitute:
+        m.cap_sto_c = pyomo.Var(
+            m.sto_tuples,
+            within=pyomo.NonNegativeReals,
+            bounds=cap_sto_c_bounds_rule if var_bounds else None,
+            doc='Total storage size (MWh)')
     m.cap_sto_c_new = pyomo.Var(
         m.sto_tuples,
         within=pyomo.NonNegativeReals,
+        bounds=cap_sto_c_new_bounds_rule if new_cap_bounds else None,
         doc='New storage size (MWh)')
-    m.cap_sto_p = pyomo.Var(
-        m.sto_tuples,
-        within=pyomo.NonNegativeReals,
-        doc='Total storage power (MW)')
+    if not substitute:
+        m.cap_sto_p = pyomo.Var(
+            m.sto_tuples,
+            within=pyomo.NonNegativeReals,
+            bounds=cap_sto_p_bounds_rule if var_bounds else None,
+            doc='Total storage power (MW)')
     m.cap_sto_p_new = pyomo.Var(
         m.sto_tuples,
         within=pyomo.NonNegativeReals,
+        bounds=cap_sto_p_new_bounds_rule if new_cap_bounds else None,
         doc='New  storage power (MW)')
     m.e_sto_in = pyomo.Var(
         m.tm, m.sto_tuples,
@@ -372,12 +443,60 @@ def create_model(data, dt=1, timesteps=None, objective='cost', dual=False):
     m.dsm_up = pyomo.Var(
         m.tm, m.dsm_site_tuples,
         within=pyomo.NonNegativeReals,
+        bounds=dsm_up_bounds_rule if var_bounds else None,
         doc='DSM upshift')
     m.dsm_down = pyomo.Var(
         m.dsm_down_tuples,
         within=pyomo.NonNegativeReals,
         doc='DSM downshift')
 
+    # Substituted variables
+    # the definitional equalities def_process_capacity, def_process_input,
+    # def_process_output (incl. their partial and time variable efficiency
+    # variants), def_transmission_capacity, def_transmission_output,
+    # def_storage_power and def_storage_capacity are inserted directly as
+    # expressions with the names of the variables they define
+    if substitute:
+        m.cap_pro = pyomo.Expression(
+            m.pro_tuples,
+            rule=cap_pro_expr_rule,
+            doc='Total process capacity (MW)')
+        m.e_pro_in = pyomo.Expression(
+            m.tm, m.pro_input_tuples,
+            rule=e_pro_in_expr_rule,
+            doc='Power flow of commodity into process (MW) per timestep')
+        m.e_pro_out = pyomo.Expression(
+            m.tm, m.pro_output_tuples,
+            rule=e_pro_out_expr_rule,
+            doc='Power flow out of process (MW) per timestep')
+        m.cap_tra = pyomo.Expression(
+            m.tra_tuples,
+            rule=cap_tra_expr_rule,
+            doc='Total transmission capacity (MW)')
+        m.e_tra_out = pyomo.Expression(
+            m.tm, m.tra_tuples,
+            rule=e_tra_out_expr_rule,
+            doc='Power flow out of transmission line (MW) per timestep')
+        m.cap_sto_c = pyomo.Expression(
+            m.sto_tuples,
+            rule=cap_sto_c_expr_rule,
+            doc='Total storage size (MWh)')
+        m.cap_sto_p = pyomo.Expression(
+            m.sto_tuples,
+            rule=cap_sto_p_expr_rule,
+            doc='Total storage power (MW)')
+
+    # commodity balance
+    # built once per (timestep, site, commodity) and shared by the vertex
+    # rule, the environmental commodity limits, the environmental costs and
+    # the global CO2 limit or objective
+    m.e_co_balance = pyomo.Expression(
+        m.tm, m.com_tuples,
+        rule=e_co_balance_rule,
+        doc='Net consumption of commodity (MW) per timestep, i.e. process '
+            'input + export + storage input - process output - import - '
+            'storage output')
+
     # Equation declarations
     # equation bodies are defined in separate functions, referred to here by
     # their name in the "rule" keyword.
@@ -387,26 +506,29 @@ def create_model(data, dt=1, timesteps=None, objective='cost', dual=False):
         m.tm, m.com_tuples,
         rule=res_vertex_rule,
         doc='storage + transmission + process + source + buy - sell == demand')
-    m.res_stock_step = pyomo.Constraint(
-        m.tm, m.com_tuples,
-        rule=res_stock_step_rule,
-        doc='stock commodity input per step <= commodity.maxperstep')
+    if not var_bounds:
+        m.res_stock_step = pyomo.Constraint(
+            m.tm, m.com_tuples,
+            rule=res_stock_step_rule,
+            doc='stock commodity input per step <= commodity.maxperstep')
     m.res_stock_total = pyomo.Constraint(
         m.com_tuples,
         rule=res_stock_total_rule,
         doc='total stock commodity input <= commodity.max')
-    m.res_sell_step = pyomo.Constraint(
-        m.tm, m.com_tuples,
-        rule=res_sell_step_rule,
-        doc='sell commodity output per step <= commodity.maxperstep')
+    if not var_bounds:
+        m.res_sell_step = pyomo.Constraint(
+            m.tm, m.com_tuples,
+            rule=res_sell_step_rule,
+            doc='sell commodity output per step <= commodity.maxperstep')
     m.res_sell_total = pyomo.Constraint(
         m.com_tuples,
         rule=res_sell_total_rule,
         doc='total sell commodity output <= commodity.max')
-    m.res_buy_step = pyomo.Constraint(
-        m.tm, m.com_tuples,
-        rule=res_buy_step_rule,
-        doc='buy commodity output per step <= commodity.maxperstep')
+    if not var_bounds:
+        m.res_buy_step = pyomo.Constraint(
+            m.tm, m.com_tuples,
+            rule=res_buy_step_rule,
+            doc='buy commodity output per step <= commodity.maxperstep')
     m.res_buy_total = pyomo.Constraint(
         m.com_tuples,
         rule=res_buy_total_rule,
@@ -421,19 +543,20 @@ def create_model(data, dt=1, timesteps=None, objective='cost', dual=False):
         doc='total environmental commodity output <= commodity.max')
 
     # process
-    m.def_process_capacity = pyomo.Constraint(
-        m.pro_tuples,
-        rule=def_process_capacity_rule,
-        doc='total process capacity = inst-cap + new capacity')
-    m.def_process_input = pyomo.Constraint(
-        m.tm, m.pro_input_tuples - m.pro_partial_input_tuples,
-        rule=def_process_input_rule,
-        doc='process input = process throughput * input ratio')
-    m.def_process_output = pyomo.Constraint(
-        m.tm, (m.pro_output_tuples - m.pro_partial_output_tuples -
-               m.pro_timevar_output_tuples),
-        rule=def_process_output_rule,
-        doc='process output = process throughput * output ratio')
+    if not substitute:
+        m.def_process_capacity = pyomo.Constraint(
+            m.pro_tuples,
+            rule=def_process_capacity_rule,
+            doc='total process capacity = inst-cap + new capacity')
+        m.def_process_input = pyomo.Constraint(
+            m.tm, m.pro_input_tuples - m.pro_partial_input_tuples,
+            rule=def_process_input_rule,
+            doc='process input = process throughput * input ratio')
+        m.def_process_output = pyomo.Constraint(
+            m.tm, (m.pro_output_tuples - m.pro_partial_output_tuples -
+                   m.pro_timevar_output_tuples),
+            rule=def_process_output_rule,
+            doc='process output = process throughput * output ratio')
     m.def_intermittent_supply = pyomo.Constraint(
         m.tm, m.pro_input_tuples,
         rule=def_intermittent_supply_rule,
@@ -450,10 +573,11 @@ def create_model(data, dt=1, timesteps=None, objective='cost', dual=False):
         m.tm, m.pro_maxgrad_tuples,
         rule=res_process_maxgrad_upper_rule,
         doc='throughput may not increase faster than maximal gradient')
-    m.res_process_capacity = pyomo.Constraint(
-        m.pro_tuples,
-        rule=res_process_capacity_rule,
-        doc='process.cap-lo <= total process capacity <= process.cap-up')
+    if not var_bounds:
+        m.res_process_capacity = pyomo.Constraint(
+            m.pro_tuples,
+            rule=res_process_capacity_rule,
+            doc='process.cap-lo <= total process capacity <= process.cap-up')
 
     m.res_area = pyomo.Constraint(
         m.sit,
@@ -469,47 +593,52 @@ def create_model(data, dt=1, timesteps=None, objective='cost', dual=False):
         m.tm, m.pro_partial_tuples,
         rule=res_throughput_by_capacity_min_rule,
         doc='cap_pro * min-fraction <= tau_pro')
-    m.def_partial_process_input = pyomo.Constraint(
-        m.tm, m.pro_partial_input_tuples,
-        rule=def_partial_process_input_rule,
-        doc='e_pro_in = '
-            ' cap_pro * min_fraction * (r - R) / (1 - min_fraction)'
-            ' + tau_pro * (R - min_fraction * r) / (1 - min_fraction)')
-    m.def_partial_process_output = pyomo.Constraint(
-        m.tm, (m.pro_partial_output_tuples -
-               (m.pro_partial_output_tuples & m.pro_timevar_output_tuples)),
-        rule=def_partial_process_output_rule,
-        doc='e_pro_out = '
-            ' cap_pro * min_fraction * (r - R) / (1 - min_fraction)'
-            ' + tau_pro * (R - min_fraction * r) / (1 - min_fraction)')
-    m.def_process_timevar_output = pyomo.Constraint(
-        m.tm, (m.pro_timevar_output_tuples -
-               (m.pro_partial_output_tuples & m.pro_timevar_output_tuples)),
-        rule=def_pro_timevar_output_rule,
-        doc='e_pro_out = tau_pro * r_out * eff_factor')
-    m.def_process_partial_timevar_output = pyomo.Constraint(
-        m.tm, m.pro_partial_output_tuples & m.pro_timevar_output_tuples,
-        rule=def_pro_partial_timevar_output_rule,
-        doc='e_pro_out = tau_pro * r_out * eff_factor')
+    if not substitute:
+        m.def_partial_process_input = pyomo.Constraint(
+            m.tm, m.pro_partial_input_tuples,
+            rule=def_partial_process_input_rule,
+            doc='e_pro_in = '
+                ' cap_pro * min_fraction * (r - R) / (1 - min_fraction)'
+                ' + tau_pro * (R - min_fraction * r) / (1 - min_fraction)')
+        m.def_partial_process_output = pyomo.Constraint(
+            m.tm, (m.pro_partial_output_tuples -
+                   (m.pro_partial_output_tuples &
+                    m.pro_timevar_output_tuples)),
+            rule=def_partial_process_output_rule,
+            doc='e_pro_out = '
+                ' cap_pro * min_fraction * (r - R) / (1 - min_fraction)'
+                ' + tau_pro * (R - min_fraction * r) / (1 - min_fraction)')
+        m.def_process_timevar_output = pyomo.Constraint(
+            m.tm, (m.pro_timevar_output_tuples -
+                   (m.pro_partial_output_tuples &
+                    m.pro_timevar_output_tuples)),
+            rule=def_pro_timevar_output_rule,
+            doc='e_pro_out = tau_pro * r_out * eff_factor')
+        m.def_process_partial_timevar_output = pyomo.Constraint(
+            m.tm, m.pro_partial_output_tuples & m.pro_timevar_output_tuples,
+            rule=def_pro_partial_timevar_output_rule,
+            doc='e_pro_out = tau_pro * r_out * eff_factor')
 
     # transmission
-    m.def_transmission_capacity = pyomo.Constraint(
-        m.tra_tuples,
-        rule=def_transmission_capacity_rule,
-        doc='total transmission capacity = inst-cap + new capacity')
-    m.def_transmission_output = pyomo.Constraint(
-        m.tm, m.tra_tuples,
-        rule=def_transmission_output_rule,
-        doc='transmission output = transmission input * efficiency')
+    if not substitute:
+        m.def_transmission_capacity = pyomo.Constraint(
+            m.tra_tuples,
+            rule=def_transmission_capacity_rule,
+            doc='total transmission capacity = inst-cap + new capacity')
+        m.def_transmission_output = pyomo.Constraint(
+            m.tm, m.tra_tuples,
+            rule=def_transmission_output_rule,
+            doc='transmission output = transmission input * efficiency')
     m.res_transmission_input_by_capacity = pyomo.Constraint(
         m.tm, m.tra_tuples,
         rule=res_transmission_input_by_capacity_rule,
         doc='transmission input <= total transmission capacity')
-    m.res_transmission_capacity = pyomo.Constraint(
-        m.tra_tuples,
-        rule=res_transmission_capacity_rule,
-        doc='transmission.cap-lo <= total transmission capacity <= '
-            'transmission.cap-up')
+    if not var_bounds:
+        m.res_transmission_capacity = pyomo.Constraint(
+            m.tra_tuples,
+            rule=res_transmission_capacity_rule,
+            doc='transmission.cap-lo <= total transmission capacity <= '
+                'transmission.cap-up')
     m.res_transmission_symmetry = pyomo.Constraint(
         m.tra_tuples,
         rule=res_transmission_symmetry_rule,
@@ -520,14 +649,15 @@ def create_model(data, dt=1, timesteps=None, objective='cost', dual=False):
         m.tm, m.sto_tuples,
         rule=def_storage_state_rule,
         doc='storage[t] = (1 - sd) * storage[t-1] + in * eff_i - out / eff_o')
-    m.def_storage_power = pyomo.Constraint(
-        m.sto_tuples,
-        rule=def_storage_power_rule,
-        doc='storage power = inst-cap + new power')
-    m.def_storage_capacity = pyomo.Constraint(
-        m.sto_tuples,
-        rule=def_storage_capacity_rule,
-        doc='storage capacity = inst-cap + new capacity')
+    if not substitute:
+        m.def_storage_power = pyomo.Constraint(
+            m.sto_tuples,
+            rule=def_storage_power_rule,
+            doc='storage power = inst-cap + new power')
+        m.def_storage_capacity = pyomo.Constraint(
+            m.sto_tuples,
+            rule=def_storage_capacity_rule,
+            doc='storage capacity = inst-cap + new capacity')
     m.res_storage_input_by_power = pyomo.Constraint(
         m.tm, m.sto_tuples,
         rule=res_storage_input_by_power_rule,
@@ -540,14 +670,15 @@ def create_model(data, dt=1, timesteps=None, objective='cost', dual=False):
         m.t, m.sto_tuples,
         rule=res_storage_state_by_capacity_rule,
         doc='storage content <= storage capacity')
-    m.res_storage_power = pyomo.Constraint(
-        m.sto_tuples,
-        rule=res_storage_power_rule,
-        doc='storage.cap-lo-p <= storage power <= storage.cap-up-p')
-    m.res_storage_capacity = pyomo.Constraint(
-        m.sto_tuples,
-        rule=res_storage_capacity_rule,
-        doc='storage.cap-lo-c <= storage capacity <= storage.cap-up-c')
+    if not var_bounds:
+        m.res_storage_power = pyomo.Constraint(
+            m.sto_tuples,
+            rule=res_storage_power_rule,
+            doc='storage.cap-lo-p <= storage power <= storage.cap-up-p')
+        m.res_storage_capacity = pyomo.Constraint(
+            m.sto_tuples,
+            rule=res_storage_capacity_rule,
+            doc='storage.cap-lo-c <= storage capacity <= storage.cap-up-c')
     m.res_initial_and_final_storage_state = pyomo.Constraint(
         m.t, m.sto_init_bound_tuples,
         rule=res_initial_and_final_storage_state_rule,
@@ -567,10 +698,11 @@ def create_model(data, dt=1, timesteps=None, objective='cost', dual=False):
         rule=def_dsm_variables_rule,
         doc='DSMup * efficiency factor n == DSMdo (summed)')
 
-    m.res_dsm_upward = pyomo.Constraint(
-        m.tm, m.dsm_site_tuples,
-        rule=res_dsm_upward_rule,
-        doc='DSMup <= Cup (threshold capacity of DSMup)')
+    if not var_bounds:
+        m.res_dsm_upward = pyomo.Constraint(
+            m.tm, m.dsm_site_tuples,
+            rule=res_dsm_upward_rule,
+            doc='DSMup <= Cup (threshold capacity of DSMup)')
 
     m.res_dsm_downward = pyomo.Constraint(
         m.tm, m.dsm_site_tuples,
@@ -623,9 +755,20 @@ def create_model(data, dt=1, timesteps=None, objective='cost', dual=False):
 
     if dual:
         m.dual = pyomo.Suffix(direction=pyomo.Suffix.IMPORT)
+        if var_bounds:
+            # shadow prices of variable bounds are the reduced costs
+            m.rc = pyomo.Suffix(direction=pyomo.Suffix.IMPORT)
     return m
 
 
+# Expressions
+
+# commodity balance of given timestep, site and commodity (cf. helper
+# function commodity_balance)
+def e_co_balance_rule(m, tm, sit, com, com_type):
+    return commodity_balance(m, tm, sit, com)
+
+
 # Constraints
 
 # commodity
@@ -641,13 +784,13 @@ def res_vertex_rule(m, tm, sit, com, com_type):
     if com in m.com_supim:
         return pyomo.Constraint.Skip
 
-    # helper function commodity_balance calculates balance from input to
-    # and output from processes, storage and transmission.
+    # expression e_co_balance holds the balance from input to and output
+    # from processes, storage and transmission (cf. commodity_balance).
     # if power_surplus > 0: production/storage/imports create net positive
     #                       amount of commodity com
     # if power_surplus < 0: production/storage/exports consume a net
     #                       amount of the commodity com
-    power_surplus = - commodity_balance(m, tm, sit, com)
+    power_surplus = - m.e_co_balance[tm, sit, com, com_type]
 
     # if com is a stock commodity, the commodity source term e_co_stock
     # can supply a possibly negative power_surplus
@@ -677,10 +820,8 @@ def res_vertex_rule(m, tm, sit, com, com_type):
     if (sit, com) in m.dsm_site_tuples:
         power_surplus -= m.dsm_up[tm, sit, com]
         power_surplus += sum(m.dsm_down[t, tm, sit, com]
-                             for t in dsm_time_tuples(
-                                 tm, m.timesteps[1:],
-                                 max(int(1 / m.dt *
-                                     m.dsm_dict['delay'][(sit, com)]), 1)))
+                             for t in dsm_steps(
+                                 m, tm, m.dsm_dict['delay'][(sit, com)]))
     return power_surplus == 0
 
 # demand side management (DSM) constraints
@@ -689,10 +830,7 @@ def res_vertex_rule(m, tm, sit, com, com_type):
 # DSMup == DSMdo * efficiency factor n
 def def_dsm_variables_rule(m, tm, sit, com):
     dsm_down_sum = 0
-    for tt in dsm_time_tuples(tm,
-                              m.timesteps[1:],
-                              max(int(1 / m.dt *
-                                  m.dsm_dict['delay'][(sit, com)]), 1)):
+    for tt in dsm_steps(m, tm, m.dsm_dict['delay'][(sit, com)]):
         dsm_down_sum += m.dsm_down[tm, tt, sit, com]
     return dsm_down_sum == (m.dsm_up[tm, sit, com] *
                             m.dsm_dict['eff'][(sit, com)])
@@ -700,42 +838,35 @@ def def_dsm_variables_rule(m, tm, sit, com):
 
 # DSMup <= Cup (threshold capacity of DSMup)
 def res_dsm_upward_rule(m, tm, sit, com):
-    return m.dsm_up[tm, sit, com] <= (m.dt *
+    return m.dsm_up[tm, sit, com] <= (m.dt_dict[tm] *
                                       m.dsm_dict['cap-max-up'][(sit, com)])
 
 
 # DSMdo <= Cdo (threshold capacity of DSMdo)
 def res_dsm_downward_rule(m, tm, sit, com):
     dsm_down_sum = 0
-    for t in dsm_time_tuples(tm,
-                             m.timesteps[1:],
-                             max(int(1 / m.dt *
-                                 m.dsm_dict['delay'][(sit, com)]), 1)):
+    for t in dsm_steps(m, tm, m.dsm_dict['delay'][(sit, com)]):
         dsm_down_sum += m.dsm_down[t, tm, sit, com]
-    return dsm_down_sum <= (m.dt * m.dsm_dict['cap-max-do'][(sit, com)])
+    return dsm_down_sum <= (m.dt_dict[tm] *
+                            m.dsm_dict['cap-max-do'][(sit, com)])
 
 
 # DSMup + DSMdo <= max(Cup,Cdo)
 def res_dsm_maximum_rule(m, tm, sit, com):
     dsm_down_sum = 0
-    for t in dsm_time_tuples(tm,
-                             m.timesteps[1:],
-                             max(int(1 / m.dt *
-                                 m.dsm_dict['delay'][(sit, com)]), 1)):
+    for t in dsm_steps(m, tm, m.dsm_dict['delay'][(sit, com)]):
         dsm_down_sum += m.dsm_down[t, tm, sit, com]
 
-    max_dsm_limit = m.dt * max(m.dsm_dict['cap-max-up'][(sit, com)],
-                               m.dsm_dict['cap-max-do'][(sit, com)])
+    max_dsm_limit = m.dt_dict[tm] * max(m.dsm_dict['cap-max-up'][(sit, com)],
+                                        m.dsm_dict['cap-max-do'][(sit, com)])
     return m.dsm_up[tm, sit, com] + dsm_down_sum <= max_dsm_limit
 
 
 # DSMup(t, t + recovery time R) <= Cup * delay time L
 def res_dsm_recovery_rule(m, tm, sit, com):
     dsm_up_sum = 0
-    for t in dsm_recovery(tm,
-                          m.timesteps[1:],
-                          max(int(1 / m.dt *
-                              m.dsm_dict['recov'][(sit, com)]), 1)):
+    for t in dsm_steps(m, tm, m.dsm_dict['recov'][(sit, com)],
+                       forward=True):
         dsm_up_sum += m.dsm_up[t, sit, com]
     return dsm_up_sum <= (m.dsm_dict['cap-max-up'][(sit, com)] *
                           m.dsm_dict['delay'][(sit, com)])
@@ -749,7 +880,8 @@ def res_stock_step_rule(m, tm, sit, com, com_type):
         return pyomo.Constraint.Skip
     else:
         return (m.e_co_stock[tm, sit, com, com_type] <=
-                m.dt * m.commodity_dict['maxperhour'][(sit, com, com_type)])
+                m.dt_dict[tm] *
+                m.commodity_dict['maxperhour'][(sit, com, com_type)])
 
 
 # limit stock commodity use in total (scaled to annual consumption, thanks
@@ -759,11 +891,9 @@ def res_stock_total_rule(m, sit, com, com_type):
         return pyomo.Constraint.Skip
     else:
         # calculate total consumption of commodity com
-        total_consumption = 0
-        for tm in m.tm:
-            total_consumption += (
-                m.e_co_stock[tm, sit, com, com_type])
-        total_consumption *= m.weight
+        total_consumption = pyomo.quicksum(
+            pyomo.value(m.weight) * m.e_co_stock[tm, sit, com, com_type]
+            for tm in m.tm)
         return (total_consumption <=
                 m.commodity_dict['max'][(sit, com, com_type)])
 
@@ -774,7 +904,8 @@ def res_sell_step_rule(m, tm, sit, com, com_type):
         return pyomo.Constraint.Skip
     else:
         return (m.e_co_sell[tm, sit, com, com_type] <=
-                m.dt * m.commodity_dict['maxperhour'][(sit, com, com_type)])
+                m.dt_dict[tm] *
+                m.commodity_dict['maxperhour'][(sit, com, com_type)])
 
 
 # limit sell commodity use in total (scaled to annual consumption, thanks
@@ -784,11 +915,9 @@ def res_sell_total_rule(m, sit, com, com_type):
         return pyomo.Constraint.Skip
     else:
         # calculate total sale of commodity com
-        total_consumption = 0
-        for tm in m.tm:
-            total_consumption += (
-                m.e_co_sell[tm, sit, com, com_type])
-        total_consumption *= m.weight
+        total_consumption = pyomo.quicksum(
+            pyomo.value(m.weight) * m.e_co_sell[tm, sit, com, com_type]
+            for tm in m.tm)
         return (total_consumption <=
                 m.commodity_dict['max'][(sit, com, com_type)])
 
@@ -799,7 +928,8 @@ def res_buy_step_rule(m, tm, sit, com, com_type):
         return pyomo.Constraint.Skip
     else:
         return (m.e_co_buy[tm, sit, com, com_type] <=
-                m.dt * m.commodity_dict['maxperhour'][(sit, com, com_type)])
+                m.dt_dict[tm] *
+                m.commodity_dict['maxperhour'][(sit, com, com_type)])
 
 
 # limit buy commodity use in total (scaled to annual consumption, thanks
@@ -809,11 +939,9 @@ def res_buy_total_rule(m, sit, com, com_type):
         return pyomo.Constraint.Skip
     else:
         # calculate total sale of commodity com
-        total_consumption = 0
-        for tm in m.tm:
-            total_consumption += (
-                m.e_co_buy[tm, sit, com, com_type])
-        total_consumption *= m.weight
+        total_consumption = pyomo.quicksum(
+            pyomo.value(m.weight) * m.e_co_buy[tm, sit, com, com_type]
+            for tm in m.tm)
         return (total_consumption <=
                 m.commodity_dict['max'][(sit, com, com_type)])
 
@@ -826,9 +954,10 @@ def res_env_step_rule(m, tm, sit, com, com_type):
     if com not in m.com_env:
         return pyomo.Constraint.Skip
     else:
-        environmental_output = - commodity_balance(m, tm, sit, com)
+        environmental_output = - m.e_co_balance[tm, sit, com, com_type]
         return (environmental_output <=
-                m.dt * m.commodity_dict['maxperhour'][(sit, com, com_type)])
+                m.dt_dict[tm] *
+                m.commodity_dict['maxperhour'][(sit, com, com_type)])
 
 
 # limit environmental commodity output in total (scaled to annual
@@ -838,10 +967,9 @@ def res_env_total_rule(m, sit, com, com_type):
         return pyomo.Constraint.Skip
     else:
         # calculate total creation of environmental commodity com
-        env_output_sum = 0
-        for tm in m.tm:
-            env_output_sum += (- commodity_balance(m, tm, sit, com))
-        env_output_sum *= m.weight
+        env_output_sum = pyomo.quicksum(
+            -pyomo.value(m.weight) * m.e_co_balance[tm, sit, com, com_type]
+            for tm in m.tm)
         return (env_output_sum <=
                 m.commodity_dict['max'][(sit, com, com_type)])
 
@@ -871,32 +999,35 @@ def def_process_output_rule(m, tm, sit, pro, co):
 def def_intermittent_supply_rule(m, tm, sit, pro, coin):
     if coin in m.com_supim:
         return (m.e_pro_in[tm, sit, pro, coin] ==
-                m.cap_pro[sit, pro] * m.supim_dict[(sit, coin)][tm] * m.dt)
+                m.cap_pro[sit, pro] * m.supim_dict[(sit, coin)][tm] *
+                m.dt_dict[tm])
     else:
         return pyomo.Constraint.Skip
 
 
 # process throughput <= process capacity
 def res_process_throughput_by_capacity_rule(m, tm, sit, pro):
-    return (m.tau_pro[tm, sit, pro] <= m.dt * m.cap_pro[sit, pro])
+    return (m.tau_pro[tm, sit, pro] <= m.dt_dict[tm] * m.cap_pro[sit, pro])
 
 
+# throughput of the previous timestep is scaled to the duration of the
+# current one, so that power (not energy) changes are limited
 def res_process_maxgrad_lower_rule(m, t, sit, pro):
-    return (m.tau_pro[t-1, sit, pro] -
+    return (m.tau_pro[t-1, sit, pro] * m.dt_dict[t] / m.dt_dict[t-1] -
             m.cap_pro[sit, pro] * m.process_dict['max-grad'][(sit, pro)] *
-            m.dt <= m.tau_pro[t, sit, pro])
+            m.dt_dict[t] <= m.tau_pro[t, sit, pro])
 
 
 def res_process_maxgrad_upper_rule(m, t, sit, pro):
-    return (m.tau_pro[t-1, sit, pro] +
+    return (m.tau_pro[t-1, sit, pro] * m.dt_dict[t] / m.dt_dict[t-1] +
             m.cap_pro[sit, pro] * m.process_dict['max-grad'][(sit, pro)] *
-            m.dt >= m.tau_pro[t, sit, pro])
+            m.dt_dict[t] >= m.tau_pro[t, sit, pro])
 
 
 def res_throughput_by_capacity_min_rule(m, tm, sit, pro):
     return (m.tau_pro[tm, sit, pro] >=
             m.cap_pro[sit, pro] *
-            m.process_dict['min-fraction'][(sit, pro)] * m.dt)
+            m.process_dict['min-fraction'][(sit, pro)] * m.dt_dict[tm])
 
 
 def def_partial_process_input_rule(m, tm, sit, pro, coin):
@@ -909,7 +1040,7 @@ def def_partial_process_input_rule(m, tm, sit, pro, coin):
     throughput_factor = (R - min_fraction * r) / (1 - min_fraction)
 
     return (m.e_pro_in[tm, sit, pro, coin] ==
-            m.dt * m.cap_pro[sit, pro] * online_factor +
+            m.dt_dict[tm] * m.cap_pro[sit, pro] * online_factor +
             m.tau_pro[tm, sit, pro] * throughput_factor)
 
 
@@ -922,7 +1053,7 @@ def def_partial_process_output_rule(m, tm, sit, pro, coo):
     throughput_factor = (R - min_fraction * r) / (1 - min_fraction)
 
     return (m.e_pro_out[tm, sit, pro, coo] ==
-            m.dt * m.cap_pro[sit, pro] * online_factor +
+            m.dt_dict[tm] * m.cap_pro[sit, pro] * online_factor +
             m.tau_pro[tm, sit, pro] * throughput_factor)
 
 
@@ -945,11 +1076,11 @@ def def_pro_partial_timevar_output_rule(m, tm, sit, pro, coo):
     throughput_factor = (R - min_fraction * r) / (1 - min_fraction)
     if coo in m.com_env:
         return (m.e_pro_out[tm, sit, pro, coo] ==
-                m.dt * m.cap_pro[sit, pro] * online_factor +
+                m.dt_dict[tm] * m.cap_pro[sit, pro] * online_factor +
                 m.tau_pro[tm, sit, pro] * throughput_factor)
     else:
         return (m.e_pro_out[tm, sit, pro, coo] ==
-                (m.dt * m.cap_pro[sit, pro] * online_factor +
+                (m.dt_dict[tm] * m.cap_pro[sit, pro] * online_factor +
                  m.tau_pro[tm, sit, pro] * throughput_factor) *
                 m.eff_factor_dict[(sit, pro)][tm])
 
@@ -1010,7 +1141,7 @@ def def_transmission_output_rule(m, tm, sin, sout, tra, com):
 # transmission input <= transmission capacity
 def res_transmission_input_by_capacity_rule(m, tm, sin, sout, tra, com):
     return (m.e_tra_in[tm, sin, sout, tra, com] <=
-            m.dt * m.cap_tra[sin, sout, tra, com])
+            m.dt_dict[tm] * m.cap_tra[sin, sout, tra, com])
 
 
 # lower bound <= transmission capacity <= upper bound
@@ -1033,7 +1164,8 @@ def res_transmission_symmetry_rule(m, sin, sout, tra, com):
 def def_storage_state_rule(m, t, sit, sto, com):
     return (m.e_sto_con[t, sit, sto, com] ==
             m.e_sto_con[t-1, sit, sto, com] *
-            (1 - m.storage_dict['discharge'][(sit, sto, com)]) ** m.dt.value +
+            (1 - m.storage_dict['discharge'][(sit, sto, com)]) **
+            m.dt_dict[t] +
             m.e_sto_in[t, sit, sto, com] *
             m.storage_dict['eff-in'][(sit, sto, com)] -
             m.e_sto_out[t, sit, sto, com] /
@@ -1056,12 +1188,14 @@ def def_storage_capacity_rule(m, sit, sto, com):
 
 # storage input <= storage power
 def res_storage_input_by_power_rule(m, t, sit, sto, com):
-    return m.e_sto_in[t, sit, sto, com] <= m.dt * m.cap_sto_p[sit, sto, com]
+    return (m.e_sto_in[t, sit, sto, com] <=
+            m.dt_dict[t] * m.cap_sto_p[sit, sto, com])
 
 
 # storage output <= storage power
 def res_storage_output_by_power_rule(m, t, sit, sto, co):
-    return m.e_sto_out[t, sit, sto, co] <= m.dt * m.cap_sto_p[sit, sto, co]
+    return (m.e_sto_out[t, sit, sto, co] <=
+            m.dt_dict[t] * m.cap_sto_p[sit, sto, co])
 
 
 # storage content <= storage capacity
@@ -1110,21 +1244,197 @@ def def_storage_energy_power_ratio_rule(m, sit, sto, com):
             [(sit, sto, com)])
 
 
+# Variable bounds
+# alternative to the bound-like constraints res_*_capacity, res_storage_power,
+# res_dsm_upward and res_*_step above, used if create_model is called with
+# var_bounds=True; infinite limits become missing bounds (None)
+
+# lower bound <= process capacity <= upper bound
+def cap_pro_bounds_rule(m, sit, pro):
+    return (finite_or_none(m.process_dict['cap-lo'][sit, pro]),
+            finite_or_none(m.process_dict['cap-up'][sit, pro]))
+
+
+# lower bound <= transmission capacity <= upper bound
+def cap_tra_bounds_rule(m, sin, sout, tra, com):
+    return (finite_or_none(
+                m.transmission_dict['cap-lo'][(sin, sout, tra, com)]),
+            finite_or_none(
+                m.transmission_dict['cap-up'][(sin, sout, tra, com)]))
+
+
+# lower bound <= storage power <= upper bound
+def cap_sto_p_bounds_rule(m, sit, sto, com):
+    return (finite_or_none(m.storage_dict['cap-lo-p'][(sit, sto, com)]),
+            finite_or_none(m.storage_dict['cap-up-p'][(sit, sto, com)]))
+
+
+# lower bound <= storage capacity <= upper bound
+def cap_sto_c_bounds_rule(m, sit, sto, com):
+    return (finite_or_none(m.storage_dict['cap-lo-c'][(sit, sto, com)]),
+            finite_or_none(m.storage_dict['cap-up-c'][(sit, sto, com)]))
+
+
+# DSMup <= Cup (threshold capacity of DSMup)
+def dsm_up_bounds_rule(m, tm, sit, com):
+    return (0, finite_or_none(m.dt_dict[tm] *
+                              m.dsm_dict['cap-max-up'][(sit, com)]))
+
+
+# stock commodity use per time step <= commodity.maxperhour
+def e_co_stock_bounds_rule(m, tm, sit, com, com_type):
+    if com not in m.com_stock:
+        return (0, None)
+    return (0, finite_or_none(
+        m.dt_dict[tm] * m.commodity_dict['maxperhour'][(sit, com, com_type)]))
+
+
+# sell commodity use per time step <= commodity.maxperhour
+def e_co_sell_bounds_rule(m, tm, sit, com, com_type):
+    if com not in m.com_sell:
+        return (0, None)
+    return (0, finite_or_none(
+        m.dt_dict[tm] * m.commodity_dict['maxperhour'][(sit, com, com_type)]))
+
+
+# buy commodity use per time step <= commodity.maxperhour
+def e_co_buy_bounds_rule(m, tm, sit, com, com_type):
+    if com not in m.com_buy:
+        return (0, None)
+    return (0, finite_or_none(
+        m.dt_dict[tm] * m.commodity_dict['maxperhour'][(sit, com, com_type)]))
+
+
+# lower bound - installed <= new process capacity <= upper bound - installed
+# (replaces cap_pro_bounds_rule if total process capacity is substituted)
+def cap_pro_new_bounds_rule(m, sit, pro):
+    inst_cap = m.process_dict['inst-cap'][(sit, pro)]
+    return (finite_or_none(
+                max(0, m.process_dict['cap-lo'][sit, pro] - inst_cap)),
+            finite_or_none(m.process_dict['cap-up'][sit, pro] - inst_cap))
+
+
+# lower bound - installed <= new transmission capacity
+# <= upper bound - installed
+def cap_tra_new_bounds_rule(m, sin, sout, tra, com):
+    inst_cap = m.transmission_dict['inst-cap'][(sin, sout, tra, com)]
+    return (finite_or_none(max(
+                0, m.transmission_dict['cap-lo'][(sin, sout, tra, com)] -
+                inst_cap)),
+            finite_or_none(
+                m.transmission_dict['cap-up'][(sin, sout, tra, com)] -
+                inst_cap))
+
+
+# lower bound - installed <= new storage power <= upper bound - installed
+def cap_sto_p_new_bounds_rule(m, sit, sto, com):
+    inst_cap = m.storage_dict['inst-cap-p'][(sit, sto, com)]
+    return (finite_or_none(
+                max(0, m.storage_dict['cap-lo-p'][(sit, sto, com)] -
+                    inst_cap)),
+            finite_or_none(
+                m.storage_dict['cap-up-p'][(sit, sto, com)] - inst_cap))
+
+
+# lower bound - installed <= new storage capacity <= upper bound - installed
+def cap_sto_c_new_bounds_rule(m, sit, sto, com):
+    inst_cap = m.storage_dict['inst-cap-c'][(sit, sto, com)]
+    return (finite_or_none(
+                max(0, m.storage_dict['cap-lo-c'][(sit, sto, com)] -
+                    inst_cap)),
+            finite_or_none(
+                m.storage_dict['cap-up-c'][(sit, sto, com)] - inst_cap))
+
+
+# Substituted variables
+# right-hand sides of the definitional equalities, used as expressions if
+# create_model is called with substitute=True
+
+# process capacity = new capacity + existing capacity
+def cap_pro_expr_rule(m, sit, pro):
+    return (m.cap_pro_new[sit, pro] +
+            m.process_dict['inst-cap'][(sit, pro)])
+
+
+# process input power = process throughput * input ratio, or its partial
+# load variant (cf. def_partial_process_input_rule)
+def e_pro_in_expr_rule(m, tm, sit, pro, coin):
+    if (sit, pro, coin) not in m.pro_partial_input_tuples:
+        return m.tau_pro[tm, sit, pro] * m.r_in_dict[(pro, coin)]
+
+    R = m.r_in_dict[(pro, coin)]  # input ratio at maximum operation point
+    r = m.r_in_min_fraction_dict[pro, coin]  # input ratio at lowest
+    # operation point
+    min_fraction = m.process_dict['min-fraction'][(sit, pro)]
+
+    online_factor = min_fraction * (r - R) / (1 - min_fraction)
+    throughput_factor = (R - min_fraction * r) / (1 - min_fraction)
+
+    return (m.dt_dict[tm] * m.cap_pro[sit, pro] * online_factor +
+            m.tau_pro[tm, sit, pro] * throughput_factor)
+
+
+# process output power = process throughput * output ratio, or its partial
+# load and/or time variable efficiency variants (cf.
+# def_partial_process_output_rule, def_pro_timevar_output_rule and
+# def_pro_partial_timevar_output_rule)
+def e_pro_out_expr_rule(m, tm, sit, pro, coo):
+    R = m.r_out_dict[pro, coo]  # output ratio at maximum operation point
+    if (sit, pro, coo) in m.pro_partial_output_tuples:
+        r = m.r_out_min_fraction_dict[pro, coo]  # output ratio at lowest
+        # operation point
+        min_fraction = m.process_dict['min-fraction'][(sit, pro)]
+
+        online_factor = min_fraction * (r - R) / (1 - min_fraction)
+        throughput_factor = (R - min_fraction * r) / (1 - min_fraction)
+        output = (m.dt_dict[tm] * m.cap_pro[sit, pro] * online_factor +
+                  m.tau_pro[tm, sit, pro] * throughput_factor)
+    else:
+        output = m.tau_pro[tm, sit, pro] * R
+
+    if ((sit, pro, coo) in m.pro_timevar_output_tuples and
+            coo not in m.com_env):
+        output = output * m.eff_factor_dict[(sit, pro)][tm]
+    return output
+
+
+# transmission capacity = new capacity + existing capacity
+def cap_tra_expr_rule(m, sin, sout, tra, com):
+    return (m.cap_tra_new[sin, sout, tra, com] +
+            m.transmission_dict['inst-cap'][(sin, sout, tra, com)])
+
+
+# transmission output = transmission input * efficiency
+def e_tra_out_expr_rule(m, tm, sin, sout, tra, com):
+    return (m.e_tra_in[tm, sin, sout, tra, com] *
+            m.transmission_dict['eff'][(sin, sout, tra, com)])
+
+
+# storage capacity = new storage capacity + existing storage capacity
+def cap_sto_c_expr_rule(m, sit, sto, com):
+    return (m.cap_sto_c_new[sit, sto, com] +
+            m.storage_dict['inst-cap-c'][(sit, sto, com)])
+
+
+# storage power = new storage power + existing storage power
+def cap_sto_p_expr_rule(m, sit, sto, com):
+    return (m.cap_sto_p_new[sit, sto, com] +
+            m.storage_dict['inst-cap-p'][(sit, sto, com)])
+
+
 # total CO2 output <= Global CO2 limit
 def res_global_co2_limit_rule(m):
     if math.isinf(m.global_prop_dict['value']['CO2 limit']):
         return pyomo.Constraint.Skip
     elif m.global_prop_dict['value']['CO2 limit'] >= 0:
-        co2_output_sum = 0
-        for tm in m.tm:
-            for sit in m.sit:
-                # minus because negative commodity_balance represents creation
-                # of that commodity.
-                co2_output_sum += (- commodity_balance(m, tm, sit, 'CO2'))
-
-        # scaling to annual output (cf. definition of m.weight)
-        co2_output_sum *= m.weight
-        return (co2_output_sum <= m.global_prop_dict['value']['CO2 limit'])
+        # minus because negative commodity_balance represents creation of
+        # that commodity; scaling to annual output (cf. definition of
+        # m.weight)
+        co2_output_sum = pyomo.quicksum(
+            -pyomo.value(m.weight) * m.e_co_balance[(tm,) + co2_tuple]
+            for tm in m.tm
+            for co2_tuple in co2_tuples(m))
+        return (co2_output_sum <= m.global_co2_limit)
     else:
         return pyomo.Constraint.Skip
 
@@ -1133,8 +1443,7 @@ def res_global_cost_limit_rule(m):
     if math.isinf(m.global_prop_dict["value"]["Cost limit"]):
         return pyomo.Constraint.Skip
     elif m.global_prop_dict["value"]["Cost limit"] >= 0:
-        return(pyomo.summation(m.costs) <= m.global_prop_dict["value"]
-               ["Cost limit"])
+        return (pyomo.summation(m.costs) <= m.global_cost_limit)
     else:
         return pyomo.Constraint.Skip
 
@@ -1158,103 +1467,94 @@ def def_costs_rule(m, cost_type):
       - Fuel costs for stock commodity purchase.
 
     """
+    # sums are built with quicksum from terms (coefficient * variable) with
+    # precomputed coefficients, which yields flat linear expressions instead
+    # of deeply nested sum and product expressions; weight is multiplied
+    # into these coefficients as a float and therefore is fixed once the
+    # model is built (c.f. script runbench.py for the gain), whereas the
+    # mutable commodity prices stay parameters of the coefficients
+    weight = pyomo.value(m.weight)
+
     if cost_type == 'Invest':
-        return m.costs[cost_type] == \
-            sum(m.cap_pro_new[p] *
-                m.process_dict['inv-cost'][p] *
-                m.process_dict['annuity-factor'][p]
-                for p in m.pro_tuples) + \
-            sum(m.cap_tra_new[t] *
-                m.transmission_dict['inv-cost'][t] *
-                m.transmission_dict['annuity-factor'][t]
-                for t in m.tra_tuples) + \
-            sum(m.cap_sto_p_new[s] *
-                m.storage_dict['inv-cost-p'][s] *
-                m.storage_dict['annuity-factor'][s] +
-                m.cap_sto_c_new[s] *
-                m.storage_dict['inv-cost-c'][s] *
-                m.storage_dict['annuity-factor'][s]
-                for s in m.sto_tuples)
+        return m.costs[cost_type] == pyomo.quicksum(
+            [(m.process_dict['inv-cost'][p] *
+              m.process_dict['annuity-factor'][p]) *
+             m.cap_pro_new[p]
+             for p in m.pro_tuples] +
+            [(m.transmission_dict['inv-cost'][t] *
+              m.transmission_dict['annuity-factor'][t]) *
+             m.cap_tra_new[t]
+             for t in m.tra_tuples] +
+            [(m.storage_dict['inv-cost-p'][s] *
+              m.storage_dict['annuity-factor'][s]) *
+             m.cap_sto_p_new[s]
+             for s in m.sto_tuples] +
+            [(m.storage_dict['inv-cost-c'][s] *
+              m.storage_dict['annuity-factor'][s]) *
+             m.cap_sto_c_new[s]
+             for s in m.sto_tuples])
 
     elif cost_type == 'Fixed':
-        return m.costs[cost_type] == \
-            sum(m.cap_pro[p] * m.process_dict['fix-cost'][p]
-                for p in m.pro_tuples) + \
-            sum(m.cap_tra[t] * m.transmission_dict['fix-cost'][t]
-                for t in m.tra_tuples) + \
-            sum(m.cap_sto_p[s] * m.storage_dict['fix-cost-p'][s] +
-                m.cap_sto_c[s] * m.storage_dict['fix-cost-c'][s]
-                for s in m.sto_tuples)
+        return m.costs[cost_type] == pyomo.quicksum(
+            [m.process_dict['fix-cost'][p] * m.cap_pro[p]
+             for p in m.pro_tuples] +
+            [m.transmission_dict['fix-cost'][t] * m.cap_tra[t]
+             for t in m.tra_tuples] +
+            [m.storage_dict['fix-cost-p'][s] * m.cap_sto_p[s]
+             for s in m.sto_tuples] +
+            [m.storage_dict['fix-cost-c'][s] * m.cap_sto_c[s]
+             for s in m.sto_tuples])
 
     elif cost_type == 'Variable':
-        return m.costs[cost_type] == \
-            sum(m.tau_pro[(tm,) + p] * m.weight *
-                m.process_dict['var-cost'][p]
-                for tm in m.tm
-                for p in m.pro_tuples) + \
-            sum(m.e_tra_in[(tm,) + t] * m.weight *
-                m.transmission_dict['var-cost'][t]
-                for tm in m.tm
-                for t in m.tra_tuples) + \
-            sum(m.e_sto_con[(tm,) + s] * m.weight *
-                m.storage_dict['var-cost-c'][s] +
-                m.weight *
-                (m.e_sto_in[(tm,) + s] + m.e_sto_out[(tm,) + s]) *
-                m.storage_dict['var-cost-p'][s]
-                for tm in m.tm
-                for s in m.sto_tuples)
+        pro_costs = [(p, weight * m.process_dict['var-cost'][p])
+                     for p in m.pro_tuples]
+        tra_costs = [(t, weight * m.transmission_dict['var-cost'][t])
+                     for t in m.tra_tuples]
+        sto_costs = [(s, weight * m.storage_dict['var-cost-c'][s],
+                      weight * m.storage_dict['var-cost-p'][s])
+                     for s in m.sto_tuples]
+        return m.costs[cost_type] == pyomo.quicksum(
+            [cost * m.tau_pro[(tm,) + p]
+             for tm in m.tm for p, cost in pro_costs] +
+            [cost * m.e_tra_in[(tm,) + t]
+             for tm in m.tm for t, cost in tra_costs] +
+            [term
+             for tm in m.tm for s, cost_c, cost_p in sto_costs
+             for term in (cost_c * m.e_sto_con[(tm,) + s],
+                          cost_p * m.e_sto_in[(tm,) + s],
+                          cost_p * m.e_sto_out[(tm,) + s])])
 
     elif cost_type == 'Fuel':
-        return m.costs[cost_type] == sum(
-            m.e_co_stock[(tm,) + c] * m.weight *
-            m.commodity_dict['price'][c]
-            for tm in m.tm for c in m.com_tuples
-            if c[1] in m.com_stock)
+        stock_costs = [(c, weight * m.commodity_price[c])
+                       for c in m.com_tuples if c[1] in m.com_stock]
+        return m.costs[cost_type] == pyomo.quicksum(
+            cost * m.e_co_stock[(tm,) + c]
+            for tm in m.tm for c, cost in stock_costs)
 
     elif cost_type == 'Revenue':
         sell_tuples = commodity_subset(m.com_tuples, m.com_sell)
 
-        try:
-            return m.costs[cost_type] == -sum(
-                m.e_co_sell[(tm,) + c] * m.weight *
-                m.buy_sell_price_dict[c[1], ][tm] *
-                m.commodity_dict['price'][c]
-                for tm in m.tm
-                for c in sell_tuples)
-        except KeyError:
-            return m.costs[cost_type] == -sum(
-                m.e_co_sell[(tm,) + c] * m.weight *
-                m.buy_sell_price_dict[c[1]][tm] *
-                m.commodity_dict['price'][c]
-                for tm in m.tm
-                for c in sell_tuples)
+        return m.costs[cost_type] == pyomo.quicksum(
+            (-weight * price[tm] * m.commodity_price[c]) *
+            m.e_co_sell[(tm,) + c]
+            for c, price in buy_sell_prices(m, sell_tuples)
+            for tm in m.tm)
 
     elif cost_type == 'Purchase':
         buy_tuples = commodity_subset(m.com_tuples, m.com_buy)
 
-        try:
-            return m.costs[cost_type] == sum(
-                m.e_co_buy[(tm,) + c] * m.weight *
-                m.buy_sell_price_dict[c[1], ][tm] *
-                m.commodity_dict['price'][c]
-                for tm in m.tm
-                for c in buy_tuples)
-        except KeyError:
-            return m.costs[cost_type] == sum(
-                m.e_co_buy[(tm,) + c] * m.weight *
-                m.buy_sell_price_dict[c[1]][tm] *
-                m.commodity_dict['price'][c]
-                for tm in m.tm
-                for c in buy_tuples)
+        return m.costs[cost_type] == pyomo.quicksum(
+            (weight * price[tm] * m.commodity_price[c]) *
+            m.e_co_buy[(tm,) + c]
+            for c, price in buy_sell_prices(m, buy_tuples)
+            for tm in m.tm)
 
     elif cost_type == 'Environmental':
-        return m.costs[cost_type] == sum(
-            - commodity_balance(m, tm, sit, com) *
-            m.weight *
-            m.commodity_dict['price'][(sit, com, com_type)]
-            for tm in m.tm
-            for sit, com, com_type in m.com_tuples
-            if com in m.com_env)
+        env_costs = [(c, -weight * m.commodity_price[c])
+                     for c in m.com_tuples if c[1] in m.com_env]
+        return m.costs[cost_type] == pyomo.quicksum(
+            cost * m.e_co_balance[(tm,) + c]
+            for tm in m.tm for c, cost in env_costs)
 
     else:
         raise NotImplementedError("Unknown cost type.")
@@ -1265,13 +1565,10 @@ def cost_rule(m):
 
 
 def co2_rule(m):
-    co2_output_sum = 0
-    for tm in m.tm:
-        for sit in m.sit:
-            # minus because negative commodity_balance represents creation
-            # of that commodity.
-            co2_output_sum += (- commodity_balance(m, tm, sit, 'CO2'))
-
-    # scaling to annual output (cf. definition of m.weight)
-    co2_output_sum *= m.weight
+    # minus because negative commodity_balance represents creation of that
+    # commodity; scaling to annual output (cf. definition of m.weight)
+    co2_output_sum = pyomo.quicksum(
+        -pyomo.value(m.weight) * m.e_co_balance[(tm,) + co2_tuple]
+        for tm in m.tm
+        for co2_tuple in co2_tuples(m))
     return (co2_output_sum)
@@ -1,3 +1,5 @@
+import bisect
+import math
 import pandas as pd
 
 
@@ -26,6 +28,27 @@ def annuity_factor(n, i):
         return (1+i)**n * i / ((1+i)**n - 1)
 
 
+def finite_or_none(value):
+    """Return value, or None if it is infinite or not a number.
+
+    Pyomo interprets a variable bound of None as "no bound", which is how
+    infinite capacity limits from the input are passed to the solver.
+
+    Args:
+        value: a number, e.g. a capacity limit from the input data
+
+    Returns:
+        value or None
+
+    Example:
+        >>> finite_or_none(float('inf')) is None
+        True
+    """
+    if value is None or math.isinf(value) or math.isnan(value):
+        return None
+    return value
+
+
 def commodity_balance(m, tm, sit, com):
     """Calculate commodity balance at given timestep.
 
@@ -45,33 +68,161 @@ def commodity_balance(m, tm, sit, com):
         balance: net value of consumed (positive) or provided (negative) power
 
     """
-    balance = (sum(m.e_pro_in[(tm, site, process, com)]
+    pro_in, pro_out, tra_in, tra_out, sto = balance_tuples(m, sit, com)
+    balance = (sum(m.e_pro_in[(tm,) + p]
                    # usage as input for process increases balance
-                   for site, process in m.pro_tuples
-                   if site == sit and (process, com) in m.r_in_dict) -
-               sum(m.e_pro_out[(tm, site, process, com)]
+                   for p in pro_in) -
+               sum(m.e_pro_out[(tm,) + p]
                    # output from processes decreases balance
-                   for site, process in m.pro_tuples
-                   if site == sit and (process, com) in m.r_out_dict) +
-               sum(m.e_tra_in[(tm, site_in, site_out, transmission, com)]
+                   for p in pro_out) +
+               sum(m.e_tra_in[(tm,) + t]
                    # exports increase balance
-                   for site_in, site_out, transmission, commodity
-                   in m.tra_tuples
-                   if site_in == sit and commodity == com) -
-               sum(m.e_tra_out[(tm, site_in, site_out, transmission, com)]
+                   for t in tra_in) -
+               sum(m.e_tra_out[(tm,) + t]
                    # imports decrease balance
-                   for site_in, site_out, transmission, commodity
-                   in m.tra_tuples
-                   if site_out == sit and commodity == com) +
-               sum(m.e_sto_in[(tm, site, storage, com)] -
-                   m.e_sto_out[(tm, site, storage, com)]
+                   for t in tra_out) +
+               sum(m.e_sto_in[(tm,) + s] -
+                   m.e_sto_out[(tm,) + s]
                    # usage as input for storage increases consumption
                    # output from storage decreases consumption
-                   for site, storage, commodity in m.sto_tuples
-                   if site == sit and commodity == com))
+                   for s in sto))
     return balance
 
 
+def balance_tuples(m, sit, com):
+    """Return the entity tuples that contribute to a commodity balance.
+
+    The tuples depend only on site and commodity, not on the timestep. They
+    are determined once per (site, commodity) and cached in the model
+    attribute `_balance_tuples`.
+
+    Args:
+        m: the model object
+        sit: the site
+        com: the commodity
+
+    Returns:
+        (pro_in, pro_out, tra_in, tra_out, sto) tuple of lists of index
+        tuples: (site, process, commodity) for processes consuming or
+        producing com at sit, transmission tuples exporting from or importing
+        to sit and storage tuples of com at sit
+    """
+    if not hasattr(m, '_balance_tuples'):
+        m._balance_tuples = {}
+    try:
+        return m._balance_tuples[sit, com]
+    except KeyError:
+        pass
+
+    tuples = (
+        [(site, process, com) for site, process in m.pro_tuples
+         if site == sit and (process, com) in m.r_in_dict],
+        [(site, process, com) for site, process in m.pro_tuples
+         if site == sit and (process, com) in m.r_out_dict],
+        [t for t in m.tra_tuples if t[0] == sit and t[3] == com],
+        [t for t in m.tra_tuples if t[1] == sit and t[3] == com],
+        [s for s in m.sto_tuples if s[0] == sit and s[2] == com])
+    m._balance_tuples[sit, com] = tuples
+    return tuples
+
+
+def co2_tuples(m):
+    """Return one commodity tuple (site, 'CO2', type) per site with CO2.
+
+    Args:
+        m: the model object
+
+    Returns:
+        list of (site, commodity, commodity type) tuples of commodity 'CO2'
+    """
+    sites = {}
+    for sit, com, com_type in m.com_tuples:
+        if com == 'CO2' and sit not in sites:
+            sites[sit] = (sit, com, com_type)
+    return [sites[sit] for sit in sorted(sites)]
+
+
+def step_durations(timesteps, dt):
+    """Duration of each timestep.
+
+    Args:
+        timesteps: list of timesteps, the first one being the initial one
+        dt: duration of all timesteps (hours), or a dict or Series of
+            timestep to duration; the initial timestep defaults to the
+            duration of the first modelled one
+
+    Returns:
+        dict of timestep to duration (hours)
+    """
+    if not isinstance(dt, (dict, pd.Series)):
+        return dict((t, float(dt)) for t in timesteps)
+
+    missing = [t for t in timesteps[1:] if t not in dt]
+    if missing:
+        raise ValueError("Timestep durations dt missing for timesteps {}."
+                         .format(missing[:5]))
+    durations = dict((t, float(dt[t])) for t in timesteps[1:])
+    durations[timesteps[0]] = float(dt[timesteps[0]]
+                                    if timesteps[0] in dt
+                                    else dt[timesteps[1]])
+    return durations
+
+
+def dsm_steps(m, timestep, hours, forward=False):
+    """Modelled timesteps within a DSM delay or recovery time of timestep.
+
+    Distances between timesteps are measured in hours between their
+    midpoints, so that timesteps of different duration (c.f. argument dt of
+    create_model) are handled. The result is symmetric: timestep is in the
+    window of each timestep of its own window. With a constant duration dt,
+    these are the timesteps at most max(int(hours / dt), 1) steps apart (c.f.
+    dsm_time_tuples). Windows are cached in the model attribute
+    `_dsm_steps`.
+
+    Args:
+        m: the model object
+        timestep: a modelled timestep
+        hours: DSM delay (or recovery time with forward=True) in hours
+        forward: set True for the recovery window instead, i.e. timestep
+            and the following timesteps that end at most hours after
+            timestep starts, at least timestep itself (c.f. dsm_recovery)
+
+    Returns:
+        list of timesteps
+    """
+    if not hasattr(m, '_dsm_steps'):
+        steps = m.timesteps[1:]
+        ends = []
+        clock = 0.0
+        for t in steps:
+            clock += m.dt_dict[t]
+            ends.append(clock)
+        mids = [end - m.dt_dict[t] / 2 for t, end in zip(steps, ends)]
+        m._dsm_steps = {'steps': steps, 'ends': ends, 'mids': mids,
+                        'position': dict((t, k) for k, t in enumerate(steps))}
+    cache = m._dsm_steps
+    try:
+        return cache[timestep, hours, forward]
+    except KeyError:
+        pass
+
+    # tolerance for durations that are sums of fractional hours
+    eps = 1e-9
+    k = cache['position'][timestep]
+    if forward:
+        start = cache['ends'][k] - m.dt_dict[timestep]
+        last = bisect.bisect_right(cache['ends'], start + hours + eps)
+        window = cache['steps'][k:max(last, k + 1)]
+    else:
+        mid = cache['mids'][k]
+        first = bisect.bisect_left(cache['mids'], mid - hours - eps)
+        last = bisect.bisect_right(cache['mids'], mid + hours + eps)
+        window = cache['steps'][min(first, max(k - 1, 0)):
+                                max(last, k + 2)]
+    cache[timestep, hours, forward] = window
+    return window
+
+
 def dsm_down_time_tuples(time, sit_com_tuple, m):
     """ Dictionary for the two time instances of DSM_down
 
@@ -88,19 +239,12 @@ def dsm_down_time_tuples(time, sit_com_tuple, m):
         return []
 
     delay = m.dsm_dict['delay']
-    ub = max(time)
-    lb = min(time)
     time_list = []
 
     for (site, commodity) in sit_com_tuple:
         for step1 in time:
-            for step2 in range(step1 -
-                               max(int(delay[site, commodity] /
-                                       m.dt.value), 1),
-                               step1 + max(int(delay[site, commodity] /
-                                               m.dt.value), 1) + 1):
-                if lb <= step2 <= ub:
-                    time_list.append((step1, step2, site, commodity))
+            for step2 in dsm_steps(m, step1, delay[site, commodity]):
+                time_list.append((step1, step2, site, commodity))
 
     return time_list
 
@@ -175,6 +319,28 @@ def commodity_subset(com_tuples, type_name):
                    if com in type_name)
 
 
+def buy_sell_prices(m, com_tuples):
+    """ Return the price time series of given buy or sell commodities.
+
+    Args:
+        m: the model object
+        com_tuples: a list of (site, commodity, commodity type) tuples of buy
+            or sell commodities
+
+    Returns:
+        list of (commodity tuple, price time series) tuples; the time series
+        can be indexed by timestep
+    """
+    prices = []
+    for c in sorted(com_tuples):
+        try:
+            # price columns are tuples if read from a multi-level header
+            prices.append((c, m.buy_sell_price_dict[c[1], ]))
+        except KeyError:
+            prices.append((c, m.buy_sell_price_dict[c[1]]))
+    return prices
+
+
 def search_sell_buy_tuple(instance, sit_in, pro_in, coin):
     """ Return the equivalent sell-process for a given buy-process.
 
@@ -0,0 +1,325 @@
+import math
+import numpy as np
+import pandas as pd
+from .modelhelper import step_durations
+
+# approximate memory (bytes) of one member of a Pyomo model component and of
+# one nonzero coefficient (64-bit CPython, Pyomo 5), incl. the share of
+# writing the solver input file
+MEMORY = {
+    'Var': 450,
+    'Constraint': 700,
+    'Expression': 350,
+    'Nonzero': 120}
+
+# approximate memory (MB) of the Python process before building the model,
+# i.e. interpreter, imported modules and input data
+BASE_MEMORY = 150
+
+# constraints expressed as variable bounds with create_model(var_bounds=True)
+BOUND_CONSTRAINTS = [
+    'res_stock_step', 'res_sell_step', 'res_buy_step', 'res_process_capacity',
+    'res_transmission_capacity', 'res_storage_power', 'res_storage_capacity',
+    'res_dsm_upward']
+
+# variables and constraints replaced by expressions with
+# create_model(substitute=True)
+SUBSTITUTED_VARIABLES = [
+    'cap_pro', 'e_pro_in', 'e_pro_out', 'cap_tra', 'e_tra_out', 'cap_sto_c',
+    'cap_sto_p']
+SUBSTITUTED_CONSTRAINTS = [
+    'def_process_capacity', 'def_process_input', 'def_process_output',
+    'def_partial_process_input', 'def_partial_process_output',
+    'def_process_timevar_output', 'def_process_partial_timevar_output',
+    'def_transmission_capacity', 'def_transmission_output',
+    'def_storage_power', 'def_storage_capacity']
+
+
+def _process_tuples(data, direction, min_fraction=False):
+    """ (Site, Process, Commodity) frame of process inputs or outputs. """
+    ratios = data['process_commodity'].xs(direction, level='Direction')
+    if min_fraction:
+        ratios = ratios[ratios['ratio-min'] > 0]
+    return data['process'].index.to_frame(index=False).merge(
+        ratios.reset_index()[['Process', 'Commodity']], on='Process')
+
+
+def _window_sizes(steps, before, after):
+    """ Total number of timesteps within before/after steps of each step. """
+    position = np.arange(steps)
+    return int((np.minimum(position + after, steps - 1) -
+                np.maximum(position - before, 0) + 1).sum())
+
+
+def estimate_model_size(data, timesteps=None, dt=1, objective='cost',
+                        var_bounds=False, substitute=False):
+    """Estimate the size of the model create_model would build.
+
+    Counts the members of each variable, expression and constraint of the
+    model and the nonzero coefficients of each constraint from the input
+    data alone, without creating any Pyomo objects. Member counts follow the
+    index sets and skip rules of create_model; nonzeros are approximate (DSM
+    windows assume the mean timestep length). Memory is estimated with the
+    per member averages in MEMORY.
+
+    Args:
+        data: input data dict, as passed to create_model
+        timesteps: list of timesteps, default: all timesteps of data
+        dt: timestep duration(s), as passed to create_model
+        objective: as passed to create_model
+        var_bounds: as passed to create_model
+        substitute: as passed to create_model
+
+    Returns:
+        a DataFrame indexed by component name, in order of declaration, with
+        columns 'Type', 'Members', 'Nonzeros' (constraints only) and
+        'Memory' (MB)
+
+    Example:
+        >>> data = read_excel('mimo-example.xlsx')
+        >>> size = estimate_model_size(data, range(0, 8761))
+        >>> size.groupby('Type')[['Members', 'Nonzeros']].sum()
+        ... # doctest: +SKIP
+    """
+    if not timesteps:
+        timesteps = data['demand'].index.tolist()
+    timesteps = list(timesteps)
+    durations = step_durations(timesteps, dt)
+    modelled = [durations[t] for t in timesteps[1:]]
+    T = len(modelled)
+    dt_mean = float(np.mean(modelled))
+
+    # commodities by type
+    commodity = data['commodity']
+    com_type = commodity.index.get_level_values('Type')
+    names = dict((typ, set(commodity.index.get_level_values('Commodity')
+                           [com_type == typ]))
+                 for typ in ('SupIm', 'Stock', 'Sell', 'Buy', 'Env'))
+    K = len(commodity)
+    C = commodity.index.get_level_values('Commodity').nunique()
+    env = np.array([com in names['Env'] for com in
+                    commodity.index.get_level_values('Commodity')], dtype=bool)
+
+    # processes
+    process = data['process']
+    P = len(process)
+    pro_in = _process_tuples(data, 'In')
+    pro_out = _process_tuples(data, 'Out')
+    partial_in = _process_tuples(data, 'In', True)
+    partial = partial_in[['Site', 'Process']].drop_duplicates()
+    partial_out = _process_tuples(data, 'Out', True).merge(partial)
+    if data['eff_factor'].empty:
+        timevar = pro_out.iloc[:0]
+    else:
+        timevar = pd.DataFrame(list(data['eff_factor'].columns),
+                               columns=['Site', 'Process']).merge(pro_out)
+    both = len(partial_out.merge(timevar))
+    maxgrad = int((process['max-grad'] < 1.0 / min(durations.values())).sum())
+    supim_in = int(pro_in['Commodity'].isin(names['SupIm']).sum())
+    area = process[process['area-per-cap'] > 0].index.get_level_values('Site')
+    areas = int(sum(1 for sit in set(area)
+                    if data['site'].loc[sit, 'area'] >= 0))
+    buy_in = int(pro_in['Commodity'].isin(names['Buy']).sum())
+
+    # transmission, storage, DSM
+    transmission = data['transmission']
+    L = len(transmission)
+    storage = data['storage']
+    S = len(storage)
+    S_init = int((storage['init'] >= 0).sum())
+    S_ep = (int((storage['ep-ratio'] >= 0).sum())
+            if 'ep-ratio' in storage.columns else 0)
+    dsm = data['dsm']
+    D = len(dsm)
+    delay_windows = recov_windows = 0
+    if D:
+        for delay, recov in zip(dsm['delay'], dsm['recov']):
+            steps = max(int(delay / dt_mean), 1)
+            delay_windows += _window_sizes(T, steps, steps)
+            recov_windows += _window_sizes(T, 0, max(int(recov / dt_mean),
+                                                     1) - 1)
+    dsm_down = delay_windows
+
+    # terms of the commodity balance of each (site, commodity)
+    terms = pd.concat([
+        pro_in.groupby(['Site', 'Commodity']).size(),
+        pro_out.groupby(['Site', 'Commodity']).size(),
+        pd.Series(1, index=pd.MultiIndex.from_arrays(
+            [transmission.index.get_level_values('Site In'),
+             transmission.index.get_level_values('Commodity')])),
+        pd.Series(1, index=pd.MultiIndex.from_arrays(
+            [transmission.index.get_level_values('Site Out'),
+             transmission.index.get_level_values('Commodity')])),
+        pd.Series(2, index=pd.MultiIndex.from_arrays(
+            [storage.index.get_level_values('Site'),
+             storage.index.get_level_values('Commodity')]))])
+    terms = terms.groupby(level=[0, 1]).sum()
+    balance = np.array([terms.get((sit, com), 0) for sit, com, _ in
+                        commodity.index], dtype=float)
+    balance_env = balance[env].sum()
+    sources = sum(1 for _, com, _ in commodity.index
+                  if com in names['Stock'] | names['Sell'] | names['Buy'])
+    vertex = T * (balance[~env].sum() + sources) + (D * T + dsm_down)
+    K_type = dict((typ, sum(1 for _, com, _ in commodity.index
+                            if com in names[typ]))
+                  for typ in ('Stock', 'Sell', 'Buy'))
+    activity = P + L + 2 * S
+
+    # (name, type, members, nonzeros) in order of declaration
+    components = [
+        ('costs', 'Var', 7, None),
+        ('e_co_stock', 'Var', T * K, None),
+        ('e_co_sell', 'Var', T * K, None),
+        ('e_co_buy', 'Var', T * K, None),
+        ('cap_pro', 'Var', P, None),
+        ('cap_pro_new', 'Var', P, None),
+        ('tau_pro', 'Var', (T + 1) * P, None),
+        ('e_pro_in', 'Var', T * P * C, None),
+        ('e_pro_out', 'Var', T * P * C, None),
+        ('cap_tra', 'Var', L, None),
+        ('cap_tra_new', 'Var', L, None),
+        ('e_tra_in', 'Var', T * L, None),
+        ('e_tra_out', 'Var', T * L, None),
+        ('cap_sto_c', 'Var', S, None),
+        ('cap_sto_c_new', 'Var', S, None),
+        ('cap_sto_p', 'Var', S, None),
+        ('cap_sto_p_new', 'Var', S, None),
+        ('e_sto_in', 'Var', T * S, None),
+        ('e_sto_out', 'Var', T * S, None),
+        ('e_sto_con', 'Var', (T + 1) * S, None),
+        ('dsm_up', 'Var', T * D, None),
+        ('dsm_down', 'Var', dsm_down, None),
+        ('e_co_balance', 'Expression', T * K, None),
+        ('res_vertex', 'Constraint', T * int((~env).sum()), vertex),
+        ('res_stock_step', 'Constraint', T * K_type['Stock'],
+         T * K_type['Stock']),
+        ('res_stock_total', 'Constraint', K_type['Stock'],
+         T * K_type['Stock']),
+        ('res_sell_step', 'Constraint', T * K_type['Sell'],
+         T * K_type['Sell']),
+        ('res_sell_total', 'Constraint', K_type['Sell'], T * K_type['Sell']),
+        ('res_buy_step', 'Constraint', T * K_type['Buy'], T * K_type['Buy']),
+        ('res_buy_total', 'Constraint', K_type['Buy'], T * K_type['Buy']),
+        ('res_env_step', 'Constraint', T * int(env.sum()), T * balance_env),
+        ('res_env_total', 'Constraint', int(env.sum()), T * balance_env),
+        ('def_process_capacity', 'Constraint', P, 2 * P),
+        ('def_process_input', 'Constraint',
+         T * (len(pro_in) - len(partial_in)),
+         2 * T * (len(pro_in) - len(partial_in))),
+        ('def_process_output', 'Constraint',
+         T * (len(pro_out) - len(partial_out) - len(timevar) + both),
+         2 * T * (len(pro_out) - len(partial_out) - len(timevar) + both)),
+        ('def_intermittent_supply', 'Constraint', T * supim_in,
+         2 * T * supim_in),
+        ('res_process_throughput_by_capacity', 'Constraint', T * P, 2 * T * P),
+        ('res_process_maxgrad_lower', 'Constraint', T * maxgrad,
+         3 * T * maxgrad),
+        ('res_process_maxgrad_upper', 'Constraint', T * maxgrad,
+         3 * T * maxgrad),
+        ('res_process_capacity', 'Constraint', P, P),
+        ('res_area', 'Constraint', areas, len(area)),
+        ('res_sell_buy_symmetry', 'Constraint', buy_in, 2 * buy_in),
+        ('res_throughput_by_capacity_min', 'Constraint', T * len(partial),
+         2 * T * len(partial)),
+        ('def_partial_process_input', 'Constraint', T * len(partial_in),
+         3 * T * len(partial_in)),
+        ('def_partial_process_output', 'Constraint',
+         T * (len(partial_out) - both), 3 * T * (len(partial_out) - both)),
+        ('def_process_timevar_output', 'Constraint',
+         T * (len(timevar) - both), 2 * T * (len(timevar) - both)),
+        ('def_process_partial_timevar_output', 'Constraint', T * both,
+         3 * T * both),
+        ('def_transmission_capacity', 'Constraint', L, 2 * L),
+        ('def_transmission_output', 'Constraint', T * L, 2 * T * L),
+        ('res_transmission_input_by_capacity', 'Constraint', T * L,
+         2 * T * L),
+        ('res_transmission_capacity', 'Constraint', L, L),
+        ('res_transmission_symmetry', 'Constraint', L, 2 * L),
+        ('def_storage_state', 'Constraint', T * S, 4 * T * S),
+        ('def_storage_power', 'Constraint', S, 2 * S),
+        ('def_storage_capacity', 'Constraint', S, 2 * S),
+        ('res_storage_input_by_power', 'Constraint', T * S, 2 * T * S),
+        ('res_storage_output_by_power', 'Constraint', T * S, 2 * T * S),
+        ('res_storage_state_by_capacity', 'Constraint', (T + 1) * S,
+         2 * (T + 1) * S),
+        ('res_storage_power', 'Constraint', S, S),
+        ('res_storage_capacity', 'Constraint', S, S),
+        ('res_initial_and_final_storage_state', 'Constraint', 2 * S_init,
+         4 * S_init),
+        ('res_initial_and_final_storage_state_var', 'Constraint',
+         (T + 1) * (S - S_init), 2 * (T + 1) * (S - S_init)),
+        ('def_storage_energy_power_ratio', 'Constraint', S_ep, 2 * S_ep),
+        ('def_dsm_variables', 'Constraint', T * D, T * D + dsm_down),
+        ('res_dsm_upward', 'Constraint', T * D, T * D),
+        ('res_dsm_downward', 'Constraint', T * D, dsm_down),
+        ('res_dsm_maximum', 'Constraint', T * D, T * D + dsm_down),
+        ('res_dsm_recovery', 'Constraint', T * D, recov_windows),
+        ('def_costs', 'Constraint', 7,
+         7 + 2 * activity + T * (activity + sum(K_type.values())) +
+         T * balance_env),
+        ('res_global_co2_limit' if objective == 'cost' else
+         'res_global_cost_limit', 'Constraint', 1,
+         T * balance_env if objective == 'cost' else 7)]
+
+    size = pd.DataFrame(components,
+                        columns=['Name', 'Type', 'Members', 'Nonzeros'])
+    size.set_index('Name', inplace=True)
+    if var_bounds:
+        size.drop(BOUND_CONSTRAINTS, inplace=True)
+    if substitute:
+        size.drop(SUBSTITUTED_CONSTRAINTS, inplace=True)
+        size.loc[SUBSTITUTED_VARIABLES, 'Type'] = 'Expression'
+        size.loc['e_pro_in', 'Members'] = T * len(pro_in)
+        size.loc['e_pro_out', 'Members'] = T * len(pro_out)
+
+    nonzeros = size['Nonzeros'].fillna(0)
+    size['Memory'] = (size['Members'] * size['Type'].map(MEMORY) +
+                      nonzeros * MEMORY['Nonzero']) / 1024.0 ** 2
+    return size
+
+
+def check_memory_budget(data, timesteps=None, dt=1, objective='cost',
+                        memory_budget=None, **kwargs):
+    """Estimate the model size and refuse models exceeding a memory budget.
+
+    Prints the estimated numbers of variables, constraints and nonzeros and
+    the estimated peak memory (c.f. estimate_model_size). If the latter
+    exceeds memory_budget, raises a RuntimeError that suggests a coarser
+    timestep length (c.f. resample_timesteps) or a number of site clusters
+    (c.f. cluster_sites) that would fit, assuming memory scales linearly
+    with the number of timesteps and sites.
+
+    Args:
+        data: input data dict, as passed to create_model
+        timesteps: list of timesteps, default: all timesteps of data
+        dt: timestep duration(s), as passed to create_model
+        objective: as passed to create_model
+        memory_budget: (optional) largest allowed peak memory (MB)
+        **kwargs: further keyword arguments of create_model (var_bounds,
+            substitute)
+
+    Returns:
+        the estimated peak memory (MB)
+    """
+    size = estimate_model_size(data, timesteps, dt, objective,
+                               var_bounds=kwargs.get('var_bounds', False),
+                               substitute=kwargs.get('substitute', False))
+    members = size.groupby('Type')['Members'].sum()
+    memory = BASE_MEMORY + size['Memory'].sum()
+    print("Estimated model size: {:d} variables, {:d} constraints, {:d} "
+          "nonzeros, {:.0f} MB peak memory."
+          .format(int(members.get('Var', 0)),
+                  int(members.get('Constraint', 0)),
+                  int(size['Nonzeros'].sum()), memory))
+
+    if memory_budget is not None and memory > memory_budget:
+        factor = (memory - BASE_MEMORY) / max(memory_budget - BASE_MEMORY, 1)
+        if isinstance(dt, (dict, pd.Series)):
+            dt = max(dict(dt).values())
+        raise RuntimeError(
+            "Estimated peak memory of {:.0f} MB exceeds the budget of {:.0f} "
+            "MB. Reduce the model, e.g. with resolution={:g} (c.f. "
+            "resample_timesteps) or site_clusters={:d} (c.f. cluster_sites)."
+            .format(memory, memory_budget, dt * math.ceil(factor),
+                    max(1, int(len(data['site']) / factor))))
+    return memory
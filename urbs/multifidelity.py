@@ -0,0 +1,160 @@
+import time
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from pyomo.opt.base import SolverFactory
+from .model import create_model
+from .pyomoio import get_entity
+from .runfunctions import setup_solver
+from .segmentation import coarsen_timesteps
+
+# capacity variables whose results bound the detailed run, with the input
+# DataFrame and its columns of installed capacity and capacity limits
+BOUNDS = [
+    ('cap_pro', 'process', 'inst-cap', 'cap-lo', 'cap-up'),
+    ('cap_tra', 'transmission', 'inst-cap', 'cap-lo', 'cap-up'),
+    ('cap_sto_c', 'storage', 'inst-cap-c', 'cap-lo-c', 'cap-up-c'),
+    ('cap_sto_p', 'storage', 'inst-cap-p', 'cap-lo-p', 'cap-up-p')]
+
+
+def tighten_bounds(data, prob, margin=0.1, zero_tol=1e-3):
+    """Restrict capacity limits of the input to a window around a result.
+
+    For processes, transmission lines and storages (capacity and power),
+    entities without new capacity in the result (at most zero_tol) are
+    fixed to their installed capacity. The capacity limits of all other
+    entities are narrowed to the result's capacity plus/minus margin
+    (relative), within their original limits. Entities missing in the
+    result keep their limits.
+
+    Args:
+        data: input data dict; it is not modified
+        prob: a solved urbs model instance (or result container) of the
+            same sites and entities, e.g. of coarse timesteps
+        margin: relative width of the capacity windows
+        zero_tol: new capacity below which an entity is fixed
+
+    Returns:
+        (bounded, counts) tuple of the input data dict with narrowed
+        capacity limits and a dict with the numbers of 'fixed' and
+        'windowed' entities
+    """
+    bounded = dict(data)
+    counts = {'fixed': 0, 'windowed': 0}
+    for name, key, inst, lo, up in BOUNDS:
+        df = bounded[key]
+        capacity = get_entity(prob, name)
+        if df.empty or capacity.empty:
+            continue
+        if bounded[key] is data[key]:
+            df = bounded[key] = df.copy()
+        capacity.index.names = df.index.names
+        capacity = capacity.reindex(df.index)
+
+        fixed = (capacity - df[inst] <= zero_tol).values
+        windowed = capacity.notnull().values & ~fixed
+        df[lo] = df[lo].astype(float)
+        df[up] = df[up].astype(float)
+        df.loc[fixed, up] = df.loc[fixed, inst]
+        df.loc[fixed, lo] = np.minimum(df.loc[fixed, lo],
+                                       df.loc[fixed, inst])
+        df.loc[windowed, lo] = np.maximum(
+            df.loc[windowed, lo], capacity[windowed] * (1 - margin))
+        df.loc[windowed, up] = np.minimum(
+            df.loc[windowed, up], capacity[windowed] * (1 + margin))
+
+        counts['fixed'] += int(fixed.sum())
+        counts['windowed'] += int(windowed.sum())
+
+    print("Fixed {fixed} and narrowed {windowed} capacities.".format(**counts))
+    return bounded, counts
+
+
+def _solve(data, dt, timesteps, objective, optim):
+    """ Create and solve a model; return it, its termination and time. """
+    t_start = time.time()
+    prob = create_model(data, dt, timesteps, objective)
+    result = optim.solve(prob, tee=False)
+    return (prob, str(result.solver.termination_condition),
+            time.time() - t_start)
+
+
+def multi_fidelity(data, solver, timesteps, dt=1, factor=4, margin=0.1,
+                   zero_tol=1e-3, objective='cost', compare=False,
+                   logfile='multifidelity.log'):
+    """Solve a model in two stages: coarse timesteps, then bounded detail.
+
+    First, the model is solved with each factor timesteps merged into one
+    (c.f. coarsen_timesteps). Its capacities then narrow the capacity
+    limits of the detailed model (c.f. tighten_bounds), which is smaller
+    and easier to solve. If the bounded detailed model cannot be solved to
+    optimality, it is solved again with the original limits.
+
+    With compare=True, the detailed model is additionally solved with the
+    original limits, to measure the error of the bounds on small instances.
+
+    Args:
+        data: input data dict, as returned by read_excel (and a scenario)
+        solver: solver name, e.g. 'glpk'
+        timesteps: a list of timesteps, e.g. range(0,8761)
+        dt: length of each time step (unit: hours)
+        factor: number of timesteps merged into one in the coarse run
+        margin: relative width of the capacity windows
+        zero_tol: new capacity below which an entity is fixed
+        objective: objective function, 'cost' or 'CO2'
+        compare: set True to also solve the unbounded detailed model
+        logfile: solver log file
+
+    Returns:
+        (prob, summary) tuple of the solved detailed model instance and a
+        Series with the objective values and solve times of the runs, the
+        numbers of fixed and windowed entities, whether the bounds had to
+        be dropped ('fallback') and, with compare=True, the relative
+        objective difference to the unbounded run ('gap')
+
+    Example:
+        >>> data = read_excel('mimo-example.xlsx')
+        >>> prob, summary = multi_fidelity(data, 'glpk', range(3500, 3669),
+        ...                                compare=True)  # doctest: +SKIP
+        >>> summary['gap']  # doctest: +SKIP
+    """
+    timesteps = list(timesteps)
+    optim = setup_solver(SolverFactory(solver), logfile=logfile)
+    summary = OrderedDict()
+
+    coarse_data, coarse_timesteps = coarsen_timesteps(data, timesteps, factor)
+    coarse, termination, summary['time coarse'] = _solve(
+        coarse_data, dt * factor, coarse_timesteps, objective, optim)
+    if termination != 'optimal':
+        raise RuntimeError("Coarse run terminated with condition '{}'."
+                           .format(termination))
+    summary['objective coarse'] = coarse.objective_function()
+
+    bounded, counts = tighten_bounds(data, coarse, margin, zero_tol)
+    summary['fixed'] = counts['fixed']
+    summary['windowed'] = counts['windowed']
+    prob, termination, summary['time detailed'] = _solve(
+        bounded, dt, timesteps, objective, optim)
+    summary['fallback'] = termination != 'optimal'
+    if summary['fallback']:
+        print("Bounded detailed run terminated with condition '{}', "
+              "solving without bounds.".format(termination))
+        prob, termination, time_unbounded = _solve(
+            data, dt, timesteps, objective, optim)
+        summary['time detailed'] += time_unbounded
+    if termination != 'optimal':
+        raise RuntimeError("Detailed run terminated with condition '{}'."
+                           .format(termination))
+    summary['objective'] = prob.objective_function()
+
+    if compare:
+        unbounded, termination, summary['time unbounded'] = _solve(
+            data, dt, timesteps, objective, optim)
+        if termination != 'optimal':
+            raise RuntimeError("Unbounded run terminated with condition "
+                               "'{}'.".format(termination))
+        summary['objective unbounded'] = unbounded.objective_function()
+        summary['gap'] = ((summary['objective'] -
+                           summary['objective unbounded']) /
+                          max(abs(summary['objective unbounded']), 1e-9))
+    return prob, pd.Series(summary)
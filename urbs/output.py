@@ -93,7 +93,9 @@ def get_timeseries(instance, com, sites, timesteps=None):
         # select relevant timesteps (=rows)
         # select commodity (xs), then the sites from remaining simple columns
         # and sum all together to form a Series
-        demand = (pd.DataFrame.from_dict(get_input(instance, 'demand_dict'))
+        # (the demand parameter store of the model is a view on this
+        # DataFrame, which is also available for loaded results)
+        demand = (get_input(instance, 'demand')
                   .loc[timesteps].xs(com, axis=1, level=1)[sites].sum(axis=1))
     except KeyError:
         demand = pd.Series(0, index=timesteps)
@@ -110,8 +112,8 @@ def get_timeseries(instance, com, sites, timesteps=None):
 
     # PROCESS
     created = get_entity(instance, 'e_pro_out')
-    created = created.xs(com, level='com').loc[timesteps]
     try:
+        created = created.xs(com, level='com').loc[timesteps]
         created = created.unstack(level='sit')[sites].fillna(0).sum(axis=1)
         created = created.unstack(level='pro')
         created = drop_all_zero_columns(created)
@@ -119,8 +121,8 @@ def get_timeseries(instance, com, sites, timesteps=None):
         created = pd.DataFrame(index=timesteps)
 
     consumed = get_entity(instance, 'e_pro_in')
-    consumed = consumed.xs(com, level='com').loc[timesteps]
     try:
+        consumed = consumed.xs(com, level='com').loc[timesteps]
         consumed = consumed.unstack(level='sit')[sites].fillna(0).sum(axis=1)
         consumed = consumed.unstack(level='pro')
         consumed = drop_all_zero_columns(consumed)
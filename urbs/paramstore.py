@@ -0,0 +1,95 @@
+import numpy as np
+
+
+class ParamStore(object):
+    """Array-backed, read-only parameter store for an input DataFrame.
+
+    Replaces the nested dict `df.to_dict()` with the same lookup syntax
+    ``store[column][row]``, but keeps the values in one NumPy array per
+    column instead of one boxed Python float per cell. Rows and columns are
+    coded to integer positions by dicts, so that every lookup is O(1). The
+    arrays are views on the DataFrame's data wherever its dtype allows, so
+    keeping the DataFrame (e.g. in the input data cache `m._data`) does not
+    double the memory.
+
+    Numeric columns are stored as float64 arrays, all other columns as
+    object arrays. Lookups return plain Python values, so that they can be
+    used as coefficients in Pyomo expressions.
+
+    Example:
+        >>> demand = ParamStore(data['demand'])
+        >>> demand[('Mid', 'Elec')][3500]  # doctest: +SKIP
+        34780.0
+    """
+
+    def __init__(self, df):
+        self._rows = dict((row, i) for i, row in enumerate(df.index))
+        self._columns = {}
+        for j, column in enumerate(df.columns):
+            values = df.iloc[:, j].values
+            if values.dtype.kind in 'biuf':
+                values = values.astype(np.float64, copy=False)
+            self._columns[column] = ParamColumn(values, self._rows)
+
+    def __getitem__(self, column):
+        return self._columns[column]
+
+    def __contains__(self, column):
+        return column in self._columns
+
+    def __iter__(self):
+        return iter(self._columns)
+
+    def __len__(self):
+        return len(self._columns)
+
+    def keys(self):
+        return self._columns.keys()
+
+    def value(self, column, row):
+        """ Return value of given column and row. """
+        return self._columns[column][row]
+
+
+class ParamColumn(object):
+    """Column of a ParamStore, mapping row labels to values.
+
+    Supports the read-only dict interface used in the model rules:
+    ``column[row]``, ``row in column``, ``column.keys()``, ``column.items()``
+    and ``column.get(row, default)``.
+    """
+
+    __slots__ = ('_values', '_rows')
+
+    def __init__(self, values, rows):
+        self._values = values
+        self._rows = rows
+
+    def __getitem__(self, row):
+        value = self._values[self._rows[row]]
+        # convert NumPy scalars to Python numbers
+        return value.item() if isinstance(value, np.generic) else value
+
+    def __contains__(self, row):
+        return row in self._rows
+
+    def __iter__(self):
+        return iter(self._rows)
+
+    def __len__(self):
+        return len(self._rows)
+
+    def keys(self):
+        return self._rows.keys()
+
+    def values(self):
+        return [self[row] for row in self._rows]
+
+    def items(self):
+        return [(row, self[row]) for row in self._rows]
+
+    def get(self, row, default=None):
+        try:
+            return self[row]
+        except KeyError:
+            return default
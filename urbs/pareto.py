@@ -0,0 +1,188 @@
+import math
+import numpy as np
+import pandas as pd
+import pyomo.core as pyomo
+from pyomo.opt.base import SolverFactory
+from .model import create_model, co2_rule
+from .pyomoio import get_entity
+from .runfunctions import setup_solver
+
+# capacity variables reported per sweep point
+CAPACITIES = ['cap_pro', 'cap_tra', 'cap_sto_c', 'cap_sto_p']
+
+
+def add_co2_sweep(prob):
+    """Prepare a cost-minimising model for a CO2 limit sweep.
+
+    Deactivates the constraint res_global_co2_limit (if present) and adds
+    the mutable parameter co2_limit, the constraint res_co2_sweep (total
+    annual CO2 <= co2_limit) and the inactive objective co2_objective
+    (minimise total annual CO2). The model is then solved repeatedly with
+    different values of co2_limit instead of being rebuilt.
+
+    Args:
+        prob: a urbs model instance created with objective='cost'
+
+    Returns:
+        Nothing
+    """
+    if prob.obj.value != 'cost':
+        raise ValueError("CO2 limit sweeps require a model created with "
+                         "objective='cost'!")
+    if hasattr(prob, 'res_global_co2_limit'):
+        prob.res_global_co2_limit.deactivate()
+
+    prob.co2_limit = pyomo.Param(
+        initialize=float('inf'), mutable=True,
+        doc='CO2 limit of the current sweep point (t/a)')
+    prob.res_co2_sweep = pyomo.Constraint(
+        expr=co2_rule(prob) <= prob.co2_limit,
+        doc='total co2 commodity output <= CO2 limit of sweep point')
+    prob.res_co2_sweep.deactivate()
+    prob.co2_objective = pyomo.Objective(
+        rule=co2_rule,
+        sense=pyomo.minimize,
+        doc='minimize total CO2 emissions')
+    prob.co2_objective.deactivate()
+
+
+def solve_point(prob, optim, co2_limit, warmstart=False):
+    """Solve the model for one CO2 limit and return the point's results.
+
+    Args:
+        prob: a urbs model instance prepared by add_co2_sweep
+        optim: a solver object (c.f. urbs.setup_solver)
+        co2_limit: CO2 limit (t/a); inf to leave CO2 unconstrained
+        warmstart: pass the current variable values as start solution
+
+    Returns:
+        a Series with entries ('CO2 limit', ''), ('termination', ''),
+        ('objective', ''), ('CO2', ''), ('costs', cost type) and
+        (capacity, entity index) for each capacity variable
+    """
+    if math.isinf(co2_limit):
+        prob.co2_limit = float('inf')
+        prob.res_co2_sweep.deactivate()
+    else:
+        prob.co2_limit = co2_limit
+        prob.res_co2_sweep.activate()
+
+    if warmstart:
+        result = optim.solve(prob, warmstart=True)
+    else:
+        result = optim.solve(prob)
+    termination = str(result.solver.termination_condition)
+
+    point = pd.Series(np.nan, dtype=object, index=pd.MultiIndex.from_tuples(
+        [('CO2 limit', ''), ('termination', ''),
+         ('objective', ''), ('CO2', '')], names=['entity', 'index']))
+    point['CO2 limit', ''] = co2_limit
+    point['termination', ''] = termination
+    if termination != 'optimal':
+        return point
+
+    point['objective', ''] = pyomo.value(prob.objective_function)
+    point['CO2', ''] = pyomo.value(co2_rule(prob))
+    values = [point]
+    values.append(pd.concat([get_entity(prob, 'costs')], keys=['costs']))
+    for name in CAPACITIES:
+        entity = get_entity(prob, name)
+        if entity.empty:
+            continue
+        entity.index = ['.'.join(map(str, idx)) for idx in entity.index]
+        values.append(pd.concat([entity], keys=[name]))
+    return pd.concat(values)
+
+
+def co2_pareto_sweep(data, solver, timesteps, dt=1, limits=None, points=20,
+                     refine=0, tolerance=0.05, max_points=100,
+                     logfile='pareto.log'):
+    """Trace the cost vs. CO2 trade-off curve with the epsilon constraint.
+
+    The model is built only once. It is solved for each CO2 limit, from the
+    loosest to the tightest, each time starting from the previous solution
+    if the solver supports warm starts. With refine > 0, the curve is
+    refined adaptively: for each pair of neighbouring points whose
+    objective values differ by more than tolerance (relative to the larger
+    one), the midpoint is added, up to max_points points in total.
+
+    Args:
+        data: input data dict, as returned by read_excel (and a scenario)
+        solver: solver name, e.g. 'glpk'
+        timesteps: a list of timesteps, e.g. range(0,8761)
+        dt: length of each time step (unit: hours)
+        limits: (optional) list of CO2 limits (t/a); default: points limits
+            evenly spaced between the minimal CO2 output and the CO2 output
+            of the unconstrained cost optimum
+        points: number of points of the default limits
+        refine: number of adaptive refinement rounds
+        tolerance: relative objective difference that triggers refinement
+        max_points: maximum number of points
+        logfile: solver log file
+
+    Returns:
+        a DataFrame with one row per point, sorted by CO2 limit (descending),
+        and two-level columns ('CO2 limit', 'termination', 'objective',
+        'CO2', 'costs' by cost type and capacities by entity index)
+
+    Example:
+        >>> data = read_excel('mimo-example.xlsx')
+        >>> curve = co2_pareto_sweep(data, 'glpk', range(3500, 3669),
+        ...                          points=50)  # doctest: +SKIP
+        >>> curve[['CO2', 'objective']].plot()  # doctest: +SKIP
+    """
+    prob = create_model(data, dt, timesteps, objective='cost')
+    add_co2_sweep(prob)
+    optim = setup_solver(SolverFactory(solver), logfile=logfile)
+    warmstart = optim.warm_start_capable()
+
+    results = {}
+    if limits is None:
+        # range of sensible CO2 limits: from unconstrained cost optimum...
+        results[float('inf')] = solve_point(prob, optim, float('inf'))
+        termination = results[float('inf')]['termination', '']
+        if termination != 'optimal':
+            raise RuntimeError("Solver terminated with condition '{}' "
+                               "without CO2 limit.".format(termination))
+        co2_max = results[float('inf')]['CO2', '']
+
+        # ...down to minimal CO2 output
+        prob.objective_function.deactivate()
+        prob.co2_objective.activate()
+        prob.res_co2_sweep.deactivate()
+        result = optim.solve(prob)
+        termination = str(result.solver.termination_condition)
+        if termination != 'optimal':
+            raise RuntimeError("Solver terminated with condition '{}' "
+                               "minimising CO2.".format(termination))
+        co2_min = pyomo.value(prob.co2_objective)
+        prob.co2_objective.deactivate()
+        prob.objective_function.activate()
+
+        limits = np.linspace(co2_max, co2_min, points)
+
+    for limit in sorted(limits, reverse=True):
+        results[limit] = solve_point(prob, optim, limit, warmstart)
+
+    for _ in range(refine):
+        finite = sorted((limit for limit in results
+                         if not math.isinf(limit) and
+                         results[limit]['termination', ''] == 'optimal'),
+                        reverse=True)
+        midpoints = []
+        for upper, lower in zip(finite[:-1], finite[1:]):
+            cost_upper = results[upper]['objective', '']
+            cost_lower = results[lower]['objective', '']
+            scale = max(abs(cost_upper), abs(cost_lower))
+            if scale > 0 and abs(cost_lower - cost_upper) > tolerance * scale:
+                midpoints.append((upper + lower) / 2.0)
+        midpoints = midpoints[:max(0, max_points - len(results))]
+        if not midpoints:
+            break
+        for limit in midpoints:
+            results[limit] = solve_point(prob, optim, limit, warmstart)
+
+    table = pd.DataFrame([results[limit] for limit in
+                          sorted(results, reverse=True)])
+    table.index = range(len(table))
+    return table
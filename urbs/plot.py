@@ -91,8 +91,17 @@ def plot(prob, com, sit, dt, timesteps, timesteps_plot,
         timesteps = sorted(get_entity(prob, 'tm').index)
 
     # convert timesteps to hour series for the plots
-    hoursteps = timesteps * dt[0]
-    hoursteps_plot = timesteps_plot * dt[0]
+    if len(dt) > 1:
+        # timesteps of different durations (c.f. segment_timesteps) are
+        # placed at the hour they end, counted from the first timestep
+        clock = dt.sort_index().cumsum() - dt.sort_index().iloc[0]
+        hoursteps = clock.loc[timesteps].values
+        hoursteps_plot = clock.loc[timesteps_plot].values
+        step = dt.loc[timesteps].values
+    else:
+        hoursteps = timesteps * dt[0]
+        hoursteps_plot = timesteps_plot * dt[0]
+        step = np.repeat(dt[0], len(timesteps))
 
     if is_string(sit):
         # wrap single site in 1-element list for consistent behaviour
@@ -164,7 +173,7 @@ def plot(prob, com, sit, dt, timesteps, timesteps_plot,
 
     # stack plot for consumed commodities (divided by dt for power)
     sp00 = ax0.stackplot(hoursteps[1:],
-                         -consumed.values.T/dt[0],
+                         -consumed.values.T/step[1:],
                          labels=tuple(consumed.columns),
                          linewidth=0.15)
     # color
@@ -178,7 +187,7 @@ def plot(prob, com, sit, dt, timesteps, timesteps_plot,
 
     # stack plot for created commodities (divided by dt for power)
     sp0 = ax0.stackplot(hoursteps[1:],
-                        created.values.T/dt[0],
+                        created.values.T/step[1:],
                         labels=tuple(created.columns),
                         linewidth=0.15)
 
@@ -225,11 +234,11 @@ def plot(prob, com, sit, dt, timesteps, timesteps_plot,
     # PLOT DEMAND
 
     # line plot for demand (unshifted) commodities (divided by dt for power)
-    ax0.plot(hoursteps, original.values/dt[0], linewidth=0.8,
+    ax0.plot(hoursteps, original.values/step, linewidth=0.8,
              color=to_color('Unshifted'))
 
     # line plot for demand (shifted) commodities (divided by dt for power)
-    ax0.plot(hoursteps[1:], demand.values/dt[0], linewidth=1.0,
+    ax0.plot(hoursteps[1:], demand.values/step[1:], linewidth=1.0,
              color=to_color('Shifted'))
 
     # PLOT STORAGE
@@ -262,7 +271,7 @@ def plot(prob, com, sit, dt, timesteps, timesteps_plot,
 
         # bar plot for DSM up-/downshift power (bar width depending on dt)
         ax2.bar(hoursteps,
-                deltademand.values/dt[0], width=0.8 * dt[0],
+                deltademand.values/step, width=0.8 * step,
                 color=to_color('Delta'),
                 edgecolor='none')
 
@@ -271,16 +280,17 @@ def plot(prob, com, sit, dt, timesteps, timesteps_plot,
         ax2.set_ylabel('{} ({})'.format(power_name, power_unit))
 
     # make xtick distance duration-dependent
-    if len(timesteps_plot) > 26 * 168 / dt[0]:    # time horizon > half a year
-        steps_between_ticks = int(168 * 4 / dt[0])  # tick every four weeks
-    elif len(timesteps_plot) > 3 * 168 / dt[0]:   # time horizon > three weeks
-        steps_between_ticks = int(168 / dt[0])      # tick every week
-    elif len(timesteps_plot) > 2 * 24 / dt[0]:    # time horizon > two days
-        steps_between_ticks = int(24 / dt[0])       # tick every day
-    elif len(timesteps_plot) > 24 / dt[0]:        # time horizon > a day
-        steps_between_ticks = int(6 / dt[0])        # tick every six hours
-    else:                                         # time horizon <= a day
-        steps_between_ticks = int(3 / dt[0])        # tick every three hours
+    dt_mean = step.mean()
+    if len(timesteps_plot) > 26 * 168 / dt_mean:   # time horizon > half a year
+        steps_between_ticks = int(168 * 4 / dt_mean)  # tick every four weeks
+    elif len(timesteps_plot) > 3 * 168 / dt_mean:  # time horizon > three weeks
+        steps_between_ticks = int(168 / dt_mean)      # tick every week
+    elif len(timesteps_plot) > 2 * 24 / dt_mean:   # time horizon > two days
+        steps_between_ticks = int(24 / dt_mean)       # tick every day
+    elif len(timesteps_plot) > 24 / dt_mean:       # time horizon > a day
+        steps_between_ticks = int(6 / dt_mean)        # tick every six hours
+    else:                                          # time horizon <= a day
+        steps_between_ticks = int(3 / dt_mean)        # tick every three hours
 
     hoursteps_plot_ = hoursteps_plot[(steps_between_ticks-1):]
     hoursteps_plot_ = hoursteps_plot_[::steps_between_ticks]  # take whole h's
@@ -331,6 +341,9 @@ def result_figures(prob, figure_basename, timesteps, plot_title_prefix=None,
         extensions: (optional) list of file extensions for plot images
                     default: png, pdf
         **kwds: (optional) keyword arguments are forwarded to urbs.plot()
+
+    Returns:
+        list of the filenames of the written figures
     """
     # retrieve parameter 'dt' from the model
     dt = get_entity(prob, 'dt')
@@ -348,6 +361,7 @@ def result_figures(prob, figure_basename, timesteps, plot_title_prefix=None,
         extensions = ['png', 'pdf']
 
     # create timeseries plot for each demand (site, commodity) timeseries
+    filenames = []
     for sit, com in plot_tuples:
         # wrap single site name in 1-element list for consistent behaviour
         if is_string(sit):
@@ -381,7 +395,9 @@ def result_figures(prob, figure_basename, timesteps, plot_title_prefix=None,
                     figure_basename, com, ''.join(
                         plot_sites_name[sit]), period, ext)
                 fig.savefig(fig_filename, bbox_inches='tight')
+                filenames.append(fig_filename)
             plt.close(fig)
+    return filenames
 
 
 def to_color(obj=None):
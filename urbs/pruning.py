@@ -0,0 +1,219 @@
+import pandas as pd
+from .saveload import create_result_cache
+
+# commodity types that can provide a commodity or take it up at a site
+SOURCE_TYPES = ('Stock', 'SupIm', 'Buy')
+SINK_TYPES = ('Demand', 'Sell', 'Env')
+
+
+def prune_inactive(data):
+    """Remove provably inactive entities from an input data dict.
+
+    Processes, storages and transmission lines that cannot have any capacity
+    (inst-cap == cap-up == 0) are removed. Processes without installed
+    capacity or lower capacity bound are also removed if one of their input
+    commodities has no source or one of their (non-environmental) output
+    commodities has no sink at their site, as they could only operate at
+    zero throughput. This check is repeated until no more processes are
+    removed. Finally, Stock, SupIm, Buy and Sell commodities that are no
+    longer used by any entity at their site are removed.
+
+    Processes using Buy or Sell commodities are never removed by the source
+    and sink check, as their capacities are coupled by the sell/buy symmetry
+    constraint. Transmission lines are only removed together with their
+    reverse direction.
+
+    Args:
+        data: input data dict, as returned by read_excel or a scenario
+            function; it is not modified
+
+    Returns:
+        (pruned, dropped) tuple of the pruned input data dict and a dict
+        with keys 'process', 'transmission', 'storage' and 'commodity' that
+        lists the removed index tuples of each DataFrame
+    """
+    pruned = dict(data)
+    process = data['process']
+    transmission = data['transmission']
+    storage = data['storage']
+    commodity = data['commodity']
+
+    # capacity limits
+    pro_drop = (process['inst-cap'] == 0) & (process['cap-up'] == 0)
+
+    if storage.empty:
+        sto_drop = pd.Series(False, index=storage.index)
+    else:
+        no_c = (storage['inst-cap-c'] == 0) & (storage['cap-up-c'] == 0)
+        no_p = (storage['inst-cap-p'] == 0) & (storage['cap-up-p'] == 0)
+        free_c = (storage['inst-cap-c'] == 0) & (storage['cap-lo-c'] == 0)
+        free_p = (storage['inst-cap-p'] == 0) & (storage['cap-lo-p'] == 0)
+        sto_drop = (no_c & free_p) | (no_p & free_c)
+
+    tra_drop = pd.Series(False, index=transmission.index)
+    if not transmission.empty:
+        no_cap = ((transmission['inst-cap'] == 0) &
+                  (transmission['cap-up'] == 0))
+        free = ((transmission['inst-cap'] == 0) &
+                (transmission['cap-lo'] == 0))
+        for (sin, sout, tra, com) in transmission.index[no_cap.values]:
+            pair = [(sin, sout, tra, com), (sout, sin, tra, com)]
+            pair = [line for line in pair if line in transmission.index]
+            if all(free[line] for line in pair):
+                tra_drop.loc[pair] = True
+
+    # commodities without source or sink
+    pro_com = data['process_commodity']
+    pro_com = pro_com[pro_com['ratio'] > 0]
+    inputs = _commodities_by_process(pro_com, 'In')
+    outputs = _commodities_by_process(pro_com, 'Out')
+
+    com_types = {}
+    for (sit, com, com_type) in commodity.index:
+        com_types.setdefault((sit, com), set()).add(com_type)
+    buy_sell = set(com for (sit, com, com_type) in commodity.index
+                   if com_type in ('Buy', 'Sell'))
+    env = set(com for (sit, com, com_type) in commodity.index
+              if com_type == 'Env')
+
+    removable = ((process['inst-cap'] == 0) & (process['cap-lo'] == 0))
+    for (sit, pro) in process.index:
+        if (inputs.get(pro, set()) | outputs.get(pro, set())) & buy_sell:
+            removable.loc[(sit, pro)] = False
+
+    while True:
+        sources = set(
+            key for key, types in com_types.items()
+            if types & set(SOURCE_TYPES))
+        sinks = set(
+            key for key, types in com_types.items()
+            if types & set(SINK_TYPES))
+        for (sit, pro) in process.index[~pro_drop.values]:
+            sources.update((sit, com) for com in outputs.get(pro, ()))
+            sinks.update((sit, com) for com in inputs.get(pro, ()))
+        for (sin, sout, tra, com) in transmission.index[~tra_drop.values]:
+            sources.add((sout, com))
+            sinks.add((sin, com))
+        # storage losses can take up surplus of a commodity
+        for (sit, sto, com) in storage.index[~sto_drop.values]:
+            sinks.add((sit, com))
+
+        candidates = process.index[(~pro_drop & removable).values]
+        inactive = [
+            (sit, pro) for (sit, pro) in candidates
+            if any((sit, com) not in sources
+                   for com in inputs.get(pro, ())) or
+            any((sit, com) not in sinks
+                for com in outputs.get(pro, ()) if com not in env)]
+        if not inactive:
+            break
+        pro_drop.loc[inactive] = True
+
+    # commodities that are no longer used at their site
+    used = set()
+    for (sit, pro) in process.index[~pro_drop.values]:
+        used.update((sit, com) for com in inputs.get(pro, ()))
+        used.update((sit, com) for com in outputs.get(pro, ()))
+    for (sin, sout, tra, com) in transmission.index[~tra_drop.values]:
+        used.update([(sin, com), (sout, com)])
+    for (sit, sto, com) in storage.index[~sto_drop.values]:
+        used.add((sit, com))
+    com_drop = pd.Series(
+        [com_type in SOURCE_TYPES + ('Sell', ) and (sit, com) not in used
+         for (sit, com, com_type) in commodity.index],
+        index=commodity.index)
+    # keep at least one commodity per site, as sites are derived from them
+    for sit in commodity.index.get_level_values('Site').unique():
+        at_site = commodity.index.get_level_values('Site') == sit
+        if com_drop[at_site].all():
+            com_drop[at_site] = False
+
+    pruned['process'] = process[~pro_drop]
+    pruned['transmission'] = transmission[~tra_drop]
+    pruned['storage'] = storage[~sto_drop]
+    pruned['commodity'] = commodity[~com_drop]
+
+    # time variable efficiencies of removed processes
+    eff_factor = data['eff_factor']
+    if not eff_factor.empty:
+        dropped_pro = set(process.index[pro_drop.values])
+        pruned['eff_factor'] = eff_factor[
+            [col for col in eff_factor.columns
+             if tuple(col) not in dropped_pro]]
+
+    dropped = {
+        'process': process.index[pro_drop.values].tolist(),
+        'transmission': transmission.index[tra_drop.values].tolist(),
+        'storage': storage.index[sto_drop.values].tolist(),
+        'commodity': commodity.index[com_drop.values].tolist()}
+
+    print("Pruned {} processes, {} transmissions, {} storages and {} "
+          "commodities.".format(*[len(dropped[key]) for key in
+                                  ['process', 'transmission', 'storage',
+                                   'commodity']]))
+    return pruned, dropped
+
+
+def _commodities_by_process(pro_com, direction):
+    """ Return dict of process name to set of its input/output commodities. """
+    commodities = {}
+    for (pro, com, drc) in pro_com.index:
+        if drc == direction:
+            commodities.setdefault(pro, set()).add(com)
+    return commodities
+
+
+def dropped_to_frame(dropped):
+    """Convert the dropped entities of prune_inactive to one DataFrame.
+
+    Args:
+        dropped: dict of removed index tuples, as returned by prune_inactive
+
+    Returns:
+        a DataFrame with columns 'Entity' (input DataFrame name) and 'Index'
+    """
+    return pd.DataFrame(
+        [(key, index) for key in sorted(dropped) for index in dropped[key]],
+        columns=['Entity', 'Index'])
+
+
+def restore_pruned(prob, data, dropped):
+    """Re-insert entities removed by prune_inactive into the result cache.
+
+    Adds zero capacities for all removed processes, transmissions and
+    storages to the result cache (which is created, if not present yet) and
+    replaces the input data cache with the unpruned input, so that reports
+    list all entities. Removed entities never have time series values other
+    than zero, which reporting omits anyway.
+
+    Args:
+        prob: a solved urbs model instance created from pruned input data
+        data: the input data dict before pruning
+        dropped: dict of removed index tuples, as returned by prune_inactive
+
+    Returns:
+        Nothing
+    """
+    if not hasattr(prob, '_result'):
+        prob._result = create_result_cache(prob)
+
+    capacities = [
+        ('process', ['cap_pro', 'cap_pro_new'], ['sit', 'pro']),
+        ('transmission', ['cap_tra', 'cap_tra_new'],
+         ['sit', 'sit_', 'tra', 'com']),
+        ('storage', ['cap_sto_c', 'cap_sto_c_new', 'cap_sto_p',
+                     'cap_sto_p_new'], ['sit', 'sto', 'com'])]
+
+    for key, names, labels in capacities:
+        if not dropped[key]:
+            continue
+        for name in names:
+            cached = prob._result.get(name, pd.Series(name=name))
+            if not cached.empty:
+                labels = cached.index.names
+            zeros = pd.Series(
+                0.0, name=name,
+                index=pd.MultiIndex.from_tuples(dropped[key], names=labels))
+            prob._result[name] = pd.concat([cached, zeros]).sort_index()
+
+    prob._data = data
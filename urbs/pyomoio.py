@@ -7,11 +7,12 @@ def get_entity(instance, name):
 
     Args:
         instance: a Pyomo ConcreteModel instance
-        name: name of a Set, Param, Var, Constraint or Objective
+        name: name of a Set, Param, Var, Expression, Constraint or Objective
 
     Returns:
         a Pandas Series with domain as index and values (or 1's, for sets) of
-        entity name. For constraints, it retrieves the dual values
+        entity name. For constraints, it retrieves the dual values; for
+        expressions, their values evaluated from the variable values
     """
     # magic: short-circuit if problem contains a result cache
     if hasattr(instance, '_result') and name in instance._result:
@@ -64,6 +65,23 @@ def get_entity(instance, name):
                 [(v[0], instance.dual[v[1]]) for v in entity.iteritems()])
             labels = ['None']
 
+    elif isinstance(entity, pyomo.Expression):
+        # evaluate expressions, e.g. variables substituted by their
+        # definition (cf. create_model argument substitute)
+        if entity.dim() > 1:
+            results = pd.DataFrame(
+                [v[0] + (pyomo.value(v[1], exception=False),)
+                 for v in entity.iteritems()])
+        elif entity.dim() == 1:
+            results = pd.DataFrame(
+                [(v[0], pyomo.value(v[1], exception=False))
+                 for v in entity.iteritems()])
+        else:
+            results = pd.DataFrame(
+                [(v[0], pyomo.value(v[1], exception=False))
+                 for v in entity.iteritems()])
+            labels = ['None']
+
     else:
         # create DataFrame
         if entity.dim() > 1:
@@ -136,7 +154,7 @@ def list_entities(instance, entity_type):
 
     Args:
         instance: a Pyomo ConcreteModel object
-        entity_type: "set", "par", "var", "con" or "obj"
+        entity_type: "set", "par", "var", "expr", "con" or "obj"
 
     Returns:
         DataFrame of entities
@@ -159,6 +177,8 @@ def list_entities(instance, entity_type):
             return isinstance(entity, pyomo.Param)
         elif entity_type == 'var':
             return isinstance(entity, pyomo.Var)
+        elif entity_type == 'expr':
+            return isinstance(entity, pyomo.Expression)
         elif entity_type == 'con':
             return isinstance(entity, pyomo.Constraint)
         elif entity_type == 'obj':
@@ -193,8 +213,8 @@ def _get_onset_names(entity):
     """ Return a list of domain set names for a given model entity
 
     Args:
-        entity: a member entity (i.e. a Set, Param, Var, Objective, Constraint)
-                of a Pyomo ConcreteModel object
+        entity: a member entity (i.e. a Set, Param, Var, Expression,
+                Objective, Constraint) of a Pyomo ConcreteModel object
 
     Returns:
         list of domain set names for that entity
@@ -244,8 +264,8 @@ def _get_onset_names(entity):
             # no domain, so no labels needed
             pass
 
-    elif isinstance(entity, (pyomo.Param, pyomo.Var, pyomo.Constraint,
-                             pyomo.Objective)):
+    elif isinstance(entity, (pyomo.Param, pyomo.Var, pyomo.Expression,
+                             pyomo.Constraint, pyomo.Objective)):
         if entity.dim() > 0 and entity._index:
             labels = _get_onset_names(entity._index)
         else:
@@ -1,6 +1,13 @@
+import json
+import multiprocessing
 import os
+import pandas as pd
 import pyomo.environ
+import shutil
+import signal
 import time
+import traceback
+from collections import OrderedDict
 from pyomo.opt.base import SolverFactory
 from datetime import datetime
 from .model import *
@@ -9,10 +16,74 @@ from .plot import *
 from .input import *
 from .validation import *
 from .saveload import *
+from .buildcache import load_or_create_model, model_key
+from .buildstats import get_build_stats
+from .metrics import *
+from .modelsize import check_memory_budget
+from .pruning import *
+from .scaling import coefficient_ranges, scale_model, unscale_solution
+from .segmentation import resample_periods, resample_timesteps
+from .solverlog import parse_solver_log
+from .spatial import *
+from .util import replace_file
 
+# named solver configurations for solve_race: (solver name, solver options)
+RACE_CONFIGS = OrderedDict([
+    ('glpk-simplex', ('glpk', {})),
+    ('glpk-interior', ('glpk', {'interior': None})),
+    ('highs-simplex', ('highs', {'solver': 'simplex'})),
+    ('highs-ipm', ('highs', {'solver': 'ipm'})),
+    ('gurobi-dual', ('gurobi', {'method': 1})),
+    ('gurobi-barrier', ('gurobi', {'method': 2})),
+    ('cplex-dual', ('cplex', {'lpmethod': 2})),
+    ('cplex-barrier', ('cplex', {'lpmethod': 4}))])
+
+# solver option names of the solver independent settings of SOLVER_PROFILES
+GENERIC_OPTIONS = {
+    'threads': {'cbc': 'threads', 'cplex': 'threads', 'gurobi': 'threads',
+                'highs': 'threads'},
+    'time_limit': {'cbc': 'sec', 'cplex': 'timelimit', 'glpk': 'tmlim',
+                   'gurobi': 'timelimit', 'highs': 'time_limit'}}
+
+# named solver option profiles: solver independent settings (c.f.
+# GENERIC_OPTIONS) and a dict of options per solver name
+SOLVER_PROFILES = OrderedDict([
+    ('default', {}),
+    ('fast-screening', {
+        'time_limit': 3600,
+        'cbc': {'primalT': 1e-5, 'dualT': 1e-5},
+        'highs': {'solver': 'ipm', 'run_crossover': 'off',
+                  'ipm_optimality_tolerance': 1e-5},
+        'gurobi': {'method': 2, 'crossover': 0, 'barconvtol': 1e-5}}),
+    ('exact', {
+        'glpk': {'exact': None},
+        'cbc': {'primalT': 1e-9, 'dualT': 1e-9},
+        'highs': {'solver': 'simplex', 'primal_feasibility_tolerance': 1e-9,
+                  'dual_feasibility_tolerance': 1e-9},
+        'gurobi': {'method': 1, 'feasibilitytol': 1e-9,
+                   'optimalitytol': 1e-9, 'numericfocus': 3}}),
+    ('large-barrier-no-crossover', {
+        'glpk': {'interior': None},
+        'cbc': {'presolve': 'more'},
+        'highs': {'solver': 'ipm', 'run_crossover': 'off'},
+        'gurobi': {'method': 2, 'crossover': 0}})])
+
+
+def prepare_result_directory(result_name, resume=False):
+    """ create a time stamped directory within the result folder
+
+    If resume is True, the most recent existing result directory of
+    result_name is returned instead, if there is one.
+    """
+    if resume:
+        previous = sorted(
+            d for d in os.listdir('result')
+            if d.startswith(result_name + '-') and
+            os.path.isdir(os.path.join('result', d))
+        ) if os.path.isdir('result') else []
+        if previous:
+            return os.path.join('result', previous[-1])
 
-def prepare_result_directory(result_name):
-    """ create a time stamped directory within the result folder """
     # timestamp for result directory
     now = datetime.now().strftime('%Y%m%dT%H%M')
 
@@ -24,30 +95,223 @@ def prepare_result_directory(result_name):
     return result_dir
 
 
-def setup_solver(optim, logfile='solver.log'):
-    """ """
+def solver_options(solver, profile=None, threads=None):
+    """Return the options of a solver profile for one solver.
+
+    Args:
+        solver: solver name, e.g. 'glpk', 'cbc', 'highs' or 'gurobi'
+        profile: (optional) name of an entry of SOLVER_PROFILES or a dict
+            of the same structure
+        threads: (optional) number of solver threads, overrides that of the
+            profile; ignored by single-threaded solvers (glpk)
+
+    Returns:
+        dict of solver option names and values (None for flags)
+    """
+    if profile is None:
+        profile = {}
+    elif not isinstance(profile, dict):
+        if profile not in SOLVER_PROFILES:
+            raise ValueError("Unknown solver profile '{}'! Choose one of: {}"
+                             .format(profile, ', '.join(SOLVER_PROFILES)))
+        profile = SOLVER_PROFILES[profile]
+    solver = solver.replace('appsi_', '')
+
+    options = {}
+    settings = dict(profile, threads=threads or profile.get('threads'))
+    for setting, names in GENERIC_OPTIONS.items():
+        if settings.get(setting) is not None and solver in names:
+            options[names[solver]] = settings[setting]
+    options.update(profile.get(solver, {}))
+    return options
+
+
+def setup_solver(optim, logfile='solver.log', options=None, profile=None,
+                 threads=None):
+    """ set log file and default options of a solver; the options of a
+    solver profile (c.f. solver_options) and options (a dict of solver
+    option names and values, None for flags) are set on top """
     if optim.name == 'gurobi':
         # reference with list of option names
         # http://www.gurobi.com/documentation/5.6/reference-manual/parameters
         optim.set_options("logfile={}".format(logfile))
-        # optim.set_options("timelimit=7200")  # seconds
-        # optim.set_options("mipgap=5e-4")  # default = 1e-4
     elif optim.name == 'glpk':
         # reference with list of options
         # execute 'glpsol --help'
         optim.set_options("log={}".format(logfile))
-        # optim.set_options("tmlim=7200")  # seconds
-        # optim.set_options("mipgap=.0005")
+    elif optim.name.replace('appsi_', '') == 'highs':
+        # reference with list of options
+        # https://ergo-code.github.io/HiGHS/stable/options/definitions/
+        optim.options['log_file'] = logfile
     else:
-        print("Warning from setup_solver: no options set for solver "
+        print("Warning from setup_solver: no log file set for solver "
               "'{}'!".format(optim.name))
+    if profile is not None or threads:
+        options = dict(solver_options(optim.name, profile, threads),
+                       **(options or {}))
+    if options:
+        for key, value in options.items():
+            optim.options[key] = value
     return optim
 
 
+def solve_logged(optim, prob, logfile, tee=False):
+    """ solve prob with a solver set up by setup_solver; the output of
+    solvers without log file option in setup_solver is written to logfile
+    by Pyomo, so that parse_solver_log can read the log of every solver """
+    if optim.name.replace('appsi_', '') in ('glpk', 'gurobi', 'highs'):
+        return optim.solve(prob, tee=tee)
+    return optim.solve(prob, tee=tee, logfile=logfile)
+
+
+def _race_worker(conn, prob, solver, options, logfile, profile, threads):
+    """Worker process solving the model with one solver configuration.
+
+    Sends a tuple (termination, result) to conn, the result with the
+    solution stored by name (c.f. solve_race) if it is optimal, else None.
+    """
+    if hasattr(os, 'setsid'):
+        # own process group, so that the solver is terminated along with it
+        os.setsid()
+    try:
+        optim = setup_solver(SolverFactory(solver), logfile=logfile,
+                             options=options, profile=profile,
+                             threads=threads)
+        result = solve_logged(optim, prob, logfile)
+        termination = str(result.solver.termination_condition)
+        if termination == 'optimal':
+            prob.solutions.store_to(result)
+        else:
+            result = None
+        conn.send((termination, result))
+    except Exception as error:
+        conn.send(('error: {}: {}'.format(type(error).__name__, error),
+                   None))
+    conn.close()
+
+
+def _terminate(process, timeout=10):
+    """ Terminate a worker process and the solver it started, waiting at
+    most timeout seconds per attempt; kill both if they do not end """
+    for sig in (signal.SIGTERM, getattr(signal, 'SIGKILL', None)):
+        if sig is None:
+            break
+        try:
+            if hasattr(os, 'killpg'):
+                os.killpg(process.pid, sig)
+            else:
+                process.terminate()
+        except OSError:
+            # no process group (yet), as the worker has not called setsid
+            # before, or it has ended meanwhile
+            try:
+                os.kill(process.pid, sig)
+            except OSError:
+                pass
+        process.join(timeout)
+        if not process.is_alive():
+            break
+
+
+def solve_race(prob, configs, log_basename='race', timeout=None,
+               profile=None):
+    """Solve a model with several solver configurations in parallel.
+
+    Each configuration solves its own copy of the model in a separate
+    process. The solution of the first configuration that terminates
+    optimally is loaded into prob; all other processes (and their solvers)
+    are terminated. The CPUs are shared evenly between the solvers.
+
+    Args:
+        prob: a urbs model instance
+        configs: list of solver configurations, each either the name of an
+            entry of RACE_CONFIGS or a tuple (name, solver, options) with a
+            dict of solver options (c.f. setup_solver)
+        log_basename: solver log files are named
+            '{log_basename}-{configuration name}.log'
+        timeout: (optional) seconds after which the race is aborted
+        profile: (optional) solver profile (c.f. solver_options) applied
+            before the options of each configuration
+
+    Returns:
+        (result, winner, outcome) tuple of the winner's solver results
+        object, its configuration name and an OrderedDict of configuration
+        name to (termination, seconds), with termination 'terminated' for
+        configurations stopped before they finished
+
+    Example:
+        >>> result, winner, outcome = solve_race(
+        ...     prob, ['glpk-simplex', 'glpk-interior'])  # doctest: +SKIP
+    """
+    configs = [(config,) + RACE_CONFIGS[config] if isinstance(config, str)
+               else tuple(config) for config in configs]
+
+    threads = max(1, multiprocessing.cpu_count() // len(configs))
+
+    t_start = time.time()
+    workers = OrderedDict()
+    for name, solver, options in configs:
+        parent_conn, child_conn = multiprocessing.Pipe()
+        process = multiprocessing.Process(
+            target=_race_worker,
+            args=(child_conn, prob, solver, options,
+                  '{}-{}.log'.format(log_basename, name), profile,
+                  threads))
+        process.start()
+        workers[name] = (process, parent_conn)
+
+    outcome = OrderedDict((name, None) for name in workers)
+    winner = result = None
+    try:
+        while winner is None and None in outcome.values():
+            if timeout is not None and time.time() - t_start > timeout:
+                break
+            for name, (process, conn) in workers.items():
+                if outcome[name] is not None:
+                    continue
+                if conn.poll(0.1):
+                    termination, answer = conn.recv()
+                elif not process.is_alive() and not conn.poll():
+                    termination, answer = 'crashed', None
+                else:
+                    continue
+                outcome[name] = (termination, time.time() - t_start)
+                print("Solver configuration {} finished after {:.2f} sec "
+                      "with condition '{}'.".format(name, outcome[name][1],
+                                                    termination))
+                if termination == 'optimal':
+                    winner, result = name, answer
+                    break
+    finally:
+        for name, (process, conn) in workers.items():
+            if process.is_alive():
+                _terminate(process)
+            else:
+                process.join()
+            conn.close()
+            if outcome[name] is None:
+                outcome[name] = ('terminated', time.time() - t_start)
+
+    if winner is None:
+        raise RuntimeError("No solver configuration terminated optimally: "
+                           "{}".format(', '.join(
+                               '{} ({})'.format(name, termination)
+                               for name, (termination, _) in
+                               outcome.items())))
+    prob.solutions.load_from(result)
+    print("Solver race won by {}.".format(winner))
+    return result, winner, outcome
+
+
 def run_scenario(input_file, solver, timesteps, scenario, result_dir, dt,
                  objective,
                  plot_tuples=None,  plot_sites_name=None, plot_periods=None,
-                 report_tuples=None, report_sites_name=None):
+                 report_tuples=None, report_sites_name=None,
+                 instrument=False, metrics_file=None, prune=False,
+                 model_cache=None, result_cache=None, input_data=None,
+                 site_clusters=None, resolution=None, race=None,
+                 solver_profile=None, memory_budget=None, scale=False,
+                 scenario_data=None, name=None, results=None):
     """ run an urbs model for given input, time steps and scenario
 
     Args:
@@ -61,53 +325,263 @@ def run_scenario(input_file, solver, timesteps, scenario, result_dir, dt,
         plot_periods: (optional) dict of plot periods(c.f. urbs.result_figures)
         report_tuples: (optional) list of (sit, com) tuples (c.f. urbs.report)
         report_sites_name: (optional) dict of names for sites in report_tuples
+        instrument: (optional) set True to write per-component build
+            statistics (c.f. urbs.get_build_stats) to '{scenario}-build.csv'
+            and coefficient ranges (c.f. urbs.coefficient_ranges) to
+            '{scenario}-coefficients.csv'
+        metrics_file: (optional) JSON-lines file to which the run metrics
+            record is appended (c.f. urbs.append_metrics), default:
+            'metrics.jsonl' in result_dir; its peak memory of each phase
+            ('rss_read', ..., 'rss_report') covers the Python process only,
+            'rss_solver' the largest of the solver processes (c.f.
+            urbs.peak_rss)
+        prune: (optional) set True to remove provably inactive entities
+            before building the model (c.f. urbs.prune_inactive); removed
+            entities are listed in '{scenario}-pruned.csv'
+        model_cache: (optional) directory of cached model instances; if
+            given, a model built before from identical input data, timesteps,
+            dt and objective is loaded from there instead of being created
+            (c.f. urbs.load_or_create_model)
+        result_cache: (optional) directory of stored results; if given, the
+            result of identical scenario data, timesteps, dt, objective and
+            solver settings (solver, solver_profile, site_clusters, prune,
+            scale and race; c.f. urbs.model_key) is loaded from there
+            instead of building and solving the model, and new results are
+            stored there
+        input_data: (optional) input data dict of input_file, as returned by
+            urbs.read_excel and checked by urbs.validate_input; if given, the
+            spreadsheet is not read again, the scenario is applied to a
+            copy-on-write view of it (c.f. urbs.apply_scenario) and only the
+            changed data frames are validated again
+        site_clusters: (optional) number of site clusters; if given, sites
+            are merged into this many clusters before building the model
+            (c.f. urbs.cluster_sites and urbs.aggregate_sites) and the
+            result is mapped back to the sites for saving, report and plots
+            (c.f. urbs.disaggregate_sites); the clusters are listed in
+            '{scenario}-clusters.csv'
+        resolution: (optional) timestep length (unit: hours), a multiple of
+            dt; if given, the input time series are resampled to it before
+            building the model (c.f. urbs.resample_timesteps), and timesteps
+            and plot_periods are translated to the resampled timesteps
+        race: (optional) list of solver configurations (c.f.
+            urbs.solve_race); if given, the model is solved with all of them
+            in parallel instead of with solver, the first optimal solution
+            is used and the winning configuration is recorded in the metrics
+            record ('race_winner', 'race')
+        solver_profile: (optional) name of a solver option profile (c.f.
+            urbs.SOLVER_PROFILES), recorded in the metrics record
+        memory_budget: (optional) largest allowed peak memory (MB) of the
+            model; if the estimate (c.f. urbs.check_memory_budget) exceeds
+            it, the model is not built and the error suggests a resolution
+            or number of site_clusters that would fit
+        scale: (optional) set True to solve a copy of the model in cost and
+            energy units chosen to narrow its coefficient ranges (c.f.
+            urbs.scale_model); the solution is converted back to the
+            original units before it is saved, and the units are recorded
+            in the metrics record ('cost_unit', 'energy_unit'); the
+            objective in the solver log is in the scaled units
+        scenario_data: (optional) input data dict with the scenario already
+            applied and validated; if given, neither input_file nor
+            input_data is read and the scenario is not applied again
+        name: (optional) name of the run for its result files and metrics
+            record, default: the name of the scenario function
+        results: (optional) dict of result fingerprint to result file of
+            the runs before, e.g. of the same batch; like result_cache, but
+            in memory: a matching result is reused from there, and the
+            result file of this run is added to it
 
     Returns:
-        the urbs model instance
+        the urbs model instance, or a result container (c.f. urbs.load) if
+        the result was taken from result_cache or site_clusters is given
     """
 
     # start time measurement
     t_start = time.time()
 
     # scenario name, read and modify data for scenario
-    sce = scenario.__name__
-    data = read_excel(input_file)
-    data = scenario(data)
-    validate_input(data)
+    sce = name or scenario.__name__
+    if scenario_data is not None:
+        data = scenario_data
+    elif input_data is None:
+        data = read_excel(input_file)
+        data = scenario(data)
+        validate_input(data)
+    else:
+        data, changed = apply_scenario(input_data, scenario)
+        validate_input(data, frames=changed)
+
+    # resample time series to the (coarser) timestep length resolution
+    if resolution:
+        if plot_periods:
+            plot_periods = resample_periods(plot_periods, timesteps, dt,
+                                            resolution)
+        data, timesteps = resample_timesteps(data, timesteps, dt, resolution)
+        dt = resolution
 
-    # measure time to read file
+    # look up a result of identical input data and settings, from this
+    # batch or stored before; memory_budget, instrument and model_cache do
+    # not change the result
+    cached_result = None
+    if result_cache or results is not None:
+        settings = {'solver': solver}
+        if solver_profile:
+            settings['solver_profile'] = solver_profile
+        if site_clusters:
+            settings['site_clusters'] = site_clusters
+        if prune:
+            settings['prune'] = True
+        if scale:
+            settings['scale'] = True
+        if race:
+            settings['race'] = list(race)
+        fingerprint = model_key(data, dt, timesteps, objective, **settings)
+        if results and os.path.exists(results.get(fingerprint, '')):
+            cached_result = results[fingerprint]
+        elif result_cache:
+            cached_result = os.path.join(result_cache,
+                                         '{}.h5'.format(fingerprint))
+            if not os.path.exists(cached_result):
+                cached_result = None
+
+    # merge sites of similar profiles into clusters
+    if site_clusters and not cached_result:
+        site_data = data
+        clusters = cluster_sites(site_data, site_clusters)
+        clusters_to_frame(clusters).to_csv(
+            os.path.join(result_dir, '{}-clusters.csv'.format(sce)),
+            index=False)
+        data = aggregate_sites(site_data, clusters)
+
+    # remove inactive processes, transmissions, storages and commodities
+    if prune and not cached_result:
+        input_data = data
+        data, dropped = prune_inactive(input_data)
+        dropped_to_frame(dropped).to_csv(
+            os.path.join(result_dir, '{}-pruned.csv'.format(sce)),
+            index=False)
+
+    # refuse models that would not fit into the memory budget
+    estimated_memory = None
+    if memory_budget and not cached_result:
+        estimated_memory = check_memory_budget(data, timesteps, dt, objective,
+                                               memory_budget)
+
+    # measure time and peak memory to read file
     t_read = time.time() - t_start
+    rss_read = peak_rss()
     print("Time to read file: %.2f sec" % t_read)
 
-    t = time.time()
-    # create model
-    prob = create_model(data, dt, timesteps, objective)
-    # prob.write('model.lp', io_options={'symbolic_solver_labels':True})
+    if cached_result:
+        # reuse result, skipping model creation and solving
+        print("Reusing stored result {}.".format(cached_result))
+        t = time.time()
+        prob = load(cached_result)
+        shutil.copyfile(cached_result,
+                        os.path.join(result_dir, '{}.h5'.format(sce)))
+        result = None
+        t_model = 0
+        rss_model = peak_rss()
+        t_solve = time.time() - t
+        rss_solve = peak_rss()
+        rss_solver = None
+    else:
+        t = time.time()
+        # create model (or load it from the model cache)
+        if model_cache:
+            prob, cached = load_or_create_model(
+                model_cache, data, dt, timesteps, objective,
+                instrument=instrument)
+            if cached:
+                print("Loaded model from cache.")
+        else:
+            prob = create_model(data, dt, timesteps, objective,
+                                instrument=instrument)
+        # prob.write('model.lp', io_options={'symbolic_solver_labels':True})
 
-    # measure time to create model
-    t_model = time.time() - t
-    print("Time to create model: %.2f sec" % t_model)
+        # measure time and peak memory to create model
+        t_model = time.time() - t
+        rss_model = peak_rss()
+        print("Time to create model: %.2f sec" % t_model)
 
-    # refresh time stamp string and create filename for logfile
-    # now = prob.created
-    log_filename = os.path.join(result_dir, '{}.log').format(sce)
+        # write construction statistics per model component next to metrics
+        if instrument:
+            get_build_stats(prob).to_csv(
+                os.path.join(result_dir, '{}-build.csv'.format(sce)))
+            coefficient_ranges(prob).to_csv(
+                os.path.join(result_dir, '{}-coefficients.csv'.format(sce)))
 
-    t = time.time()
+        # refresh time stamp string and create filename for logfile
+        # now = prob.created
+        log_filename = os.path.join(result_dir, '{}.log').format(sce)
 
-    # solve model and read results
-    optim = SolverFactory(solver)  # cplex, glpk, gurobi, ...
-    optim = setup_solver(optim, logfile=log_filename)
-    result = optim.solve(prob, tee=True)
-    assert str(result.solver.termination_condition) == 'optimal'
+        t = time.time()
 
-    # measure time to solve 
-    t_solve = time.time() - t
-    print("Time to solve model: %.2f sec" % t_solve)
+        # solve a copy of the model in scaled cost and energy units
+        solved = prob
+        if scale:
+            solved, (cost_unit, energy_unit) = scale_model(prob)
 
-    t = time.time()
+        # solve model and read results
+        if race:
+            # first optimal solver configuration wins
+            result, race_winner, race_outcome = solve_race(
+                solved, race, log_basename=os.path.join(result_dir, sce),
+                profile=solver_profile)
+            log_filename = os.path.join(
+                result_dir, '{}-{}.log'.format(sce, race_winner))
+        else:
+            optim = SolverFactory(solver)  # cplex, glpk, gurobi, ...
+            optim = setup_solver(optim, logfile=log_filename,
+                                 profile=solver_profile)
+            result = solve_logged(optim, solved, log_filename, tee=True)
+        if str(result.solver.termination_condition) != 'optimal':
+            raise RuntimeError("Solver terminated with condition '{}'.".format(
+                result.solver.termination_condition))
+        if scale:
+            unscale_solution(solved, prob)
+            del solved
+
+        # measure time and peak memory to solve
+        t_solve = time.time() - t
+        rss_solve = peak_rss()
+        rss_solver = peak_rss(children=True)
+        print("Time to solve model: %.2f sec" % t_solve)
+
+        # report removed entities with zero capacities
+        if prune:
+            restore_pruned(prob, input_data, dropped)
 
-    # save problem solution (and input data) to HDF5 file
-    save(prob, os.path.join(result_dir, '{}.h5'.format(sce)))
+        # map results of site clusters back to the sites
+        model = prob
+        if site_clusters:
+            prob = disaggregate_sites(prob, site_data, clusters)
+
+        # performance metrics from the solver log, stored with the result
+        solver_log = None
+        if os.path.exists(log_filename):
+            solver_log = parse_solver_log(log_filename)
+            if not hasattr(prob, '_result'):
+                prob._result = create_result_cache(prob)
+            prob._result['solver_log'] = pd.Series(
+                list(solver_log.values()), index=list(solver_log.keys()),
+                name='solver_log', dtype=object)
+
+        # save problem solution (and input data) to HDF5 file
+        save(prob, os.path.join(result_dir, '{}.h5'.format(sce)))
+
+        # store result for later scenarios with identical input and settings
+        if result_cache:
+            if not os.path.exists(result_cache):
+                os.makedirs(result_cache)
+            shutil.copyfile(
+                os.path.join(result_dir, '{}.h5'.format(sce)),
+                os.path.join(result_cache, '{}.h5'.format(fingerprint)))
+
+    # offer this result to later runs of the batch
+    if results is not None:
+        results[fingerprint] = os.path.join(result_dir, '{}.h5'.format(sce))
+
+    t = time.time()
 
     # # measure time to save solution
     # save_time = time.time() - t
@@ -134,15 +608,186 @@ def run_scenario(input_file, solver, timesteps, scenario, result_dir, dt,
         figure_size=(24, 9))
 
     t_repplot = time.time() - t
+    rss_repplot = peak_rss()
     print("Time to report and plot: %.2f sec" % t_repplot)
 
     # measure time to run scenario
     t_sce = time.time() - t_start
     print("Time to run scenario: %.2f sec" % t_sce)
 
-    # write time measurements into file "timelog.txt" in result directory
-    timelog = open(os.path.join(result_dir, "timelog.txt"), "a")
-    timelog.write("%.2f\t%.2f\t%.2f\t%.2f\t%.2f\t%s\n"
-                  % (t_sce, t_read, t_model, t_solve, t_repplot, sce))
+    # append metrics record of this scenario to the (shared) metrics file
+    if metrics_file is None:
+        metrics_file = os.path.join(result_dir, 'metrics.jsonl')
+    record = {
+        'scenario': sce,
+        'input_file': input_file,
+        'timesteps': len(timesteps),
+        'dt': dt,
+        'objective': objective,
+        'time_read': t_read,
+        'time_model': t_model,
+        'time_solve': t_solve,
+        'time_report': t_repplot,
+        'time_total': t_sce,
+        'rss_read': rss_read,
+        'rss_model': rss_model,
+        'rss_solve': rss_solve,
+        'rss_report': rss_repplot,
+        'rss_solver': rss_solver,
+        'estimated_memory': estimated_memory,
+        'solver': solver,
+        'solver_profile': solver_profile,
+        'cached_result': cached_result}
+    if result is not None:
+        record.update({
+            'variables': model.nvariables(),
+            'constraints': model.nconstraints(),
+            'nonzeros': result_value(result.problem.number_of_nonzeros),
+            'status': str(result.solver.status),
+            'termination': str(result.solver.termination_condition),
+            'iterations': None,  # not reported by Pyomo's solver interfaces
+            'objective_value': model.objective_function()})
+        if solver_log:
+            iterations = [solver_log[phase + '_iterations']
+                          for phase in ('simplex', 'barrier', 'crossover')
+                          if solver_log[phase + '_iterations'] is not None]
+            if iterations:
+                record['iterations'] = sum(iterations)
+            record.update(('log_' + metric, value)
+                          for metric, value in solver_log.items())
+        if race:
+            record.update({
+                'race_winner': race_winner,
+                'race': race_outcome})
+        if scale:
+            record.update({
+                'cost_unit': cost_unit,
+                'energy_unit': energy_unit})
+    append_metrics(metrics_file, record)
 
     return prob
+
+
+def _scenario_names(scenarios):
+    """ Return unique run names of a list of scenario functions: the name
+    of the function, with suffix '-2', '-3', ... for its repetitions """
+    names = []
+    count = {}
+    for scenario in scenarios:
+        name = scenario.__name__
+        count[name] = count.get(name, 0) + 1
+        if count[name] > 1:
+            name = '{}-{}'.format(name, count[name])
+        names.append(name)
+    return names
+
+
+def run_scenarios(input_file, solver, timesteps, scenarios, result_dir, dt,
+                  objective, resume=True, result_cache=None,
+                  solver_profile=None, **kwargs):
+    """ run a batch of scenarios, skipping those completed before
+
+    The input file is read once; each scenario is applied to a copy-on-write
+    view of it (c.f. urbs.apply_scenario). Repeated scenarios are run under
+    the names '{scenario}-2', '{scenario}-3', ..., which also name their
+    result files. The completion state of each run is recorded under its
+    name in 'state.json' in result_dir after it finished or failed. With
+    resume=True, a run is skipped if it is recorded as done with the same
+    input hash (c.f. urbs.model_key of its scenario data, timesteps, dt and
+    objective) and its '{name}.h5' exists. Failing runs are recorded with
+    their error message instead of aborting the batch. Runs whose data and
+    solver settings are identical to those of a run before in the batch,
+    e.g. repeated scenarios, reuse its result (c.f. argument results of
+    run_scenario); report and plots are still written under their own name.
+    With result_cache, results are also reused across batches.
+
+    Args:
+        input_file: filename to an Excel spreadsheet for urbs.read_excel
+        solver: solver name, e.g. 'glpk'
+        timesteps: a list of timesteps, e.g. range(0,8761)
+        scenarios: list of scenario functions
+        result_dir: directory name for result spreadsheet and plots
+        dt: length of each time step (unit: hours)
+        objective: objective function, 'cost' or 'CO2'
+        resume: (optional) set False to rerun all scenarios
+        result_cache: (optional) directory of stored results, shared by
+            batches, e.g. 'result/cache'; default: no result reuse
+        solver_profile: (optional) name of a solver option profile (c.f.
+            urbs.SOLVER_PROFILES) for all scenarios, or a dict of scenario
+            name to profile name (scenarios not in it use the solver
+            defaults)
+        **kwargs: further keyword arguments of run_scenario
+
+    Returns:
+        dict of run name to its state record, i.e. a dict with keys
+        'status' ('done' or 'failed'), 'input_hash' and 'message'
+    """
+    state_file = os.path.join(result_dir, 'state.json')
+    state = {}
+    if os.path.exists(state_file):
+        with open(state_file) as f:
+            state = json.load(f)
+
+    # read and validate input once; scenarios only copy what they change
+    input_data = read_excel(input_file)
+    try:
+        validate_input(input_data)
+        input_valid = True
+    except (KeyError, ValueError):
+        # scenarios might correct invalid input; validate each completely
+        input_valid = False
+
+    # result files of this batch by fingerprint, for reuse by later runs
+    results = {}
+
+    for sce, scenario in zip(_scenario_names(scenarios), scenarios):
+        if isinstance(solver_profile, dict):
+            profile = solver_profile.get(scenario.__name__)
+        else:
+            profile = solver_profile
+        settings = {}
+        if profile:
+            settings['solver_profile'] = profile
+        if kwargs.get('site_clusters'):
+            settings['site_clusters'] = kwargs['site_clusters']
+        if kwargs.get('resolution'):
+            settings['resolution'] = kwargs['resolution']
+
+        input_hash = None
+        try:
+            # apply the scenario once, for the input hash and the run
+            data, changed = apply_scenario(input_data, scenario)
+            validate_input(data, frames=changed if input_valid else None)
+            input_hash = model_key(data, dt, timesteps, objective, **settings)
+
+            previous = state.get(sce, {})
+            if (resume and previous.get('status') == 'done' and
+                    previous.get('input_hash') == input_hash and
+                    os.path.exists(os.path.join(result_dir,
+                                                '{}.h5'.format(sce)))):
+                print("Skipping scenario {} (already done).".format(sce))
+                continue
+
+            run_scenario(input_file, solver, timesteps, scenario,
+                         result_dir, dt, objective,
+                         result_cache=result_cache, scenario_data=data,
+                         name=sce, results=results, solver_profile=profile,
+                         **kwargs)
+            state[sce] = {'status': 'done', 'input_hash': input_hash,
+                          'message': None}
+        except Exception as error:
+            traceback.print_exc()
+            state[sce] = {'status': 'failed', 'input_hash': input_hash,
+                          'message': '{}: {}'.format(type(error).__name__,
+                                                     error)}
+
+        # write state after each scenario, so that an interrupted batch can
+        # be resumed; replace the file only when completely written
+        with open(state_file + '.tmp', 'w') as f:
+            json.dump(state, f, indent=2, sort_keys=True)
+        replace_file(state_file + '.tmp', state_file)
+
+    failed = sorted(sce for sce in state if state[sce]['status'] == 'failed')
+    if failed:
+        print("Failed scenarios: {}".format(', '.join(failed)))
+    return state
@@ -3,7 +3,8 @@ from .pyomoio import get_entity, list_entities
 
 
 def create_result_cache(prob):
-    entity_types = ['set', 'par', 'var']
+    # expressions hold values of substituted variables, if any
+    entity_types = ['set', 'par', 'var', 'expr']
     if hasattr(prob, 'dual'):
         entity_types.append('con')
 
@@ -0,0 +1,202 @@
+import math
+import numpy as np
+import pandas as pd
+import pyomo.core as pyomo
+from pyomo.repn import generate_standard_repn
+
+# variables and constraints in units of cost; all others are in units of
+# energy (or power, or commodity amounts, which are scaled alike)
+COST_VARIABLES = ['costs']
+COST_CONSTRAINTS = ['def_costs', 'res_global_cost_limit']
+
+
+def _rows(prob):
+    """ Yield (type, name, coefficients, rhs) of each objective and active
+    constraint row, coefficients as a list of (variable name, value) and
+    rhs as a list of the nonzero right hand sides """
+    for objective in prob.component_objects(pyomo.Objective, active=True):
+        for row in objective.values():
+            repn = generate_standard_repn(row.expr)
+            yield ('Objective', objective.name,
+                   [(v.parent_component().name, c)
+                    for v, c in zip(repn.linear_vars, repn.linear_coefs)],
+                   [])
+    for constraint in prob.component_objects(pyomo.Constraint, active=True):
+        for row in constraint.values():
+            repn = generate_standard_repn(row.body)
+            rhs = [pyomo.value(bound) - pyomo.value(repn.constant)
+                   for bound in (row.lower, row.upper) if bound is not None]
+            yield ('Constraint', constraint.name,
+                   [(v.parent_component().name, c)
+                    for v, c in zip(repn.linear_vars, repn.linear_coefs)],
+                   [r for r in rhs if r != 0])
+
+
+def _range(values):
+    """ Return (min, max, orders of magnitude) of absolute values. """
+    values = np.abs(np.asarray(values, dtype=float))
+    values = values[(values > 0) & np.isfinite(values)]
+    if not len(values):
+        return np.nan, np.nan, np.nan
+    return (values.min(), values.max(),
+            math.log10(values.max() / values.min()))
+
+
+def coefficient_ranges(prob):
+    """Report the range of matrix coefficients per model component.
+
+    Wide coefficient ranges (e.g. investment costs in EUR next to
+    efficiencies and the weight factor) slow down solvers and may cause
+    numerical trouble, c.f. scale_model. Expanding every row takes about as
+    long as writing the model file for the solver.
+
+    Args:
+        prob: an urbs model instance, before or after solving
+
+    Returns:
+        a DataFrame indexed by component name, objective and constraints in
+        order of declaration followed by the variables, with columns 'Type',
+        'Members' (rows or variables), 'Min' and 'Max' (smallest and largest
+        absolute nonzero coefficient), 'Range' (orders of magnitude between
+        them) and, for constraints, 'Rhs Min' and 'Rhs Max' (smallest and
+        largest absolute nonzero right hand side)
+
+    Example:
+        >>> data = read_excel('mimo-example.xlsx')
+        >>> prob = create_model(data, timesteps=range(1, 25))
+        >>> ranges = coefficient_ranges(prob)
+        >>> ranges.sort_values('Range', ascending=False).head()
+        ... # doctest: +SKIP
+    """
+    rows = []
+    var_coefs = {}
+    block, members, coefs, rhs = None, 0, [], []
+    for row_type, name, row_coefs, row_rhs in _rows(prob):
+        if name != block:
+            if block is not None:
+                rows.append((block, block_type, members) + _range(coefs) +
+                            _range(rhs)[:2])
+            block, block_type, members, coefs, rhs = (
+                name, row_type, 0, [], [])
+        members += 1
+        coefs.extend(c for _, c in row_coefs)
+        rhs.extend(row_rhs)
+        for var, c in row_coefs:
+            var_coefs.setdefault(var, []).append(c)
+    if block is not None:
+        rows.append((block, block_type, members) + _range(coefs) +
+                    _range(rhs)[:2])
+
+    for var in prob.component_objects(pyomo.Var):
+        rows.append((var.name, 'Var', len(var)) +
+                    _range(var_coefs.get(var.name, [])) + (np.nan, np.nan))
+
+    ranges = pd.DataFrame(rows, columns=['Name', 'Type', 'Members', 'Min',
+                                         'Max', 'Range', 'Rhs Min',
+                                         'Rhs Max'])
+    ranges.set_index('Name', inplace=True)
+    return ranges
+
+
+def scaling_units(prob):
+    """Choose cost and energy units that centre the model's coefficients.
+
+    The energy unit is the power of ten closest to the median absolute
+    right hand side of the energy constraints (mostly demands and capacity
+    limits). The cost unit is the power of ten that brings the median
+    coefficient of the cost constraints, in that energy unit, closest to 1.
+
+    Args:
+        prob: an urbs model instance
+
+    Returns:
+        (cost_unit, energy_unit) tuple, e.g. (1e6, 1e3) for costs in MEUR
+        and energies in GWh if the input is in EUR and MWh
+    """
+    energy_rhs = []
+    cost_coefs = []
+    for row_type, name, row_coefs, row_rhs in _rows(prob):
+        if name in COST_CONSTRAINTS:
+            cost_coefs.extend(c for var, c in row_coefs
+                              if var not in COST_VARIABLES)
+        elif row_type == 'Constraint':
+            energy_rhs.extend(row_rhs)
+
+    def median_exponent(values):
+        values = np.abs(np.asarray(values, dtype=float))
+        values = values[(values > 0) & np.isfinite(values)]
+        return np.median(np.log10(values)) if len(values) else 0.0
+
+    energy_exponent = median_exponent(energy_rhs)
+    cost_exponent = median_exponent(cost_coefs) + round(energy_exponent)
+    return 10.0 ** round(cost_exponent), 10.0 ** round(energy_exponent)
+
+
+def scale_model(prob, cost_unit=None, energy_unit=None):
+    """Create a copy of a model in scaled cost and energy units.
+
+    Costs are expressed in multiples of cost_unit, all energies, powers and
+    commodity amounts in multiples of energy_unit: variables, cost and
+    energy constraints and the objective are scaled accordingly, which
+    narrows the range of coefficients, right hand sides and bounds the
+    solver sees (c.f. coefficient_ranges). Solve the copy, then transfer its
+    solution in the original units to prob with unscale_solution.
+
+    The copy is created by Pyomo's 'core.scale_model' transformation and
+    takes as much memory as the original model.
+
+    Args:
+        prob: an unsolved urbs model instance; it gets a 'scaling_factor'
+            suffix, but is not modified otherwise
+        cost_unit: (optional) cost unit, e.g. 1e6 for MEUR if the input is
+            in EUR; default: chosen by scaling_units
+        energy_unit: (optional) energy unit, e.g. 1e3 for GWh if the input
+            is in MWh; default: chosen by scaling_units
+
+    Returns:
+        (scaled, units) tuple of the scaled model instance and the tuple
+        (cost_unit, energy_unit)
+
+    Example:
+        >>> data = read_excel('mimo-example.xlsx')
+        >>> prob = create_model(data, timesteps=range(1, 8761))
+        >>> scaled, units = scale_model(prob)
+        >>> result = optim.solve(scaled)  # doctest: +SKIP
+        >>> unscale_solution(scaled, prob)  # doctest: +SKIP
+    """
+    if cost_unit is None or energy_unit is None:
+        auto_cost_unit, auto_energy_unit = scaling_units(prob)
+        cost_unit = cost_unit or auto_cost_unit
+        energy_unit = energy_unit or auto_energy_unit
+
+    if not hasattr(prob, 'scaling_factor'):
+        prob.scaling_factor = pyomo.Suffix(direction=pyomo.Suffix.EXPORT)
+    for var in prob.component_objects(pyomo.Var):
+        prob.scaling_factor[var] = 1.0 / (
+            cost_unit if var.name in COST_VARIABLES else energy_unit)
+    for constraint in prob.component_objects(pyomo.Constraint, active=True):
+        prob.scaling_factor[constraint] = 1.0 / (
+            cost_unit if constraint.name in COST_CONSTRAINTS else energy_unit)
+    prob.scaling_factor[prob.objective_function] = 1.0 / (
+        cost_unit if prob.obj.value == 'cost' else energy_unit)
+
+    scaled = pyomo.TransformationFactory('core.scale_model').create_using(
+        prob)
+    print("Scaled model to cost unit {:g} and energy unit {:g}."
+          .format(cost_unit, energy_unit))
+    return scaled, (cost_unit, energy_unit)
+
+
+def unscale_solution(scaled, prob):
+    """Transfer the solution of a scaled model back to the original model.
+
+    Variable values (and duals, if prob has a 'dual' suffix) are converted
+    back to the original units, so that results, reports and stored
+    results of prob do not depend on the scaling.
+
+    Args:
+        scaled: a solved model instance created by scale_model(prob)
+        prob: the original urbs model instance
+    """
+    pyomo.TransformationFactory('core.scale_model').propagate_solution(
+        scaled, prob)
@@ -1,4 +1,5 @@
 import pandas as pd
+from .scenariospec import Edit, Scenario, grid, sweep
 
 # SCENARIO GENERATORS
 # In this script a variety of scenario generator functions are defined to
@@ -52,3 +53,36 @@ def scenario_all_together(data):
     data = scenario_co2_limit(data)
     data = scenario_north_process_caps(data)
     return data
+
+
+# DECLARATIVE SCENARIOS
+# The same scenarios as above, expressed as lists of edits (c.f.
+# urbs.scenariospec). They can be used like scenario functions, but are
+# hashable, can be composed with + and expanded into grids of scenarios.
+
+spec_stock_prices = Scenario('spec_stock_prices', [
+    Edit('commodity', {'Type': 'Stock'}, 'price', 'multiply', 1.5)])
+
+spec_co2_limit = Scenario('spec_co2_limit', [
+    Edit('global_prop', 'CO2 limit', 'value', 'multiply', 0.05)])
+
+spec_co2_tax_mid = Scenario('spec_co2_tax_mid', [
+    Edit('commodity', ('Mid', 'CO2', 'Env'), 'price', 'set', 50)])
+
+spec_north_process_caps = Scenario('spec_north_process_caps', [
+    Edit('process', ('North', 'Hydro plant'), 'cap-up', 'multiply', 0.5),
+    Edit('process', ('North', 'Biomass plant'), 'cap-up', 'multiply', 0.25)])
+
+spec_no_dsm = Scenario('spec_no_dsm', [
+    Edit('dsm', None, None, 'drop')])
+
+spec_all_together = (
+    spec_stock_prices + spec_co2_limit + spec_north_process_caps)
+
+# grid of CO2 limit x gas price scenarios, e.g. for runme.py:
+# scenarios = spec_co2_gas_grid
+spec_co2_gas_grid = grid(
+    sweep('co2_limit', 'global_prop', 'CO2 limit', 'value', 'multiply',
+          [1, 0.5, 0.1]),
+    sweep('gas_price', 'commodity', {'Commodity': 'Gas'}, 'price',
+          'multiply', [1, 1.5, 2]))
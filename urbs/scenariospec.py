@@ -0,0 +1,283 @@
+import hashlib
+import itertools
+from collections import namedtuple
+
+OPERATIONS = ('set', 'multiply', 'add', 'drop')
+
+# mutable parameters of a built model (c.f. urbs.create_model) by the input
+# cells they are initialised from: (sheet, column) for parameters indexed by
+# the rows of the sheet, (sheet, row, column) for single values
+MODEL_PARAMETERS = {
+    ('commodity', 'price'): 'commodity_price',
+    ('global_prop', 'CO2 limit', 'value'): 'global_co2_limit',
+    ('global_prop', 'Cost limit', 'value'): 'global_cost_limit'}
+
+# constraints bounded by the single value parameters; they are skipped if
+# the model is built with an infinite or negative limit
+LIMIT_CONSTRAINTS = {
+    'global_co2_limit': 'res_global_co2_limit',
+    'global_cost_limit': 'res_global_cost_limit'}
+
+
+class Levels(tuple):
+    """Index selector matching rows by the values of named index levels.
+
+    Created from a dict of level name to value (or list of values), e.g.
+    {'Type': 'Stock'} or {'Site': ['North', 'Mid']}. Stored as a sorted
+    tuple of (level, values) pairs, so that it is hashable and has a
+    deterministic representation.
+    """
+
+    def __new__(cls, levels):
+        return super(Levels, cls).__new__(cls, sorted(
+            (level, tuple(values) if isinstance(values, (list, tuple, set))
+             else (values, ))
+            for level, values in dict(levels).items()))
+
+    def __repr__(self):
+        return 'Levels({!r})'.format(dict(self))
+
+    def mask(self, index):
+        """ Return boolean array of the rows of index matching all levels. """
+        mask = True
+        for level, values in self:
+            mask = mask & index.get_level_values(level).isin(values)
+        return mask
+
+
+class Edit(namedtuple('Edit', 'sheet index column operation value')):
+    """Single declarative change of the input data dict.
+
+    Attributes:
+        sheet: key of the input data dict, e.g. 'commodity'
+        index: row selector: a row label (e.g. ('Mid', 'CO2', 'Env') or
+            'CO2 limit'), a dict of index level values (e.g. {'Type':
+            'Stock'}) or None for all rows
+        column: column label
+        operation: 'set', 'multiply' or 'add' value to the selected cells,
+            or 'drop' the selected rows (column and value are ignored)
+        value: the operand
+    """
+
+    __slots__ = ()
+
+    def __new__(cls, sheet, index, column, operation, value=None):
+        if operation not in OPERATIONS:
+            raise ValueError("Unknown operation '{}', must be one of {}."
+                             .format(operation, ', '.join(OPERATIONS)))
+        if isinstance(index, dict):
+            index = Levels(index)
+        return super(Edit, cls).__new__(
+            cls, sheet, index, column, operation, value)
+
+    def rows(self, df):
+        """ Return the row labels of df selected by this edit. """
+        if self.index is None:
+            return df.index
+        if isinstance(self.index, Levels):
+            return df.index[self.index.mask(df.index)]
+        return df.loc[[self.index]].index
+
+    def apply(self, data):
+        """ Apply this edit in place to the input data dict. """
+        df = data[self.sheet]
+        if self.operation == 'drop':
+            data[self.sheet] = df.drop(self.rows(df))
+        elif self.operation == 'set':
+            df.loc[self.rows(df), self.column] = self.value
+        elif self.operation == 'multiply':
+            df.loc[self.rows(df), self.column] *= self.value
+        elif self.operation == 'add':
+            df.loc[self.rows(df), self.column] += self.value
+
+
+class Scenario(object):
+    """Declarative scenario: a named, hashable sequence of edits.
+
+    A Scenario can be used wherever a scenario function is expected, as
+    calling it applies its edits to the given input data dict. Scenarios are
+    composed with +, e.g. (stock_prices + co2_limit), which concatenates
+    their edits.
+
+    Example:
+        >>> co2_limit = Scenario('scenario_co2_limit', [
+        ...     Edit('global_prop', 'CO2 limit', 'value', 'multiply', 0.05)])
+        >>> data = co2_limit(read_excel('mimo-example.xlsx'))  # doctest: +SKIP
+    """
+
+    def __init__(self, name, edits=()):
+        self.__name__ = name
+        self.edits = tuple(edit if isinstance(edit, Edit) else Edit(*edit)
+                           for edit in edits)
+
+    def __call__(self, data):
+        for edit in self.edits:
+            edit.apply(data)
+        return data
+
+    def __add__(self, other):
+        return Scenario('{}+{}'.format(self.__name__, other.__name__),
+                        self.edits + other.edits)
+
+    def __eq__(self, other):
+        return isinstance(other, Scenario) and self.edits == other.edits
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self.edits)
+
+    def __repr__(self):
+        return 'Scenario({!r}, {!r})'.format(self.__name__, list(self.edits))
+
+    def key(self):
+        """ Return a stable hash string of the edits (not of the name). """
+        return hashlib.sha1(repr(self.edits).encode('utf-8')).hexdigest()
+
+    def parameter_updates(self, data):
+        """Translate the edits into updates of single parameter values.
+
+        Args:
+            data: input data dict the scenario is applied to; it is not
+                modified
+
+        Returns:
+            list of (sheet, row, column, value) tuples with the resulting
+            value of every cell changed by the scenario, e.g. to update the
+            corresponding parameters of an already built model
+
+        Raises:
+            ValueError: if the scenario contains 'drop' edits, which change
+                the model structure instead of parameter values
+        """
+        if any(edit.operation == 'drop' for edit in self.edits):
+            raise ValueError("Scenario '{}' drops rows and cannot be "
+                             "translated into parameter updates."
+                             .format(self.__name__))
+        sheets = set(edit.sheet for edit in self.edits)
+        changed = self(dict((sheet, data[sheet].copy()) for sheet in sheets))
+
+        updates = {}
+        for edit in self.edits:
+            for row in edit.rows(changed[edit.sheet]):
+                updates[edit.sheet, row, edit.column] = (
+                    changed[edit.sheet].loc[row, edit.column])
+        return [key + (value, ) for key, value in updates.items()]
+
+    def apply_to_model(self, prob):
+        """Apply the scenario to a built model by updating its parameters.
+
+        The edits are translated into parameter updates (c.f.
+        parameter_updates) of the model's input data, which are set on the
+        mutable parameters of the model (c.f. MODEL_PARAMETERS). A limit
+        constraint is deactivated by an infinite or negative limit and
+        activated again by a finite one. The model can then be solved again
+        instead of being rebuilt. The input data stored with the model
+        (prob._data) is updated, too, so that saved results and reports show
+        the scenario's values.
+
+        Args:
+            prob: a urbs model instance (c.f. urbs.create_model); it is
+                modified in place
+
+        Returns:
+            Nothing
+
+        Raises:
+            ValueError: if an edit changes the model structure, i.e. drops
+                rows, changes a cell that is no mutable parameter or a row
+                that is not part of the model, or sets a finite limit whose
+                constraint was skipped when building the model; the model
+                is not changed then
+
+        Example:
+            >>> prob = create_model(data, timesteps=range(1, 25))
+            >>> spec_co2_limit.apply_to_model(prob)
+            >>> result = optim.solve(prob)  # doctest: +SKIP
+        """
+        changes = []
+        for sheet, row, column, value in self.parameter_updates(prob._data):
+            value = float(value)
+            if (sheet, column) in MODEL_PARAMETERS:
+                param = prob.component(MODEL_PARAMETERS[sheet, column])
+                if row not in param:
+                    raise ValueError("Scenario '{}' changes row {!r} of sheet "
+                                     "'{}', which is not part of the model."
+                                     .format(self.__name__, row, sheet))
+                changes.append((param, row, value, None))
+            elif (sheet, row, column) in MODEL_PARAMETERS:
+                param = prob.component(MODEL_PARAMETERS[sheet, row, column])
+                limit = prob.component(LIMIT_CONSTRAINTS[param.local_name])
+                active = 0 <= value < float('inf')
+                if limit is not None and active and not len(limit):
+                    raise ValueError("Scenario '{}' sets {} to {}, but the "
+                                     "model was built without this limit."
+                                     .format(self.__name__, row, value))
+                changes.append((param, None, value, limit))
+            else:
+                raise ValueError("Scenario '{}' changes column '{}' of sheet "
+                                 "'{}', which is no mutable model parameter."
+                                 .format(self.__name__, column, sheet))
+
+        for param, index, value, limit in changes:
+            if index is None:
+                param.set_value(value)
+            else:
+                param[index] = value
+            if limit is not None and len(limit):
+                if 0 <= value < float('inf'):
+                    limit.activate()
+                else:
+                    limit.deactivate()
+
+        # keep the input data of the model in line with its parameters
+        sheets = set(edit.sheet for edit in self.edits)
+        prob._data = dict(prob._data)
+        prob._data.update(self(dict((sheet, prob._data[sheet].copy())
+                                    for sheet in sheets)))
+
+
+def sweep(name, sheet, index, column, operation, values):
+    """Return one scenario per value of a single parameter edit.
+
+    Args:
+        name: name prefix of the scenarios; they are named '{name}_{value}'
+        sheet, index, column, operation: c.f. Edit
+        values: list of operands
+
+    Returns:
+        list of Scenarios
+    """
+    return [Scenario('{}_{}'.format(name, value),
+                     [Edit(sheet, index, column, operation, value)])
+            for value in values]
+
+
+def grid(*axes):
+    """Expand a grid of scenario axes into their combined scenarios.
+
+    Args:
+        axes: lists of Scenarios, e.g. as returned by sweep
+
+    Returns:
+        list of composed Scenarios, one per combination of one scenario of
+        each axis, with duplicates (identical edits) removed
+
+    Example:
+        >>> scenarios = grid(
+        ...     sweep('co2', 'global_prop', 'CO2 limit', 'value',
+        ...           'multiply', [1, 0.5, 0.1]),
+        ...     sweep('gas', 'commodity', {'Commodity': 'Gas'}, 'price',
+        ...           'multiply', [1, 1.5]))
+        >>> len(scenarios)
+        6
+    """
+    scenarios = []
+    for combination in itertools.product(*axes):
+        scenario = combination[0]
+        for other in combination[1:]:
+            scenario = scenario + other
+        if scenario not in scenarios:
+            scenarios.append(scenario)
+    return scenarios
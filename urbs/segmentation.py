@@ -0,0 +1,213 @@
+import numpy as np
+import pandas as pd
+
+# time series and how their values are merged into one timestep: energies
+# per timestep add up, specific values are averaged
+TIME_SERIES = [
+    ('demand', 'sum'),
+    ('supim', 'mean'),
+    ('buy_sell_price', 'mean'),
+    ('eff_factor', 'mean')]
+
+
+def merge_timesteps(data, timesteps, lengths):
+    """Merge runs of consecutive timesteps of the input into single ones.
+
+    Demands of the merged timesteps are summed up, intermittent supplies,
+    prices and time variable efficiencies averaged. The first timestep of
+    timesteps stays the initial timestep. The timesteps of the result are
+    numbered consecutively from 0 (the initial timestep).
+
+    Args:
+        data: input data dict, as returned by read_excel; it is not modified
+        timesteps: a list of timesteps, e.g. range(0,8761)
+        lengths: list of the numbers of modelled timesteps merged into each
+            new timestep, in order; remaining timesteps are left out
+
+    Returns:
+        (merged_data, merged_timesteps) tuple of the input data dict with
+        merged time series and the list of its timesteps
+    """
+    timesteps = list(timesteps)
+    if sum(lengths) > len(timesteps) - 1:
+        raise ValueError("Cannot merge {} modelled timesteps into steps of "
+                         "{} timesteps in total!"
+                         .format(len(timesteps) - 1, sum(lengths)))
+    modelled = timesteps[1:sum(lengths) + 1]
+    labels = np.repeat(np.arange(1, len(lengths) + 1), lengths)
+
+    merged = dict(data)
+    for key, how in TIME_SERIES:
+        df = data[key]
+        if df.empty:
+            continue
+        steps = getattr(df.loc[modelled].groupby(labels), how)()
+        initial = df.loc[[timesteps[0]]]
+        initial.index = [0]
+        merged[key] = pd.concat([initial, steps])
+        merged[key].index.name = df.index.name
+    return merged, list(range(len(lengths) + 1))
+
+
+def coarsen_timesteps(data, timesteps, factor):
+    """Merge each factor consecutive timesteps of the input into one.
+
+    The time series are merged as in merge_timesteps. Modelled timesteps
+    that do not fill a complete coarse timestep at the end are left out.
+
+    Args:
+        data: input data dict, as returned by read_excel; it is not modified
+        timesteps: a list of timesteps, e.g. range(0,8761)
+        factor: number of timesteps merged into one
+
+    Returns:
+        (coarse_data, coarse_timesteps) tuple of the input data dict with
+        coarse time series and the list of its timesteps; create the model
+        with dt * factor
+    """
+    timesteps = list(timesteps)
+    blocks = (len(timesteps) - 1) // factor
+    if factor < 1 or blocks < 1:
+        raise ValueError("Cannot merge {} modelled timesteps by factor {}!"
+                         .format(len(timesteps) - 1, factor))
+    return merge_timesteps(data, timesteps, [factor] * blocks)
+
+
+def resample_timesteps(data, timesteps, dt, resolution):
+    """Resample the input time series to a coarser timestep length.
+
+    The time series are merged as in coarsen_timesteps. DSM delay and
+    recovery times stay in hours; the model rounds them down to whole
+    timesteps (but at least one), so a warning is printed for those that
+    are no multiple of resolution.
+
+    Args:
+        data: input data dict, as returned by read_excel; it is not modified
+        timesteps: a list of timesteps, e.g. range(0,8761)
+        dt: length of each original timestep (unit: hours)
+        resolution: length of each resampled timestep (unit: hours), a
+            multiple of dt
+
+    Returns:
+        (resampled_data, resampled_timesteps) tuple of the input data dict
+        with resampled time series and the list of its timesteps; create
+        the model with dt=resolution
+
+    Example:
+        >>> data = read_excel('mimo-example.xlsx')
+        >>> data, timesteps = resample_timesteps(data, range(0, 8761), 1, 3)
+        >>> prob = create_model(data, 3, timesteps)  # doctest: +SKIP
+    """
+    factor = int(round(float(resolution) / dt))
+    if factor < 1 or abs(factor * dt - resolution) > 1e-9:
+        raise ValueError("Resolution {} is no multiple of timestep length "
+                         "{}!".format(resolution, dt))
+
+    if not data['dsm'].empty:
+        for column in ['delay', 'recov']:
+            steps = data['dsm'][column] / float(resolution)
+            inexact = data['dsm'].index[(steps - steps.round()).abs() > 1e-9]
+            for sit, com in inexact:
+                print("Warning from resample_timesteps: DSM {} of {} in {} "
+                      "({} h) is no multiple of timesteps of {} h."
+                      .format(column, com, sit,
+                              data['dsm'].loc[(sit, com), column],
+                              resolution))
+
+    return coarsen_timesteps(data, timesteps, factor)
+
+
+def resample_periods(periods, timesteps, dt, resolution):
+    """Translate plot periods to the timesteps of resample_timesteps.
+
+    Args:
+        periods: dict of 'period name': timesteps_list items of the original
+            timesteps (c.f. urbs.result_figures)
+        timesteps: the original list of timesteps
+        dt: length of each original timestep (unit: hours)
+        resolution: length of each resampled timestep (unit: hours)
+
+    Returns:
+        dict of 'period name': list of the resampled timesteps that contain
+        any of the period's timesteps
+    """
+    timesteps = list(timesteps)
+    factor = int(round(float(resolution) / dt))
+    blocks = (len(timesteps) - 1) // factor
+    position = dict((t, k) for k, t in enumerate(timesteps[1:]))
+    resampled = {}
+    for period, steps in periods.items():
+        resampled[period] = sorted(set(
+            position[t] // factor + 1 for t in steps
+            if t in position and position[t] // factor < blocks))
+    return resampled
+
+
+def segment_timesteps(data, timesteps, dt=1, tolerance=0.05, max_length=24):
+    """Merge consecutive timesteps of similar input into longer timesteps.
+
+    Starting at the first modelled timestep, each new timestep is extended
+    as long as every input time series (demands relative to their peak,
+    intermittent supplies, prices relative to their largest absolute value
+    and time variable efficiencies) varies by at most tolerance within it,
+    and it spans at most max_length timesteps. Quiet hours (e.g. nights of
+    flat demand without solar supply) thus become long timesteps, while
+    volatile hours stay short.
+
+    Args:
+        data: input data dict, as returned by read_excel; it is not modified
+        timesteps: a list of timesteps, e.g. range(0,8761)
+        dt: length of each original timestep (unit: hours)
+        tolerance: largest allowed variation of the normalised time series
+            within a merged timestep
+        max_length: largest number of timesteps merged into one
+
+    Returns:
+        (segmented_data, segmented_timesteps, durations) tuple of the input
+        data dict with merged time series, the list of its timesteps and a
+        Series of the duration (hours) of each of them, to be passed as dt
+        to create_model
+
+    Example:
+        >>> data = read_excel('mimo-example.xlsx')
+        >>> data, timesteps, dt = segment_timesteps(data, range(0, 8761))
+        >>> prob = create_model(data, dt, timesteps)  # doctest: +SKIP
+    """
+    timesteps = list(timesteps)
+    modelled = timesteps[1:]
+
+    # normalised time series, one column each
+    profiles = []
+    for key, how in TIME_SERIES:
+        df = data[key]
+        if df.empty:
+            continue
+        values = df.loc[modelled].values.astype(float)
+        if key in ('demand', 'buy_sell_price'):
+            scale = np.abs(values).max(axis=0)
+            values = values / np.where(scale > 0, scale, 1)
+        profiles.append(values)
+    profiles = np.hstack(profiles) if profiles else np.zeros((len(modelled),
+                                                              0))
+
+    lengths = []
+    start = 0
+    while start < len(modelled):
+        low = profiles[start].copy()
+        high = profiles[start].copy()
+        end = start + 1
+        while end < len(modelled) and end - start < max_length:
+            low = np.minimum(low, profiles[end])
+            high = np.maximum(high, profiles[end])
+            if (high - low > tolerance).any():
+                break
+            end += 1
+        lengths.append(end - start)
+        start = end
+
+    segmented, segmented_timesteps = merge_timesteps(data, timesteps, lengths)
+    durations = pd.Series([dt] + [length * dt for length in lengths],
+                          index=segmented_timesteps, name='dt')
+    print("Segmented {} timesteps into {}.".format(len(modelled),
+                                                   len(lengths)))
+    return segmented, segmented_timesteps, durations
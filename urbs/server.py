@@ -0,0 +1,320 @@
+import os
+import traceback
+from collections import OrderedDict
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+from pyomo.opt.base import SolverFactory
+from . import scenarios
+from .buildcache import model_key
+from .input import apply_scenario, read_excel
+from .model import create_model
+from .plot import result_figures
+from .report import report
+from .runfunctions import setup_solver
+from .saveload import save
+from .scenariospec import Edit, Scenario
+from .validation import validate_input
+
+# the worker only ever listens on the loopback interface
+HOST = 'localhost'
+DEFAULT_PORT = 6110
+
+# directory of the workers' random authentication keys, readable by the
+# user only; messages are unpickled, so the key must stay secret
+KEY_DIR = os.path.join(os.path.expanduser('~'), '.urbs')
+
+
+def authkey_file(port=DEFAULT_PORT):
+    """ Return the filename of the authentication key of a worker. """
+    return os.path.join(KEY_DIR, 'worker-{}.key'.format(port))
+
+
+def _write_authkey(filename, authkey):
+    """ Write authkey to a new file only the user can read. """
+    directory = os.path.dirname(filename)
+    if not os.path.exists(directory):
+        os.makedirs(directory, 0o700)
+    if os.path.exists(filename):
+        os.remove(filename)
+    key_file = os.open(filename, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    try:
+        os.write(key_file, authkey)
+    finally:
+        os.close(key_file)
+
+
+class Worker(object):
+    """Run urbs scenario jobs, keeping parsed inputs and built models.
+
+    Input spreadsheets are read only once per file modification time.
+    Models are cached by their model_key (c.f. urbs.model_key), so that
+    repeating a job with identical input, scenario, timesteps, dt and
+    objective skips model construction and only re-solves. Declarative
+    scenarios (c.f. urbs.Scenario) that only change mutable parameters are
+    applied to the resident model of the unchanged input instead of
+    building a model of their own (c.f. Scenario.apply_to_model). At most
+    max_models models are kept; the least recently used one is dropped
+    first.
+    """
+
+    def __init__(self, solver='glpk', max_models=4):
+        self.solver = solver
+        self.max_models = max_models
+        self._inputs = {}
+        self._models = OrderedDict()
+
+    def read_input(self, input_file):
+        """ Return the (validated) input data dict of a spreadsheet. """
+        input_file = os.path.abspath(input_file)
+        mtime = os.path.getmtime(input_file)
+        if self._inputs.get(input_file, (None, None))[0] != mtime:
+            data = read_excel(input_file)
+            validate_input(data)
+            self._inputs[input_file] = (mtime, data)
+        return self._inputs[input_file][1]
+
+    def get_model(self, data, dt, timesteps, objective):
+        """ Return a cached or newly created (unsolved or solved) model. """
+        key = model_key(data, dt, timesteps, objective)
+        if key in self._models:
+            prob = self._models.pop(key)
+            # drop result cache of the previous solve
+            if hasattr(prob, '_result'):
+                del prob._result
+        else:
+            prob = create_model(data, dt, timesteps, objective)
+            while len(self._models) >= self.max_models > 0:
+                self._models.popitem(last=False)
+        if self.max_models > 0:
+            self._models[key] = prob
+        return prob
+
+    def update_model(self, data, scenario, dt, timesteps, objective):
+        """Return the resident model of data, updated to a Scenario.
+
+        Returns:
+            (prob, restore) tuple of the updated model and the Scenario that
+            sets its parameters back to the values of data, or None if no
+            model of data is resident or the scenario changes the model
+            structure
+        """
+        if model_key(data, dt, timesteps, objective) not in self._models:
+            return None
+        try:
+            updates = scenario.parameter_updates(data)
+        except ValueError:
+            return None
+        restore = Scenario('restore', [
+            Edit(sheet, row, column, 'set', data[sheet].loc[row, column])
+            for sheet, row, column, value in updates])
+        prob = self.get_model(data, dt, timesteps, objective)
+        try:
+            scenario.apply_to_model(prob)
+        except ValueError:
+            return None
+        return prob, restore
+
+    def run(self, input_file, scenario, timesteps, result_dir, dt=1,
+            objective='cost', solver=None, report_tuples=None,
+            report_sites_name=None, plot_tuples=None, plot_sites_name=None,
+            plot_periods=None, solver_profile=None):
+        """Run one scenario job and write its result files.
+
+        Args:
+            input_file: filename to an Excel spreadsheet for urbs.read_excel
+            scenario: name of a scenario function or Scenario in
+                urbs.scenarios
+            timesteps: a list of timesteps, e.g. range(0,8761)
+            result_dir: directory name for result files, created if not
+                existent
+            dt: length of each time step (unit: hours)
+            objective: objective function, 'cost' or 'CO2'
+            solver: (optional) solver name, default: solver of the worker
+            solver_profile: (optional) name of a solver option profile
+                (c.f. urbs.SOLVER_PROFILES)
+            others: c.f. urbs.run_scenario
+
+        Returns:
+            list of filenames of the written result files (solver log, if
+            the solver writes one, HDF5, spreadsheet and figures)
+        """
+        scenario_function = getattr(scenarios, scenario, None)
+        if not (scenario.startswith('scenario_') and
+                callable(scenario_function) or
+                isinstance(scenario_function, Scenario)):
+            raise ValueError("Unknown scenario function '{}'!"
+                             .format(scenario))
+        if not os.path.exists(result_dir):
+            os.makedirs(result_dir)
+
+        # scenario functions modify the data in place, so apply them to a
+        # copy-on-write view of the cached input
+        input_data = self.read_input(input_file)
+        data, changed = apply_scenario(input_data, scenario_function)
+        validate_input(data, frames=changed)
+        timesteps = list(timesteps)
+        updated = None
+        if isinstance(scenario_function, Scenario):
+            updated = self.update_model(input_data, scenario_function, dt,
+                                        timesteps, objective)
+        if updated:
+            prob, restore = updated
+        else:
+            prob = self.get_model(data, dt, timesteps, objective)
+            restore = None
+
+        try:
+            files = []
+            log_filename = os.path.join(result_dir,
+                                        '{}.log'.format(scenario))
+            if os.path.exists(log_filename):
+                os.remove(log_filename)
+            optim = SolverFactory(solver or self.solver)
+            optim = setup_solver(optim, logfile=log_filename,
+                                 profile=solver_profile)
+            result = optim.solve(prob, tee=False)
+            if os.path.exists(log_filename):
+                files.append(log_filename)
+            termination = str(result.solver.termination_condition)
+            if termination != 'optimal':
+                raise RuntimeError("Solver terminated with condition '{}'."
+                                   .format(termination))
+
+            files.append(os.path.join(result_dir, '{}.h5'.format(scenario)))
+            save(prob, files[-1])
+            files.append(os.path.join(result_dir,
+                                      '{}.xlsx'.format(scenario)))
+            report(prob, files[-1],
+                   report_tuples=report_tuples,
+                   report_sites_name=report_sites_name)
+            files.extend(result_figures(
+                prob, os.path.join(result_dir, scenario), timesteps,
+                plot_title_prefix=scenario.replace('_', ' '),
+                plot_tuples=plot_tuples,
+                plot_sites_name=dict(plot_sites_name or {}),
+                periods=plot_periods,
+                figure_size=(24, 9)))
+        finally:
+            # leave the resident model of the input as it was built
+            if restore is not None:
+                restore.apply_to_model(prob)
+        return [os.path.abspath(filename) for filename in files]
+
+
+def _reply(conn, reply):
+    """ Send a reply to a client, unless it has hung up meanwhile. """
+    try:
+        conn.send(reply)
+    except (EOFError, IOError):
+        pass
+
+
+def serve(port=DEFAULT_PORT, authkey=None, solver='glpk', max_models=4):
+    """Run a worker that accepts scenario jobs on a local socket.
+
+    Jobs are processed one after another. Each connection sends one job
+    dict with the keyword arguments of Worker.run and receives a reply
+    dict: {'status': 'ok', 'files': [...]} on success or
+    {'status': 'error', 'message': ...} on failure. A job {'stop': True}
+    shuts down the worker.
+
+    Messages are pickled, so only clients knowing the secret authkey may
+    connect. By default, a random key is generated and written to
+    authkey_file(port), which only the user can read and which submit
+    reads; the file is removed when the worker shuts down.
+
+    Args:
+        port: TCP port on localhost to listen on
+        authkey: (optional) bytes shared secret that clients must present,
+            default: a random key written to authkey_file(port)
+        solver: default solver name for jobs
+        max_models: number of built models to keep in memory
+
+    Returns:
+        Nothing
+    """
+    key_filename = None
+    if authkey is None:
+        authkey = os.urandom(32)
+        key_filename = authkey_file(port)
+
+    worker = Worker(solver, max_models)
+    listener = Listener((HOST, port), authkey=authkey)
+    print("urbs worker listening on {}:{}".format(HOST, port))
+    try:
+        # only publish the key once the port is ours
+        if key_filename:
+            _write_authkey(key_filename, authkey)
+        while True:
+            try:
+                conn = listener.accept()
+            except (AuthenticationError, EOFError, IOError):
+                continue  # client without the key, or it hung up
+            try:
+                try:
+                    job = conn.recv()
+                except (EOFError, IOError):
+                    continue  # client hung up before sending its job
+                except Exception as error:
+                    job = error  # e.g. a pickle of unknown classes
+                if isinstance(job, dict) and job.get('stop'):
+                    _reply(conn, {'status': 'ok', 'files': []})
+                    break
+                try:
+                    if isinstance(job, Exception):
+                        raise job
+                    if not isinstance(job, dict):
+                        raise TypeError("Job must be a dict of keyword "
+                                        "arguments of Worker.run, not {}."
+                                        .format(type(job).__name__))
+                    reply = {'status': 'ok', 'files': worker.run(**job)}
+                except Exception as error:
+                    traceback.print_exc()
+                    reply = {'status': 'error', 'message':
+                             '{}: {}'.format(type(error).__name__, error)}
+                _reply(conn, reply)
+            finally:
+                conn.close()
+    finally:
+        listener.close()
+        if key_filename and os.path.exists(key_filename):
+            os.remove(key_filename)
+
+
+def submit(job, port=DEFAULT_PORT, authkey=None):
+    """Send a scenario job to a local worker and wait for its result.
+
+    Args:
+        job: dict of keyword arguments of Worker.run, e.g.
+            {'input_file': 'mimo-example.xlsx', 'scenario': 'scenario_base',
+             'timesteps': range(3500, 3669), 'result_dir': 'result/what-if'}
+        port: TCP port of the worker on localhost
+        authkey: (optional) bytes shared secret of the worker, default: read
+            from authkey_file(port)
+
+    Returns:
+        list of filenames of the written result files
+
+    Example:
+        >>> submit({'input_file': 'mimo-example.xlsx',
+        ...         'scenario': 'scenario_co2_limit',
+        ...         'timesteps': range(3500, 3669),
+        ...         'result_dir': 'result/what-if'})  # doctest: +SKIP
+    """
+    if authkey is None:
+        try:
+            with open(authkey_file(port), 'rb') as key_file:
+                authkey = key_file.read()
+        except IOError:
+            raise RuntimeError("No key file {} of a worker on port {}. Is "
+                               "it running (c.f. urbs.serve)?"
+                               .format(authkey_file(port), port))
+    conn = Client((HOST, port), authkey=authkey)
+    try:
+        conn.send(job)
+        reply = conn.recv()
+    finally:
+        conn.close()
+    if reply['status'] != 'ok':
+        raise RuntimeError(reply['message'])
+    return reply['files']
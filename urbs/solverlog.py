@@ -0,0 +1,175 @@
+import re
+from collections import OrderedDict
+
+# performance metrics read from solver log files
+METRICS = [
+    'status', 'objective',
+    'rows', 'columns', 'nonzeros',
+    'presolved_rows', 'presolved_columns', 'presolved_nonzeros',
+    'presolve_removed_rows', 'presolve_removed_columns',
+    'simplex_iterations', 'barrier_iterations', 'crossover_iterations',
+    'presolve_time', 'barrier_time', 'solve_time']
+
+# pattern of the first line of a solver run; logs appended by several runs
+# are only read from the last one
+RUN_START = OrderedDict([
+    ('glpk', r'^GLPSOL'),
+    ('gurobi', r'^Gurobi .*(?:logging started|Optimizer version)'),
+    ('highs', r'^Running HiGHS'),
+    ('cbc', r'^Welcome to the CBC')])
+
+# (metrics, pattern, occurrence) per solver: the groups of the first or last
+# match of pattern are the values of metrics; later entries take precedence
+PATTERNS = {
+    'glpk': [
+        (('rows', 'columns', 'nonzeros'),
+         r'^(\d+) rows, (\d+) columns, (\d+) non-zeros', 'first'),
+        (('presolved_rows', 'presolved_columns', 'presolved_nonzeros'),
+         r'^Preprocessing\.\.\.\s*\n(\d+) rows, (\d+) columns, '
+         r'(\d+) non-zeros', 'last'),
+        (('presolved_rows', 'presolved_columns', 'presolved_nonzeros'),
+         r'^Working LP has (\d+) row\(s\), (\d+) column\(s\), and '
+         r'(\d+) non-zero\(s\)', 'last'),
+        (('simplex_iterations',), r'^[* ]\s*(\d+): obj =\s*\S+\s+inf =',
+         'last'),
+        (('objective',), r'^\*\s*\d+: obj =\s*(\S+)', 'last'),
+        # progress lines of the interior-point method (glpsol --interior)
+        (('barrier_iterations', 'objective'),
+         r'GLPK Interior-Point Optimizer[\s\S]*'
+         r'^\s*(\d+): obj =\s*(\S+); rpi =', 'last'),
+        (('status',), r'^([A-Z][A-Z ;]*(?:SOLUTION|LIMIT|TERMINATED)'
+                      r'[A-Z ;]*)$', 'last'),
+        (('solve_time',), r'^Time used:\s*([\d.]+) secs', 'last')],
+    'gurobi': [
+        (('rows', 'columns', 'nonzeros'),
+         r'Optimize a model with (\d+) rows, (\d+) columns and '
+         r'(\d+) nonzeros', 'last'),
+        (('presolve_removed_rows', 'presolve_removed_columns'),
+         r'Presolve removed (\d+) rows and (\d+) columns', 'last'),
+        (('presolve_time',), r'Presolve time: ([\d.]+)s', 'last'),
+        (('presolved_rows', 'presolved_columns', 'presolved_nonzeros'),
+         r'Presolved: (\d+) rows, (\d+) columns, (\d+) nonzeros', 'last'),
+        (('barrier_iterations', 'barrier_time'),
+         r'Barrier solved model in (\d+) iterations and ([\d.]+) seconds',
+         'last'),
+        (('simplex_iterations', 'solve_time'),
+         r'Solved in (\d+) iterations and ([\d.]+) seconds', 'last'),
+        (('status',), r'^(Optimal objective|Infeasible model|'
+                      r'Unbounded model|Infeasible or unbounded model|'
+                      r'Time limit reached|Model is infeasible)', 'last'),
+        (('objective',), r'^Optimal objective\s+(\S+)', 'last')],
+    'highs': [
+        (('rows', 'columns', 'nonzeros'),
+         r'has (\d+) rows; (\d+) cols; (\d+) nonzeros', 'first'),
+        (('presolved_rows', 'presolve_removed_rows', 'presolved_columns',
+          'presolve_removed_columns', 'presolved_nonzeros'),
+         r'Reductions: rows (\d+)\(-?(\d+)\); columns (\d+)\(-?(\d+)\); '
+         r'elements (\d+)', 'last'),
+        (('status',), r'^Model\s+status\s*:\s*(.+?)\s*$', 'last'),
+        (('simplex_iterations',), r'^Simplex\s+iterations:\s*(\d+)',
+         'last'),
+        (('barrier_iterations',), r'^IPM\s+iterations:\s*(\d+)', 'last'),
+        (('crossover_iterations',), r'^Crossover\s+iterations:\s*(\d+)',
+         'last'),
+        (('objective',), r'^Objective value\s*:\s*(\S+)', 'last'),
+        (('solve_time',), r'^HiGHS run time\s*:\s*([\d.]+)', 'last')],
+    'cbc': [
+        (('rows', 'columns', 'nonzeros'),
+         r'has (\d+) rows, (\d+) columns and (\d+) elements', 'first'),
+        (('presolved_rows', 'presolve_removed_rows', 'presolved_columns',
+          'presolve_removed_columns', 'presolved_nonzeros'),
+         r'Presolve (\d+) \(-?(\d+)\) rows, (\d+) \(-?(\d+)\) columns '
+         r'and (\d+) \(-?\d+\) elements', 'last'),
+        (('status',), r'^(Optimal|Primal infeasible|Dual infeasible|'
+                      r'Stopped on \w+) - objective value', 'last'),
+        (('objective',), r'- objective value (\S+)', 'last'),
+        (('simplex_iterations',), r'objective \S+ - (\d+) iterations',
+         'last'),
+        (('presolve_time',), r'iterations time [\d.]+, Presolve ([\d.]+)',
+         'last'),
+        (('solve_time',), r'^Total time \(CPU seconds\):\s*([\d.]+)',
+         'last')]}
+
+# solver status messages (lower case) to Pyomo termination conditions
+STATUS = [
+    ('infeasible or unbounded', 'infeasibleOrUnbounded'),
+    ('no primal feasible', 'infeasible'),
+    ('no dual feasible', 'unbounded'),
+    ('primal infeasible', 'infeasible'),
+    ('dual infeasible', 'unbounded'),
+    ('infeasible', 'infeasible'),
+    ('unbounded', 'unbounded'),
+    ('time', 'maxTimeLimit'),
+    ('iteration', 'maxIterations'),
+    ('optimal', 'optimal')]
+
+
+def _status(message):
+    """ Translate a solver status message to a termination condition. """
+    for text, condition in STATUS:
+        if text in message.lower():
+            return condition
+    return message
+
+
+def parse_solver_log(filename, solver=None):
+    """Read performance metrics from a solver log file.
+
+    Supports the log files of glpk, gurobi, HiGHS and cbc. If a log file
+    contains several runs (e.g. gurobi appends to its log file), only the
+    last one is read. Presolve reductions are derived from the problem sizes
+    before and after presolve where the solver does not report them.
+
+    Args:
+        filename: solver log file
+        solver: (optional) solver name; default: detected from the log
+
+    Returns:
+        OrderedDict of the metrics in METRICS: status (a Pyomo termination
+        condition, e.g. 'optimal', if recognised), objective, problem size
+        (rows, columns, nonzeros) before and after presolve, presolve
+        reductions, iterations and times (seconds) per phase; None for
+        metrics not found in the log
+
+    Example:
+        >>> parse_solver_log('result/run/scenario_base.log')['solve_time']
+        ... # doctest: +SKIP
+    """
+    metrics = OrderedDict((metric, None) for metric in METRICS)
+    with open(filename) as log_file:
+        log = log_file.read()
+
+    if solver is None:
+        solver = next((name for name, start in RUN_START.items()
+                       if re.search(start, log, re.M)), None)
+    solver = (solver or '').replace('appsi_', '')
+    if solver not in PATTERNS:
+        return metrics
+
+    starts = list(re.finditer(RUN_START[solver], log, re.M))
+    if starts:
+        log = log[starts[-1].start():]
+
+    for names, pattern, occurrence in PATTERNS[solver]:
+        matches = list(re.finditer(pattern, log, re.M))
+        if not matches:
+            continue
+        match = matches[0] if occurrence == 'first' else matches[-1]
+        for name, value in zip(names, match.groups()):
+            if name == 'status':
+                metrics[name] = _status(value)
+            elif name.endswith(('rows', 'columns', 'nonzeros',
+                                'iterations')):
+                metrics[name] = int(value)
+            else:
+                metrics[name] = float(value)
+
+    for size in ('rows', 'columns'):
+        before = metrics[size]
+        after = metrics['presolved_' + size]
+        removed = metrics['presolve_removed_' + size]
+        if removed is None and None not in (before, after):
+            metrics['presolve_removed_' + size] = before - after
+        elif after is None and None not in (before, removed):
+            metrics['presolved_' + size] = before - removed
+    return metrics
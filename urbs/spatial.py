@@ -0,0 +1,390 @@
+import numpy as np
+import pandas as pd
+from .saveload import ResultContainer, create_result_cache
+
+# index levels of result entities that refer to sites
+SITE_LEVELS = ('sit', 'sit_')
+
+# columns that add up when entities of several sites are merged; all other
+# numeric columns are averaged, non-numeric ones taken from the first site
+SUMS = {
+    'site': ['area'],
+    'commodity': ['max', 'maxperhour'],
+    'process': ['inst-cap', 'cap-lo', 'cap-up'],
+    'transmission': ['inst-cap', 'cap-lo', 'cap-up'],
+    'storage': ['inst-cap-c', 'cap-lo-c', 'cap-up-c',
+                'inst-cap-p', 'cap-lo-p', 'cap-up-p'],
+    'dsm': ['cap-max-do', 'cap-max-up']}
+
+# integer columns of which the largest value of the merged sites is kept
+MAXIMA = {
+    'dsm': ['delay', 'recov']}
+
+
+def cluster_sites(data, k, topology=True):
+    """Group sites into k clusters of similar demand and supply profiles.
+
+    Each site is described by the time series of its demands (each divided
+    by its peak, so that only the shape counts) and of its intermittent
+    supplies. Sites are merged hierarchically (Ward's method): starting with
+    one cluster per site, the two clusters whose merge least increases the
+    variance within clusters are joined until k clusters are left. With
+    topology=True, only clusters connected by a transmission line are
+    merged, as long as such a pair exists.
+
+    Args:
+        data: input data dict, as returned by read_excel
+        k: number of clusters
+        topology: (optional) set False to ignore the transmission network
+
+    Returns:
+        dict of site name to cluster name; each cluster is named after its
+        site with the largest total demand
+
+    Example:
+        >>> data = read_excel('mimo-example.xlsx')
+        >>> clusters = cluster_sites(data, 2)  # doctest: +SKIP
+    """
+    if k < 1:
+        raise ValueError("Number of site clusters must be at least 1!")
+    sites = sorted(data['site'].index)
+    if k >= len(sites):
+        return dict((sit, sit) for sit in sites)
+
+    # features: demand shapes and intermittent supply of each site, i.e.
+    # one profile per ('Demand' or 'SupIm', commodity) and site
+    profiles = {}
+    demand = data['demand']
+    for (sit, com) in demand.columns:
+        peak = demand[sit, com].abs().max()
+        if peak > 0:
+            profiles[sit, 'Demand', com] = demand[sit, com] / peak
+    supim = data['supim']
+    for (sit, com) in supim.columns:
+        profiles[sit, 'SupIm', com] = supim[sit, com]
+    kinds = sorted(set((kind, com) for (sit, kind, com) in profiles))
+    length = len(demand.index)
+    features = np.zeros((len(sites), len(kinds) * length))
+    for (sit, kind, com), profile in profiles.items():
+        if sit in sites:
+            pos = kinds.index((kind, com)) * length
+            features[sites.index(sit), pos:pos + length] = (
+                profile.reindex(demand.index).fillna(0).values)
+
+    # sites connected by transmission lines
+    adjacent = np.zeros((len(sites), len(sites)), dtype=bool)
+    for (sin, sout, tra, com) in data['transmission'].index:
+        if sin in sites and sout in sites and sin != sout:
+            adjacent[sites.index(sin), sites.index(sout)] = True
+            adjacent[sites.index(sout), sites.index(sin)] = True
+
+    members = [[sit] for sit in sites]
+    sizes = np.ones(len(sites))
+    active = np.ones(len(sites), dtype=bool)
+    distance = np.full((len(sites), len(sites)), np.inf)
+    for i in range(len(sites)):
+        distance[i] = _ward_distance(features, sizes, i)
+        distance[i, i] = np.inf
+
+    while active.sum() > k:
+        candidates = np.outer(active, active)
+        np.fill_diagonal(candidates, False)
+        if topology and (adjacent & candidates).any():
+            candidates &= adjacent
+        i, j = np.unravel_index(
+            np.where(candidates, distance, np.inf).argmin(), distance.shape)
+        i, j = min(i, j), max(i, j)
+
+        # merge cluster j into cluster i
+        features[i] = ((sizes[i] * features[i] + sizes[j] * features[j]) /
+                       (sizes[i] + sizes[j]))
+        sizes[i] += sizes[j]
+        members[i].extend(members[j])
+        active[j] = False
+        adjacent[i] |= adjacent[j]
+        adjacent[:, i] = adjacent[i]
+        adjacent[i, i] = False
+        distance[i] = np.where(active, _ward_distance(features, sizes, i),
+                               np.inf)
+        distance[i, i] = np.inf
+        distance[:, i] = distance[i]
+
+    # name clusters after their site with the largest total demand
+    total_demand = demand.sum().groupby(level=0).sum()
+    clusters = {}
+    for i in np.flatnonzero(active):
+        name = max(sorted(members[i]),
+                   key=lambda sit: total_demand.get(sit, 0))
+        for sit in members[i]:
+            clusters[sit] = name
+    return clusters
+
+
+def clusters_to_frame(clusters):
+    """Convert the site clusters of cluster_sites to one DataFrame.
+
+    Args:
+        clusters: dict of site name to cluster name
+
+    Returns:
+        a DataFrame with columns 'Site' and 'Cluster'
+    """
+    return pd.DataFrame(sorted(clusters.items()), columns=['Site', 'Cluster'])
+
+
+def _ward_distance(features, sizes, i):
+    """ Return Ward's merge distances of cluster i to all clusters. """
+    spread = np.sqrt(((features - features[i]) ** 2).sum(axis=1))
+    return np.sqrt(2 * sizes * sizes[i] / (sizes + sizes[i])) * spread
+
+
+def aggregate_sites(data, clusters):
+    """Merge the sites of an input data dict into clusters.
+
+    Capacities, capacity limits, demands, site areas, commodity limits and
+    DSM capacities of the sites of a cluster are summed up; costs,
+    efficiencies and other specific values as well as intermittent supply
+    and time variable efficiency time series are averaged. Transmission
+    lines within a cluster are removed, parallel lines between two clusters
+    are merged.
+
+    Args:
+        data: input data dict, as returned by read_excel or a scenario
+            function; it is not modified
+        clusters: dict of site name to cluster name, as returned by
+            cluster_sites; sites not listed remain unchanged
+
+    Returns:
+        the input data dict with clusters as sites
+    """
+    aggregated = dict(data)
+    aggregated['site'] = _aggregate_frame(data['site'], clusters, 'site',
+                                          ['Name'])
+    aggregated['commodity'] = _aggregate_frame(
+        data['commodity'], clusters, 'commodity', ['Site'])
+    aggregated['process'] = _aggregate_frame(
+        data['process'], clusters, 'process', ['Site'])
+    aggregated['storage'] = _aggregate_frame(
+        data['storage'], clusters, 'storage', ['Site'])
+    aggregated['dsm'] = _aggregate_frame(
+        data['dsm'], clusters, 'dsm', ['Site'])
+
+    transmission = data['transmission']
+    if not transmission.empty:
+        sin = transmission.index.get_level_values('Site In')
+        sout = transmission.index.get_level_values('Site Out')
+        internal = (sin.map(lambda sit: clusters.get(sit, sit)) ==
+                    sout.map(lambda sit: clusters.get(sit, sit)))
+        transmission = transmission[~np.asarray(internal, dtype=bool)]
+    aggregated['transmission'] = _aggregate_frame(
+        transmission, clusters, 'transmission', ['Site In', 'Site Out'])
+
+    aggregated['demand'] = _aggregate_columns(data['demand'], clusters, 'sum')
+    aggregated['supim'] = _aggregate_columns(data['supim'], clusters, 'mean')
+    aggregated['eff_factor'] = _aggregate_columns(data['eff_factor'],
+                                                  clusters, 'mean')
+
+    print("Aggregated {} sites into {} clusters.".format(
+        len(data['site'].index), len(aggregated['site'].index)))
+    return aggregated
+
+
+def _aggregate_frame(df, clusters, key, site_levels):
+    """ Return df with site index levels mapped to clusters and merged. """
+    if df.empty:
+        return df.copy()
+    frame = df.reset_index()
+    for level in site_levels:
+        frame[level] = frame[level].map(lambda sit: clusters.get(sit, sit))
+
+    functions = {}
+    for column in df.columns:
+        if column in SUMS.get(key, ()):
+            functions[column] = _sum
+        elif column in MAXIMA.get(key, ()):
+            functions[column] = 'max'
+        elif pd.api.types.is_numeric_dtype(df[column]):
+            functions[column] = 'mean'
+        else:
+            functions[column] = 'first'
+    return frame.groupby(list(df.index.names)).agg(functions)[df.columns]
+
+
+def _sum(values):
+    """ Sum of values, NaN if all values are NaN. """
+    return values.sum() if values.notnull().any() else np.nan
+
+
+def _aggregate_columns(df, clusters, how):
+    """ Return time series df with (site, ...) columns merged by cluster. """
+    if df.empty:
+        return df.copy()
+    transposed = df.T
+    transposed.index = pd.MultiIndex.from_tuples(
+        [(clusters.get(col[0], col[0]), ) + tuple(col[1:])
+         for col in df.columns], names=df.columns.names)
+    grouped = transposed.groupby(level=list(range(df.columns.nlevels)))
+    return getattr(grouped, how)().T
+
+
+def disaggregate_sites(prob, data, clusters):
+    """Map the result of a model of clustered sites back to the sites.
+
+    New capacities of a cluster are distributed to the entities of its
+    sites in proportion to their remaining capacity potential (cap-up minus
+    inst-cap); if a potential is unlimited, equally. The flows of processes,
+    storages and transmission lines are distributed in proportion to the
+    resulting total capacities. Commodity purchases, sales and stock use are
+    distributed in proportion to the demand and process throughput of each
+    site, DSM in proportion to the DSM capacities. Transmission lines within
+    a cluster keep their installed capacity, without flows. Entities of
+    the clustered model that refer to sites but are no variables (sets,
+    parameters and duals) are omitted.
+
+    As flows within a cluster are not modelled, the commodity balance of a
+    single site is only approximately met, while the totals of each cluster
+    are exact.
+
+    Args:
+        prob: a solved urbs model instance (or result container) created
+            from the input data returned by aggregate_sites
+        data: the input data dict before aggregation
+        clusters: dict of site name to cluster name, as passed to
+            aggregate_sites
+
+    Returns:
+        a result container (c.f. urbs.load) with input data and results
+        by site, for urbs.report, urbs.result_figures and urbs.save
+    """
+    if not hasattr(prob, '_result'):
+        prob._result = create_result_cache(prob)
+    cached = prob._result
+
+    result = {}
+    for name, entity in cached.items():
+        if not set(SITE_LEVELS) & set(entity.index.names):
+            result[name] = entity
+
+    _split_capacities(result, cached, clusters, data['process'],
+                      ['sit', 'pro'], 'cap_pro', 'inst-cap', 'cap-up',
+                      ['tau_pro', 'e_pro_in', 'e_pro_out'])
+    _split_capacities(result, cached, clusters, data['storage'],
+                      ['sit', 'sto', 'com'], 'cap_sto_c', 'inst-cap-c',
+                      'cap-up-c', ['e_sto_con'])
+    _split_capacities(result, cached, clusters, data['storage'],
+                      ['sit', 'sto', 'com'], 'cap_sto_p', 'inst-cap-p',
+                      'cap-up-p', ['e_sto_in', 'e_sto_out'])
+
+    transmission = data['transmission'].copy()
+    transmission.index.names = ['sit', 'sit_', 'tra', 'com']
+    internal = pd.Series(
+        [clusters.get(sin, sin) == clusters.get(sout, sout)
+         for (sin, sout, tra, com) in transmission.index],
+        index=transmission.index, dtype=bool)
+    _split_capacities(result, cached, clusters, transmission[~internal],
+                      ['sit', 'sit_', 'tra', 'com'], 'cap_tra', 'inst-cap',
+                      'cap-up', ['e_tra_in', 'e_tra_out'])
+    if internal.any() and 'cap_tra' in result:
+        installed = transmission.loc[internal, 'inst-cap']
+        result['cap_tra'] = pd.concat(
+            [result['cap_tra'], installed.rename('cap_tra')]).sort_index()
+        result['cap_tra_new'] = pd.concat(
+            [result['cap_tra_new'],
+             (installed * 0).rename('cap_tra_new')]).sort_index()
+
+    # commodities: by demand and process throughput of each site
+    usage = data['demand'].sum()
+    usage.index.names = ['sit', 'com']
+    for name in ('e_pro_in', 'e_pro_out'):
+        if name in result and not result[name].empty:
+            usage = usage.add(result[name].groupby(level=['sit', 'com']).sum(),
+                              fill_value=0)
+    usage = usage.to_dict()
+    commodity = data['commodity']
+    weights = pd.Series(
+        [usage.get((sit, com), 0.0) for (sit, com, com_type)
+         in commodity.index],
+        index=pd.MultiIndex.from_tuples(commodity.index.tolist(),
+                                        names=['sit', 'com', 'com_type']))
+    shares = _shares(weights, clusters)
+    for name in ('e_co_stock', 'e_co_sell', 'e_co_buy'):
+        if name in cached:
+            result[name] = _split(cached[name], shares)
+
+    # demand side management: by DSM capacities
+    dsm = data['dsm'].copy()
+    dsm.index.names = ['sit', 'com']
+    for name, column in (('dsm_up', 'cap-max-up'),
+                         ('dsm_down', 'cap-max-do')):
+        if name in cached and not dsm.empty:
+            result[name] = _split(cached[name], _shares(dsm[column], clusters))
+
+    return ResultContainer(data, result)
+
+
+def _split_capacities(result, cached, clusters, frame, keys, cap, inst, up,
+                      flows):
+    """ Distribute capacities and flows of clusters to entities of sites. """
+    new = cap + '_new'
+    if frame.empty or new not in cached:
+        return
+    frame = frame.copy()
+    frame.index.names = keys
+
+    result[new] = _split(cached[new], _shares(frame[up] - frame[inst],
+                                              clusters))
+    total = result[new] + frame[inst].reindex(result[new].index)
+    result[cap] = total.rename(cap)
+
+    shares = _shares(total, clusters)
+    for flow in flows:
+        if flow in cached:
+            result[flow] = _split(cached[flow], shares)
+
+
+def _shares(weights, clusters):
+    """Return the shares of the entities of sites in their cluster entity.
+
+    Args:
+        weights: Series of non-negative weights, indexed by entity tuples
+            of the original sites, e.g. levels ('sit', 'pro')
+        clusters: dict of site name to cluster name
+
+    Returns:
+        DataFrame with the columns '{level}_cluster' (index of the cluster
+        entity), the index levels of weights and 'share'; entities share
+        equally if any weight of their cluster entity is not finite or all
+        are zero
+    """
+    keys = list(weights.index.names)
+    frame = weights.rename('weight').reset_index()
+    for key in keys:
+        if key in SITE_LEVELS:
+            frame[key + '_cluster'] = frame[key].map(
+                lambda sit: clusters.get(sit, sit))
+        else:
+            frame[key + '_cluster'] = frame[key]
+    frame['valid'] = np.isfinite(frame['weight']) & (frame['weight'] >= 0)
+
+    grouped = frame.groupby([key + '_cluster' for key in keys])
+    total = grouped['weight'].transform('sum')
+    valid = grouped['valid'].transform('min').astype(bool) & (total > 0)
+    count = grouped['weight'].transform('size')
+    frame['share'] = 1.0 / count
+    frame.loc[valid, 'share'] = frame.loc[valid, 'weight'] / total[valid]
+    return frame[[key + '_cluster' for key in keys] + keys + ['share']]
+
+
+def _split(entity, shares):
+    """ Return entity of clusters split to sites according to shares. """
+    if entity.empty:
+        return entity
+    keys = [col[:-len('_cluster')] for col in shares.columns
+            if col.endswith('_cluster')]
+    names = list(entity.index.names)
+    frame = entity.rename('value').reset_index()
+    frame = frame.rename(columns=dict((key, key + '_cluster')
+                                      for key in keys))
+    frame = frame.merge(shares, on=[key + '_cluster' for key in keys])
+    frame['value'] = frame['value'] * frame['share']
+    return frame.set_index(names)['value'].rename(entity.name).sort_index()
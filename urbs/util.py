@@ -1,3 +1,4 @@
+import os
 
 try:
     isinstance("", basestring)
@@ -8,3 +9,14 @@ except NameError:
 
     def is_string(s):
         return isinstance(s, str)  # Python 2
+
+
+def replace_file(source, destination):
+    """ Move file source to destination, replacing it atomically where
+    possible (Python 3); Python 2 removes destination first """
+    if hasattr(os, 'replace'):
+        os.replace(source, destination)
+    else:
+        if os.path.exists(destination):
+            os.remove(destination)
+        os.rename(source, destination)
@@ -1,7 +1,19 @@
 import pandas as pd
 
 
-def validate_input(data):
+# checks of validate_input with the names of the data frames they involve
+_CHECKS = []
+
+
+def _check(*frames):
+    """ Register decorated function as check involving given frames. """
+    def register(function):
+        _CHECKS.append((frames, function))
+        return function
+    return register
+
+
+def validate_input(data, frames=None):
     """ Input validation function
 
     This function raises errors if inconsistent or illogical inputs are
@@ -9,13 +21,23 @@ def validate_input(data):
 
     Args:
         data: Input data frames as read in by input.read_excel
+        frames: (optional) names of the changed data frames; if given, only
+            the checks involving these frames are run, e.g. for scenario data
+            derived from already validated input (c.f. input.apply_scenario)
 
     Returns:
         Customized error messages.
 
     """
 
-    # Ensure correct formation of vertex rule
+    for check_frames, check_function in _CHECKS:
+        if frames is None or set(check_frames) & set(frames):
+            check_function(data)
+
+
+@_check('process', 'commodity', 'process_commodity')
+def _check_vertex_rule(data):
+    """ Ensure correct formation of vertex rule. """
     for (sit, pro) in data['process'].index:
         for com in data['commodity'].index.get_level_values('Commodity'):
             simplified_pro_com_index = ([(p, c) for p, c, d in
@@ -30,8 +52,10 @@ def validate_input(data):
                                  '! The pair (' + sit + ',' + com + ')'
                                  ' is not in commodity input sheet.')
 
-    # Identify infeasible process, transmission and storage capacity
-    # constraints before solving
+
+@_check('process')
+def _check_process_capacities(data):
+    """ Identify infeasible process capacity constraints. """
     for index in data['process'].index:
         if not (data['process'].loc[index]['cap-lo'] <=
                 data['process'].loc[index]['cap-up'] and
@@ -40,6 +64,10 @@ def validate_input(data):
             raise ValueError('Ensure cap_lo <= cap_up and inst_cap <= cap_up'
                              ' for all processes.')
 
+
+@_check('transmission')
+def _check_transmission_capacities(data):
+    """ Identify infeasible transmission capacity constraints. """
     for index in data['transmission'].index:
         if not (data['transmission'].loc[index]['cap-lo'] <=
                 data['transmission'].loc[index]['cap-up'] and
@@ -48,6 +76,10 @@ def validate_input(data):
             raise ValueError('Ensure cap_lo <= cap_up and inst_cap <= cap_up'
                              ' for all transmissions.')
 
+
+@_check('storage')
+def _check_storage_capacities(data):
+    """ Identify infeasible storage capacity constraints. """
     for index in data['storage'].index:
         if not (data['storage'].loc[index]['cap-lo-p'] <=
                 data['storage'].loc[index]['cap-up-p'] and
@@ -62,7 +94,11 @@ def validate_input(data):
                   data['storage'].loc[index]['cap-up-c']):
             raise ValueError('Ensure cap_lo <= cap_up and inst_cap <= cap_up'
                              ' for all storage capacities.')
-                                 
+
+
+@_check('storage')
+def _check_storage_ep_ratio(data):
+    """ Ensure consistent storage energy-to-power ratios. """
     if 'ep-ratio' in list(data['storage']):
         if (data['storage']['ep-ratio'] <= 0).any():
             raise ValueError("In worksheet 'storage' all values in column 'ep-ratio'"
@@ -82,18 +118,28 @@ def validate_input(data):
                                 +str(index)+
                                 ' are consistent with the given energy-to'
                                 '-power ratio.')
-        
-    # Identify SupIm values larger than 1, which lead to an infeasible model
+
+
+@_check('supim')
+def _check_supim(data):
+    """ Identify SupIm values larger than 1. """
     if (data['supim'] > 1).sum().sum() > 0:
         raise ValueError('All values in Sheet SupIm must be <= 1.')
 
-    # Identify non sensible values for inputs
+
+@_check('storage')
+def _check_storage_init(data):
+    """ Identify non sensible initial storage states. """
     if (data['storage']['init'] > 1).any():
         raise ValueError("In worksheet 'storage' all values in column 'init'"
                          " must be either in [0,1] (for a fixed initial"
                          " storage level) or 'nan' for a variable initial"
                          " storage level")
 
+
+@_check('commodity')
+def _check_commodity_columns(data):
+    """ Identify outdated commodity column labels. """
     # Identify outdated column label 'maxperstep' on the commodity tab and
     # suggest a rename to 'maxperhour'
     if 'maxperstep' in list(data['commodity']):
@@ -103,7 +149,10 @@ def validate_input(data):
                        "ensure that the input values are adjusted "
                        "correspondingly.")
 
-    # Identify inconsistencies in site names throughout worksheets
+
+@_check('site', 'commodity', 'process', 'storage', 'dsm')
+def _check_site_names(data):
+    """ Identify inconsistencies in site names. """
     for site in data['site'].index.tolist():
         if site not in data['commodity'].index.levels[0].tolist():
             raise KeyError("All names in the column 'Site' in input worksheet "